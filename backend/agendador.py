@@ -0,0 +1,164 @@
+"""Agendador interno das tarefas periódicas.
+
+Cada tarefa tem uma linha em `tarefas_agendadas` que funciona como trava
+entre processos: antes de executar, o processo tenta "alugar" a tarefa com
+um UPDATE condicional (só passa se a trava estiver livre ou vencida), então
+apenas um worker executa a tarefa por vez. A linha também guarda a marca
+d'água, o início da última execução concluída, que as tarefas incrementais
+usam para analisar só o que mudou desde então.
+
+As tarefas (varredura e retenção de notificações, reconciliação dos
+contadores) rodam por uma thread opcional em cada processo
+(AGENDADOR_HABILITADO) ou pelo comando `flask agendador executar`.
+"""
+
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import or_, update
+
+from extensions import db
+from models import TarefaAgendada
+from sql_utils import insert_ignorando_duplicadas
+
+# Sobreposição entre execuções incrementais: cobre transações que gravaram
+# `atualizado_em` antes do início da varredura anterior mas fizeram commit depois
+_MARGEM_MARCA_DAGUA = timedelta(minutes=5)
+
+
+def _varredura_notificacoes(marca_dagua, completa):
+    from routes_notificacoes import verificar_e_criar_notificacoes
+
+    desde = None if completa or marca_dagua is None else marca_dagua - _MARGEM_MARCA_DAGUA
+    return verificar_e_criar_notificacoes(desde=desde)
+
+
+def _reconciliar_contadores(marca_dagua, completa):
+    from contadores_notificacoes import reconciliar_contadores
+
+    return reconciliar_contadores()
+
+
+def _retencao_notificacoes(marca_dagua, completa):
+    from retencao_notificacoes import aplicar_retencao
+
+    return aplicar_retencao()
+
+
+# nome -> (função(marca_dagua, completa), chave de configuração do intervalo em minutos)
+TAREFAS = {
+    "varredura_notificacoes": (_varredura_notificacoes, "NOTIFICACOES_VARREDURA_MINUTOS"),
+    "reconciliar_contadores": (
+        _reconciliar_contadores, "CONTADOR_NOTIFICACOES_RECONCILIAR_MINUTOS"
+    ),
+    "retencao_notificacoes": (_retencao_notificacoes, "NOTIFICACOES_RETENCAO_INTERVALO_MINUTOS"),
+}
+
+
+def _identificacao() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _adquirir_trava(nome: str, dono: str, duracao: timedelta) -> bool:
+    agora = datetime.now()
+    tabela = TarefaAgendada.__table__
+    with db.engine.begin() as conn:
+        conn.execute(insert_ignorando_duplicadas(tabela), {"nome": nome})
+        resultado = conn.execute(
+            update(tabela)
+            .where(
+                tabela.c.nome == nome,
+                or_(tabela.c.bloqueada_ate.is_(None), tabela.c.bloqueada_ate < agora),
+            )
+            .values(dono=dono, bloqueada_ate=agora + duracao)
+        )
+    return resultado.rowcount == 1
+
+
+def _liberar_trava(nome: str, dono: str, **valores):
+    tabela = TarefaAgendada.__table__
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(tabela)
+            .where(tabela.c.nome == nome, tabela.c.dono == dono)
+            .values(dono=None, bloqueada_ate=None, **valores)
+        )
+
+
+def executar_tarefa(nome: str, completa: bool = False):
+    """Executa a tarefa se nenhum outro processo estiver com ela.
+
+    Retorna o resultado da tarefa, ou None se a trava estiver ocupada. A marca
+    d'água só avança quando a execução termina sem erro.
+    """
+    funcao, _ = TAREFAS[nome]
+    dono = _identificacao()
+    duracao = timedelta(seconds=current_app.config["AGENDADOR_TRAVA_SEGUNDOS"])
+    if not _adquirir_trava(nome, dono, duracao):
+        return None
+
+    inicio = datetime.now()
+    try:
+        marca_dagua = db.session.query(TarefaAgendada.marca_dagua).filter_by(nome=nome).scalar()
+        db.session.rollback()
+        resultado = funcao(marca_dagua, completa)
+    except Exception:
+        db.session.rollback()
+        _liberar_trava(nome, dono)
+        raise
+
+    _liberar_trava(
+        nome, dono, marca_dagua=inicio, ultima_execucao=datetime.now(), ultimo_resultado=resultado
+    )
+    return resultado
+
+
+def _tarefas_pendentes(app) -> list:
+    """Tarefas habilitadas cujo intervalo já passou desde a última execução."""
+    execucoes = dict(db.session.query(TarefaAgendada.nome, TarefaAgendada.ultima_execucao))
+    db.session.rollback()
+    agora = datetime.now()
+    pendentes = []
+    for nome, (_, chave_intervalo) in TAREFAS.items():
+        minutos = app.config.get(chave_intervalo, 0)
+        ultima = execucoes.get(nome)
+        if minutos > 0 and (ultima is None or agora - ultima >= timedelta(minutes=minutos)):
+            pendentes.append(nome)
+    return pendentes
+
+
+def executar_pendentes(app):
+    for nome in _tarefas_pendentes(app):
+        try:
+            executar_tarefa(nome)
+        except Exception as e:
+            print(f"Erro na tarefa agendada {nome}: {e}")
+
+
+def executar_continuamente(app, atraso_inicial: float = 0):
+    """Laço do agendador: verifica as tarefas pendentes a cada AGENDADOR_INTERVALO_SEGUNDOS."""
+    time.sleep(atraso_inicial)
+    while True:
+        try:
+            with app.app_context():
+                executar_pendentes(app)
+        except Exception as e:
+            print(f"Erro no agendador: {e}")
+        time.sleep(app.config["AGENDADOR_INTERVALO_SEGUNDOS"])
+
+
+def iniciar_agendador(app):
+    """Sobe a thread do agendador neste processo, se AGENDADOR_HABILITADO."""
+    if not app.config.get("AGENDADOR_HABILITADO") or app.extensions.get("agendador"):
+        return
+    app.extensions["agendador"] = True
+    threading.Thread(
+        target=executar_continuamente,
+        args=(app, app.config["AGENDADOR_INTERVALO_SEGUNDOS"]),
+        name="agendador",
+        daemon=True,
+    ).start()
@@ -0,0 +1,218 @@
+"""Cache persistente das respostas da IA.
+
+A chave é o sha256 das entradas normalizadas (minúsculas, sem acentos e com
+espaços colapsados) junto com o tipo da geração, o modelo e a versão do
+prompt. As entradas ficam na tabela `cache_ia`, com expiração por idade
+(IA_CACHE_TTL_DIAS) e descarte das menos acessadas recentemente quando o
+total passa de IA_CACHE_MAX_ENTRADAS.
+
+O cache usa conexões próprias do engine, sem passar pela sessão do ORM, para
+que gravar uma resposta nunca faça commit de alterações pendentes de quem
+chamou a IA. Fora de um contexto de aplicação ele simplesmente não é usado.
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, func, insert, or_, select, update
+
+from extensions import db
+from models import CacheIA
+
+_contadores = {"acertos": 0, "falhas": 0, "gravacoes": 0, "descartes": 0}
+_lock = threading.Lock()
+
+
+def _incrementar(contador: str, quantidade: int = 1):
+    with _lock:
+        _contadores[contador] += quantidade
+
+
+def normalizar_texto(texto) -> str:
+    """Normaliza um texto para compor a chave do cache."""
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r"\s+", " ", texto.casefold()).strip()
+    return texto.rstrip(".!?;, ")
+
+
+def gerar_chave(tipo: str, modelo: str, versao_prompt: str, entradas) -> str:
+    partes = [tipo, modelo, versao_prompt] + [normalizar_texto(e) for e in entradas]
+    return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+
+def _cache_ativo() -> bool:
+    return has_app_context() and current_app.config.get("IA_CACHE_HABILITADO", True)
+
+
+def buscar_no_cache(tipo: str, modelo: str, versao_prompt: str, entradas):
+    """Retorna a resposta em cache ou None se não houver entrada válida."""
+    if not _cache_ativo():
+        return None
+
+    chave = gerar_chave(tipo, modelo, versao_prompt, entradas)
+    tabela = CacheIA.__table__
+    validade = datetime.now() - timedelta(days=current_app.config["IA_CACHE_TTL_DIAS"])
+
+    try:
+        with db.engine.begin() as conn:
+            resposta = conn.execute(
+                select(tabela.c.resposta).where(
+                    tabela.c.chave == chave, tabela.c.criado_em >= validade
+                )
+            ).scalar()
+            if resposta is not None:
+                conn.execute(
+                    update(tabela)
+                    .where(tabela.c.chave == chave)
+                    .values(acessos=tabela.c.acessos + 1, ultimo_acesso=datetime.now())
+                )
+    except Exception as e:
+        print(f"Aviso: falha ao consultar cache de IA: {e}")
+        resposta = None
+
+    _incrementar("acertos" if resposta is not None else "falhas")
+    return resposta
+
+
+def gravar_no_cache(tipo: str, modelo: str, versao_prompt: str, entradas, resposta: str):
+    """Grava (ou substitui) uma resposta no cache e aplica o limite de tamanho."""
+    if not _cache_ativo():
+        return
+
+    try:
+        with db.engine.begin() as conn:
+            _gravar(conn, gerar_chave(tipo, modelo, versao_prompt, entradas),
+                    tipo, modelo, versao_prompt, resposta)
+            _aplicar_limite(conn)
+    except Exception as e:
+        print(f"Aviso: falha ao gravar cache de IA: {e}")
+
+
+def _nova_entrada(chave, tipo, modelo, versao_prompt, resposta) -> dict:
+    agora = datetime.now()
+    return dict(
+        chave=chave,
+        tipo=tipo,
+        modelo=modelo,
+        versao_prompt=versao_prompt,
+        resposta=resposta,
+        acessos=0,
+        ultimo_acesso=agora,
+        criado_em=agora,
+        atualizado_em=agora,
+    )
+
+
+def _gravar(conn, chave, tipo, modelo, versao_prompt, resposta):
+    tabela = CacheIA.__table__
+    conn.execute(delete(tabela).where(tabela.c.chave == chave))
+    conn.execute(
+        insert(tabela).values(**_nova_entrada(chave, tipo, modelo, versao_prompt, resposta))
+    )
+    _incrementar("gravacoes")
+
+
+def _aplicar_limite(conn):
+    """Remove as entradas expiradas e as menos usadas recentemente acima do limite."""
+    tabela = CacheIA.__table__
+    validade = datetime.now() - timedelta(days=current_app.config["IA_CACHE_TTL_DIAS"])
+    removidas = conn.execute(delete(tabela).where(tabela.c.criado_em < validade)).rowcount
+
+    excedente = conn.execute(select(func.count()).select_from(tabela)).scalar() - (
+        current_app.config["IA_CACHE_MAX_ENTRADAS"]
+    )
+    if excedente > 0:
+        chaves = conn.execute(
+            select(tabela.c.chave).order_by(tabela.c.ultimo_acesso.asc()).limit(excedente)
+        ).scalars().all()
+        removidas += conn.execute(delete(tabela).where(tabela.c.chave.in_(chaves))).rowcount
+
+    if removidas:
+        _incrementar("descartes", removidas)
+
+
+def estatisticas() -> dict:
+    """Contadores do processo atual e tamanho do cache."""
+    with _lock:
+        dados = dict(_contadores)
+    consultas = dados["acertos"] + dados["falhas"]
+    dados["taxaAcerto"] = round(dados["acertos"] / consultas, 4) if consultas else None
+    dados["entradas"] = db.session.query(func.count(CacheIA.chave)).scalar()
+    return dados
+
+
+def aquecer_cache(limite: int = None) -> dict:
+    """Preenche o cache com diagnósticos e resumos já gerados nas OS existentes.
+
+    As OS são lidas das mais recentes para as mais antigas; para entradas
+    repetidas vale a resposta mais recente. Chaves já presentes no cache não
+    são sobrescritas.
+    """
+    # Import tardio: ai_utils importa este módulo
+    from ai_utils import (
+        MODELO_IA,
+        PRE_DIAGNOSTICO_INDISPONIVEL,
+        RESUMO_INDISPONIVEL,
+        VERSAO_PROMPT_PRE_DIAGNOSTICO,
+        VERSAO_PROMPT_RESUMO,
+    )
+    from models import OrdemServico
+
+    query = (
+        db.session.query(
+            OrdemServico.tipo_aparelho,
+            OrdemServico.marca_modelo,
+            OrdemServico.problema_relatado,
+            OrdemServico.diagnostico_tecnico,
+            OrdemServico.observacoes,
+        )
+        .filter(
+            OrdemServico.diagnostico_tecnico.isnot(None),
+            or_(OrdemServico.ia_status.is_(None), OrdemServico.ia_status == "concluido"),
+        )
+        .order_by(OrdemServico.id.desc())
+    )
+    if limite:
+        query = query.limit(limite)
+
+    vistas = set()
+    novas = []
+    for tipo_ap, marca, problema, diagnostico, observacoes in query.yield_per(500):
+        candidatos = []
+        if diagnostico and diagnostico != PRE_DIAGNOSTICO_INDISPONIVEL:
+            candidatos.append((
+                "pre_diagnostico", VERSAO_PROMPT_PRE_DIAGNOSTICO,
+                (tipo_ap, marca, problema), diagnostico,
+            ))
+        if observacoes and "Resumo: " in observacoes:
+            resumo = observacoes.rsplit("Resumo: ", 1)[1].strip()
+            if resumo and resumo != RESUMO_INDISPONIVEL:
+                candidatos.append(("resumo", VERSAO_PROMPT_RESUMO, (problema,), resumo))
+
+        for tipo, versao, entradas, resposta in candidatos:
+            chave = gerar_chave(tipo, MODELO_IA, versao, entradas)
+            if chave not in vistas:
+                vistas.add(chave)
+                novas.append(_nova_entrada(chave, tipo, MODELO_IA, versao, resposta))
+    db.session.rollback()
+
+    tabela = CacheIA.__table__
+    with db.engine.begin() as conn:
+        existentes = set()
+        chaves = [n["chave"] for n in novas]
+        for i in range(0, len(chaves), 500):
+            existentes.update(conn.execute(
+                select(tabela.c.chave).where(tabela.c.chave.in_(chaves[i:i + 500]))
+            ).scalars())
+        inserir = [n for n in novas if n["chave"] not in existentes]
+        if inserir:
+            conn.execute(insert(tabela), inserir)
+            _incrementar("gravacoes", len(inserir))
+        _aplicar_limite(conn)
+
+    return {"candidatas": len(novas), "inseridas": len(inserir)}
@@ -1,26 +1,45 @@
 from mistralai.client import MistralClient
 from config import get_config
+from ai_cache import buscar_no_cache, gravar_no_cache
 
 config = get_config()
 client = MistralClient(api_key=config.MISTRAL_API_KEY)
 
+MODELO_IA = "mistral-large-latest"
+
+# Versões dos prompts: incremente ao alterar o texto de um prompt para que
+# as respostas antigas em cache deixem de ser usadas.
+VERSAO_PROMPT_RESUMO = "1"
+VERSAO_PROMPT_PRE_DIAGNOSTICO = "1"
+
+RESUMO_INDISPONIVEL = "Resumo não disponível."
+PRE_DIAGNOSTICO_INDISPONIVEL = "Pré-diagnóstico não disponível."
+
 
 def gerar_resumo(problema_relatado: str) -> str:
     """
     Gera um resumo conciso do problema relatado pelo cliente.
     """
+    entradas = (problema_relatado,)
+    em_cache = buscar_no_cache("resumo", MODELO_IA, VERSAO_PROMPT_RESUMO, entradas)
+    if em_cache is not None:
+        return em_cache
+
     try:
         prompt = (
             f"Resuma o seguinte problema relatado de forma concisa e "
             f"técnica, focando nos pontos principais: {problema_relatado}"
         )
         response = client.chat(
-            model="mistral-large-latest", messages=[{"role": "user", "content": prompt}]
+            model=MODELO_IA, messages=[{"role": "user", "content": prompt}]
         )
-        return response.choices[0].message.content.strip()
+        resumo = response.choices[0].message.content.strip()
     except Exception as e:
         print(f"Erro ao gerar resumo: {e}")
-        return "Resumo não disponível."
+        return RESUMO_INDISPONIVEL
+
+    gravar_no_cache("resumo", MODELO_IA, VERSAO_PROMPT_RESUMO, entradas, resumo)
+    return resumo
 
 
 def gerar_pre_diagnostico(
@@ -29,6 +48,13 @@ def gerar_pre_diagnostico(
     """
     Gera um pré-diagnóstico baseado nas informações do aparelho e problema.
     """
+    entradas = (tipo_aparelho, marca_modelo, problema_relatado)
+    em_cache = buscar_no_cache(
+        "pre_diagnostico", MODELO_IA, VERSAO_PROMPT_PRE_DIAGNOSTICO, entradas
+    )
+    if em_cache is not None:
+        return em_cache
+
     try:
         prompt = (
             "Act as a senior computer and smartphone repair technician, focused on fast bench-level diagnosis.\n\n"
@@ -82,9 +108,14 @@ def gerar_pre_diagnostico(
             # "Deliver a fast, actionable, decision-oriented technical diagnosis suitable for bench repair."
         )
         response = client.chat(
-            model="mistral-large-latest", messages=[{"role": "user", "content": prompt}]
+            model=MODELO_IA, messages=[{"role": "user", "content": prompt}]
         )
-        return response.choices[0].message.content.strip()
+        pre_diag = response.choices[0].message.content.strip()
     except Exception as e:
         print(f"Erro ao gerar pré-diagnóstico: {e}")
-        return "Pré-diagnóstico não disponível."
+        return PRE_DIAGNOSTICO_INDISPONIVEL
+
+    gravar_no_cache(
+        "pre_diagnostico", MODELO_IA, VERSAO_PROMPT_PRE_DIAGNOSTICO, entradas, pre_diag
+    )
+    return pre_diag
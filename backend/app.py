@@ -4,6 +4,7 @@ from sqlalchemy.exc import IntegrityError
 
 from config import get_config
 from extensions import db, migrate
+from json_provider import JSONProviderRapido
 
 
 def create_app():
@@ -14,6 +15,7 @@ def create_app():
         static_folder='../',
         static_url_path='/'
     )
+    app.json = JSONProviderRapido(app)
     CORS(app)  # Enable CORS for all routes
     app.config.from_object(get_config())
 
@@ -27,18 +29,46 @@ def create_app():
     with app.app_context():
         db.create_all()
 
+        from migracoes import aplicar_migracoes
+        aplicar_migracoes()
+
     # Blueprints
     from routes_auth import bp as auth_bp
     from routes_clientes import bp as clientes_bp
     from routes_os import bp as os_bp
     from routes_estoque import bp as estoque_bp
     from routes_notificacoes import bp as notificacoes_bp
+    from routes_export import bp as export_bp
+    from routes_eventos import bp as eventos_bp
+    from routes_autocomplete import bp as autocomplete_bp
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(clientes_bp, url_prefix="/api/clientes")
     app.register_blueprint(os_bp, url_prefix="/api/os")
     app.register_blueprint(estoque_bp, url_prefix="/api/estoque")
     app.register_blueprint(notificacoes_bp)
+    app.register_blueprint(export_bp, url_prefix="/api/export")
+    app.register_blueprint(eventos_bp, url_prefix="/api/eventos")
+    app.register_blueprint(autocomplete_bp, url_prefix="/api/autocomplete")
+
+    from comandos import registrar_comandos
+    registrar_comandos(app)
+
+    # Distribuição dos eventos em tempo real (SSE)
+    from pubsub import iniciar_broker
+    iniciar_broker(app)
+
+    # Índices em memória do autocompletar (depende do broker para acompanhar outros processos)
+    from autocomplete import iniciar_autocomplete
+    iniciar_autocomplete(app)
+
+    # Tarefas periódicas (varredura de notificações, reconciliação de contadores)
+    from agendador import iniciar_agendador
+    iniciar_agendador(app)
+
+    # Workers que geram resumo e pré-diagnóstico das OS em segundo plano
+    from enriquecimento_ia import iniciar_workers
+    iniciar_workers(app)
 
     @app.get("/api/health")
     def health_check():
@@ -47,11 +77,26 @@ def create_app():
     # Rota para verificação automática de notificações
     @app.post("/api/notificacoes/verificar")
     def verificar_notificacoes():
-        """Rota para verificar e criar notificações automaticamente."""
+        """Executa a varredura de notificações agora (incremental; `completa=true` para tudo).
+
+        Usa a mesma trava do agendador: se outra varredura estiver em
+        andamento, responde 409 em vez de rodar em paralelo.
+        """
         try:
-            from routes_notificacoes import verificar_e_criar_notificacoes
-            verificar_e_criar_notificacoes()
-            return jsonify({"sucesso": True, "mensagem": "Verificação de notificações concluída"})
+            from agendador import executar_tarefa
+            estatisticas = executar_tarefa(
+                "varredura_notificacoes", completa=request.args.get("completa") == "true"
+            )
+            if estatisticas is None:
+                return jsonify({
+                    "erro": "Varredura em andamento",
+                    "mensagem": "Outra verificação de notificações está em execução",
+                }), 409
+            return jsonify({
+                "sucesso": True,
+                "mensagem": "Verificação de notificações concluída",
+                "estatisticas": estatisticas,
+            })
         except Exception as e:
             print(f"Erro na verificação automática de notificações: {e}")
             return jsonify({"erro": "Erro interno do servidor"}), 500
@@ -11,6 +11,7 @@ from models import Usuario
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "mude-esta-chave-jwt-em-producao")
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
+ESCOPO_EVENTOS = "eventos"
 
 
 def gerar_token_jwt(usuario_id, usuario_nome):
@@ -26,10 +27,30 @@ def gerar_token_jwt(usuario_id, usuario_nome):
     return token
 
 
-def verificar_token_jwt(token):
-    """Verifica e decodifica um token JWT."""
+def gerar_token_eventos(usuario_id, segundos):
+    """Gera um token curto que só vale para abrir o stream de eventos (SSE).
+
+    EventSource não envia cabeçalhos, então o token vai na query string e
+    acaba em logs; por isso não é o token de login.
+    """
+    payload = {
+        "user_id": usuario_id,
+        "escopo": ESCOPO_EVENTOS,
+        "exp": datetime.utcnow() + timedelta(seconds=segundos),
+        "iat": datetime.utcnow(),
+    }
+    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+
+
+def verificar_token_jwt(token, escopo=None):
+    """Verifica e decodifica um token JWT.
+
+    Sem `escopo`, só aceita o token de login; com `escopo`, só tokens desse escopo.
+    """
     try:
         payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        if payload.get("escopo") != escopo:
+            raise jwt.InvalidTokenError("Token não vale para esta operação")
 
         # Verifica se o usuário ainda existe e está ativo
         usuario = Usuario.query.get(payload["user_id"])
@@ -0,0 +1,320 @@
+"""Índices em memória para o autocompletar de clientes e produtos.
+
+Cada processo monta os índices na inicialização (`iniciar_autocomplete`) e os
+mantém a partir dos commits da própria sessão: um listener `after_flush`
+anota os clientes/produtos inseridos, alterados ou removidos e, no
+`after_commit`, as alterações são aplicadas ao índice. Comandos em lote que
+não passam pelo ORM (UPDATE/DELETE por query, importação) informam as
+alterações com `registrar_alteracoes_autocomplete`.
+
+Com o broker "banco" as alterações também são publicadas como evento
+interno, e cada processo as aplica ao seu índice.
+
+A busca usa um índice invertido sobre os campos normalizados, com chaves de
+início de palavra (prefixos de 1 a 3 caracteres) e trigramas (ocorrência em
+qualquer posição).
+"""
+
+import bisect
+import threading
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import Cliente, ProdutoEstoque
+from normalizacao import normalizar_nome, somente_digitos
+
+EVENTO_AUTOCOMPLETE = "autocomplete"
+
+
+def _trigramas(texto: str) -> set:
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _inicios_de_palavra(texto: str) -> set:
+    return {"^" + palavra[:n] for palavra in texto.split() for n in (1, 2, 3) if len(palavra) >= n}
+
+
+def normalizar_termo(termo: str) -> str:
+    """Termos só com dígitos e pontuação (telefone, CPF) perdem a pontuação."""
+    termo = termo or ""
+    if any(c.isdigit() for c in termo) and not any(c.isalpha() for c in termo):
+        return somente_digitos(termo)
+    return normalizar_nome(termo)
+
+
+class IndiceAutocomplete:
+    """Índice de um tipo de registro.
+
+    Cada chave (trigrama ou início de palavra "^x", "^xy", "^xyz") aponta para
+    uma lista de (nome normalizado, id) mantida em ordem, então as buscas
+    percorrem os candidatos já na ordem do resultado e param ao completar o
+    limite, em vez de ordenar todos os que casam.
+    """
+
+    def __init__(self, extrair_campos, serializar):
+        self._extrair_campos = extrair_campos
+        self._serializar = serializar
+        self._itens = {}
+        self._chaves = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._itens)
+
+    @staticmethod
+    def _chaves_de(campos) -> set:
+        chaves = set()
+        for campo in campos:
+            chaves |= _trigramas(campo) | _inicios_de_palavra(campo)
+        return chaves
+
+    def _remover(self, id_):
+        item = self._itens.pop(id_, None)
+        if item is None:
+            return
+        entrada = (item[1][0], id_)
+        for chave in self._chaves_de(item[1]):
+            lista = self._chaves.get(chave)
+            if not lista:
+                continue
+            i = bisect.bisect_left(lista, entrada)
+            if i < len(lista) and lista[i] == entrada:
+                del lista[i]
+            if not lista:
+                del self._chaves[chave]
+
+    def atualizar(self, registros=(), removidos=()):
+        """Insere/substitui `registros` (objetos ou linhas) e remove os ids de `removidos`."""
+        entradas = [
+            (registro.id, self._serializar(registro), self._extrair_campos(registro))
+            for registro in registros
+        ]
+        with self._lock:
+            for id_ in removidos:
+                self._remover(id_)
+            for id_, item, campos in entradas:
+                self._remover(id_)
+                self._itens[id_] = (item, campos)
+                for chave in self._chaves_de(campos):
+                    bisect.insort(self._chaves.setdefault(chave, []), (campos[0], id_))
+
+    def carregar(self, registros):
+        """Substitui todo o conteúdo; ordena cada lista uma vez no final."""
+        itens, chaves = {}, {}
+        for registro in registros:
+            campos = self._extrair_campos(registro)
+            itens[registro.id] = (self._serializar(registro), campos)
+            for chave in self._chaves_de(campos):
+                chaves.setdefault(chave, []).append((campos[0], registro.id))
+        for lista in chaves.values():
+            lista.sort()
+        with self._lock:
+            self._itens, self._chaves = itens, chaves
+
+    def _coletar(self, lista, casa, limite, resultado, vistos):
+        for _, id_ in lista:
+            if len(resultado) >= limite:
+                return
+            if id_ in vistos:
+                continue
+            item, campos = self._itens[id_]
+            if casa(campos):
+                vistos.add(id_)
+                resultado.append(item)
+
+    def buscar(self, termo: str, limite: int = 10) -> list:
+        """Os `limite` melhores itens para o termo, em ordem de nome.
+
+        Primeiro os que têm uma palavra começando com o termo; depois, para
+        termos com 3+ caracteres, os que o contêm em qualquer posição.
+        """
+        termo = normalizar_termo(termo)
+        if not termo:
+            return []
+
+        resultado, vistos = [], set()
+        no_inicio = " " + termo
+        with self._lock:
+            self._coletar(
+                self._chaves.get("^" + termo[:3], ()),
+                lambda campos: any(no_inicio in " " + campo for campo in campos),
+                limite, resultado, vistos,
+            )
+            if len(resultado) < limite and len(termo) >= 3:
+                listas = [self._chaves.get(t) for t in _trigramas(termo)]
+                if all(listas):
+                    self._coletar(
+                        min(listas, key=len),
+                        lambda campos: any(termo in campo for campo in campos),
+                        limite, resultado, vistos,
+                    )
+        return resultado
+
+
+def _campos_cliente(cliente) -> tuple:
+    return (
+        normalizar_nome(cliente.nome),
+        somente_digitos(cliente.cpf_cnpj),
+        somente_digitos(cliente.telefone),
+    )
+
+
+def _cliente_autocomplete(cliente) -> dict:
+    return {
+        "id": cliente.id,
+        "nome": cliente.nome,
+        "cpfCnpj": cliente.cpf_cnpj,
+        "telefone": cliente.telefone,
+    }
+
+
+def _campos_produto(produto) -> tuple:
+    return (normalizar_nome(produto.nome), normalizar_nome(produto.codigo))
+
+
+def _produto_autocomplete(produto) -> dict:
+    return {
+        "id": produto.id,
+        "codigo": produto.codigo,
+        "nome": produto.nome,
+        "categoria": produto.categoria,
+    }
+
+
+# nome do índice -> (model, colunas carregadas, campos, serialização)
+INDICES = {
+    "clientes": (
+        Cliente,
+        (Cliente.id, Cliente.nome, Cliente.cpf_cnpj, Cliente.telefone),
+        _campos_cliente,
+        _cliente_autocomplete,
+    ),
+    "produtos": (
+        ProdutoEstoque,
+        (ProdutoEstoque.id, ProdutoEstoque.codigo, ProdutoEstoque.nome, ProdutoEstoque.categoria),
+        _campos_produto,
+        _produto_autocomplete,
+    ),
+}
+_NOME_POR_MODEL = {model: nome for nome, (model, *_) in INDICES.items()}
+
+
+class _Registro:
+    """Alteração pendente (dict de colunas) com a mesma interface das linhas do banco."""
+
+    def __init__(self, dados: dict):
+        self.__dict__.update(dados)
+
+
+def obter_indice(nome: str):
+    indices = current_app.extensions.get("autocomplete")
+    return indices.get(nome) if indices else None
+
+
+def carregar_indice(nome: str):
+    """(Re)constrói o índice a partir do banco."""
+    model, colunas, _, _ = INDICES[nome]
+    indice = obter_indice(nome)
+    indice.carregar(db.session.query(*colunas).yield_per(2000))
+    db.session.rollback()
+    return indice
+
+
+def iniciar_autocomplete(app):
+    """Monta os índices deste processo e, com o broker "banco", acompanha os outros processos."""
+    if app.extensions.get("autocomplete"):
+        return
+    app.extensions["autocomplete"] = {
+        nome: IndiceAutocomplete(campos, serializar)
+        for nome, (_, _, campos, serializar) in INDICES.items()
+    }
+    with app.app_context():
+        for nome in INDICES:
+            carregar_indice(nome)
+        db.session.remove()
+
+    from pubsub import BrokerBanco, obter_broker
+
+    broker = obter_broker()
+    if isinstance(broker, BrokerBanco):
+        threading.Thread(
+            target=_acompanhar_eventos, args=(app, broker), name="autocomplete", daemon=True
+        ).start()
+
+
+def _acompanhar_eventos(app, broker):
+    assinatura = broker.assinar()
+    while True:
+        evento = assinatura.proximo(timeout=60)
+        if evento is None or evento[0] != EVENTO_AUTOCOMPLETE:
+            continue
+        dados = evento[1]
+        with app.app_context():
+            indice = obter_indice(dados["indice"])
+            indice.atualizar(
+                [_Registro(registro) for registro in dados["registros"]], dados["removidos"]
+            )
+
+
+def registrar_alteracoes_autocomplete(nome: str, registros=(), removidos=(), sessao=None):
+    """Agenda a atualização do índice `nome` para o commit da sessão.
+
+    `registros` são objetos ou linhas com as colunas de `INDICES[nome]`.
+    """
+    sessao = sessao or db.session
+    pendentes = sessao.info.setdefault("autocomplete_pendente", {})
+    alteracoes = pendentes.setdefault(nome, ({}, set()))
+    _, colunas, _, _ = INDICES[nome]
+    for registro in registros:
+        alteracoes[0][registro.id] = {c.key: getattr(registro, c.key) for c in colunas}
+        alteracoes[1].discard(registro.id)
+    for id_ in removidos:
+        alteracoes[0].pop(id_, None)
+        alteracoes[1].add(id_)
+
+
+@event.listens_for(Session, "after_flush")
+def _anotar_alteracoes(sessao, contexto):
+    for objetos, removidos in ((sessao.new, False), (sessao.dirty, False), (sessao.deleted, True)):
+        for obj in objetos:
+            nome = _NOME_POR_MODEL.get(type(obj))
+            if nome is None:
+                continue
+            if removidos:
+                registrar_alteracoes_autocomplete(nome, removidos=[obj.id], sessao=sessao)
+            else:
+                registrar_alteracoes_autocomplete(nome, [obj], sessao=sessao)
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_pendentes(sessao):
+    pendentes = sessao.info.pop("autocomplete_pendente", None)
+    if not pendentes or not has_app_context() or not current_app.extensions.get("autocomplete"):
+        return
+
+    from pubsub import BrokerBanco, obter_broker
+
+    broker = obter_broker()
+    eventos = []
+    for nome, (registros, removidos) in pendentes.items():
+        obter_indice(nome).atualizar(
+            [_Registro(registro) for registro in registros.values()], removidos
+        )
+        eventos.append((EVENTO_AUTOCOMPLETE, {
+            "indice": nome, "registros": list(registros.values()), "removidos": list(removidos),
+        }))
+
+    if isinstance(broker, BrokerBanco):
+        try:
+            broker.publicar(eventos)
+        except Exception as e:
+            print(f"Aviso: falha ao publicar alterações do autocompletar: {e}")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_pendentes(sessao, transacao_anterior):
+    if transacao_anterior.parent is None:
+        sessao.info.pop("autocomplete_pendente", None)
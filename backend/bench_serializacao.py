@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark da listagem de OS: custo por 10 mil linhas antes e depois da
+leitura por projeção + serializador JSON rápido.
+
+Usa um banco SQLite em memória, sem tocar no app.db.
+Execute: python bench_serializacao.py [quantidade_de_linhas]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["IA_WORKERS"] = "0"
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from json_provider import JSONProviderRapido  # noqa: E402
+from models import Cliente, OrdemServico  # noqa: E402
+from routes_os import consultar_listagem_os, os_linha_to_dict  # noqa: E402
+
+
+def _os_to_dict_legado(os_obj):
+    """Serializador anterior: objeto do ORM, datas convertidas em Python."""
+    data_criacao = os_obj.criado_em or datetime.utcnow()
+    prazo_limite = data_criacao + timedelta(days=os_obj.prazo_estimado or 3)
+    base = {
+        "id": os_obj.id,
+        "numeroOS": os_obj.numero_os,
+        "clienteId": os_obj.cliente_id,
+        "tipoAparelho": os_obj.tipo_aparelho,
+        "marcaModelo": os_obj.marca_modelo,
+        "imeiSerial": os_obj.imei_serial,
+        "corAparelho": os_obj.cor_aparelho,
+        "problemaRelatado": os_obj.problema_relatado,
+        "diagnosticoTecnico": os_obj.diagnostico_tecnico,
+        "prazoEstimado": os_obj.prazo_estimado,
+        "valorOrcamento": float(os_obj.valor_orcamento or 0),
+        "status": os_obj.status,
+        "prioridade": os_obj.prioridade,
+        "observacoes": os_obj.observacoes,
+        "dataCriacao": data_criacao.isoformat(),
+        "dataAtualizacao": (os_obj.atualizado_em or data_criacao).isoformat(),
+        "prazoLimite": prazo_limite.isoformat(),
+    }
+    if os_obj.cliente:
+        base["clienteNome"] = os_obj.cliente.nome
+    return base
+
+
+def popular(quantidade):
+    clientes = [
+        Cliente(nome=f"Cliente {i}", cpf_cnpj=f"{i:011d}", telefone="11999990000")
+        for i in range(max(1, quantidade // 5))
+    ]
+    db.session.add_all(clientes)
+    db.session.flush()
+    agora = datetime.now()
+    db.session.bulk_insert_mappings(OrdemServico, [
+        dict(
+            numero_os=f"#OS{i:06d}",
+            cliente_id=clientes[i % len(clientes)].id,
+            tipo_aparelho="Smartphone",
+            marca_modelo="iPhone 11",
+            imei_serial=f"35{i:013d}",
+            problema_relatado="Não liga após queda",
+            diagnostico_tecnico="Possível dano no conector de bateria",
+            prazo_estimado=3,
+            valor_orcamento=Decimal("350.00"),
+            status="aguardando",
+            prioridade="normal",
+            criado_em=agora - timedelta(minutes=i),
+            atualizado_em=agora,
+        )
+        for i in range(quantidade)
+    ])
+    db.session.commit()
+
+
+def medir(nome, funcao, quantidade, repeticoes=3):
+    melhores = []
+    for _ in range(repeticoes):
+        db.session.expunge_all()
+        inicio = time.perf_counter()
+        funcao()
+        melhores.append(time.perf_counter() - inicio)
+    ms_10k = min(melhores) * 1000 * 10000 / quantidade
+    print(f"   • {nome:<45} {ms_10k:8.1f} ms / 10k linhas")
+    return ms_10k
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    app = create_app()
+
+    with app.app_context():
+        print(f"🔍 Populando {quantidade} OS em SQLite em memória...\n")
+        popular(quantidade)
+
+        json_padrao = DefaultJSONProvider(app)
+        json_rapido = JSONProviderRapido(app)
+
+        def antes():
+            ordens = OrdemServico.query.join(Cliente).order_by(
+                OrdemServico.criado_em.desc()
+            ).all()
+            return json_padrao.dumps([_os_to_dict_legado(o) for o in ordens])
+
+        def depois():
+            linhas = consultar_listagem_os().order_by(OrdemServico.criado_em.desc()).all()
+            return json_rapido.dumps([os_linha_to_dict(linha) for linha in linhas])
+
+        linhas = consultar_listagem_os().all()
+        ordens = OrdemServico.query.all()
+        for o in ordens:
+            o.cliente  # noqa: B018 - carrega o relacionamento antes da medição
+
+        print("📋 Consulta + serialização completa:")
+        t_antes = medir("ORM + lazy load + json padrão (antes)", antes, quantidade)
+        t_depois = medir("projeção + JOIN + provider rápido (depois)", depois, quantidade)
+
+        print("\n📋 Somente serialização (dados já carregados):")
+        s_antes = medir(
+            "dict do ORM + json padrão (antes)",
+            lambda: json_padrao.dumps([_os_to_dict_legado(o) for o in ordens]),
+            quantidade,
+        )
+        s_depois = medir(
+            "dict da projeção + provider rápido (depois)",
+            lambda: json_rapido.dumps([os_linha_to_dict(linha) for linha in linhas]),
+            quantidade,
+        )
+
+        print(f"\n✅ Ganho total: {t_antes / t_depois:.1f}x | serialização: {s_antes / s_depois:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
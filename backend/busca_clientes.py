@@ -0,0 +1,102 @@
+"""Busca de clientes por início de palavra.
+
+A tabela `clientes_termos_busca` guarda, para cada cliente, as palavras do
+nome sem acentos, o e-mail em minúsculas e os dígitos do CPF/CNPJ e do
+telefone, este com e sem código do país e DDD. Cada palavra do termo
+buscado precisa ser início de algum termo do cliente; a comparação é por
+intervalo sobre a chave primária (termo, cliente_id).
+
+Os eventos de mapper de `Cliente` refazem os termos na mesma transação que
+grava o cliente. Gravações fora do ORM (importação em lote) chamam
+`atualizar_termos_clientes`. Clientes com exclusão lógica mantêm os termos
+e saem da busca pelo filtro de exclusao.py.
+"""
+
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.orm.attributes import get_history
+
+from models import Cliente, ClienteTermoBusca
+from normalizacao import intervalo_prefixo, normalizar_nome, somente_digitos
+
+_clientes = Cliente.__table__
+_termos = ClienteTermoBusca.__table__
+
+# Campos do cadastro que entram nos termos
+_CAMPOS_TERMOS = ("nome", "email", "telefone", "cpf_cnpj")
+
+_TAMANHO_TERMO = _termos.c.termo.type.length
+
+
+def telefone_sem_ddd(digitos: str) -> str:
+    """Número local: "5511987654321" e "11987654321" -> "987654321"."""
+    digitos = digitos.lstrip("0")
+    if len(digitos) in (12, 13) and digitos.startswith("55"):
+        digitos = digitos[2:]
+    if len(digitos) in (10, 11):
+        return digitos[2:]
+    return digitos
+
+
+def termos_cliente(nome, email, telefone, cpf_cnpj) -> set:
+    telefone_digitos = somente_digitos(telefone)
+    termos = set(normalizar_nome(nome).split())
+    termos.update((
+        (email or "").strip().casefold(),
+        telefone_digitos,
+        telefone_sem_ddd(telefone_digitos),
+        somente_digitos(cpf_cnpj),
+    ))
+    return {termo[:_TAMANHO_TERMO] for termo in termos if termo}
+
+
+def palavras_busca(termo: str) -> list:
+    """Palavras do termo digitado, normalizadas como os termos gravados.
+
+    Termos só com dígitos e pontuação viram um número só: "(11) 98765" -> "1198765".
+    """
+    if not any(c.isalpha() for c in termo):
+        digitos = somente_digitos(termo)
+        return [digitos] if digitos else []
+    palavras = []
+    for palavra in normalizar_nome(termo).split():
+        if not any(c.isalpha() for c in palavra):
+            palavra = somente_digitos(palavra) or palavra
+        palavras.append(palavra)
+    return palavras
+
+
+def condicao_busca(palavra: str):
+    """Clientes com algum termo começando por `palavra`."""
+    return Cliente.id.in_(
+        select(_termos.c.cliente_id).where(intervalo_prefixo(_termos.c.termo, palavra))
+    )
+
+
+def atualizar_termos_clientes(conexao, cliente_ids):
+    """Refaz os termos dos clientes a partir das colunas gravadas."""
+    cliente_ids = list(cliente_ids)
+    if not cliente_ids:
+        return
+    linhas = conexao.execute(
+        select(_clientes.c.id, *(_clientes.c[campo] for campo in _CAMPOS_TERMOS))
+        .where(_clientes.c.id.in_(cliente_ids))
+    ).all()
+    conexao.execute(delete(_termos).where(_termos.c.cliente_id.in_(cliente_ids)))
+    valores = [
+        {"cliente_id": linha.id, "termo": termo}
+        for linha in linhas
+        for termo in termos_cliente(linha.nome, linha.email, linha.telefone, linha.cpf_cnpj)
+    ]
+    if valores:
+        conexao.execute(insert(_termos), valores)
+
+
+@event.listens_for(Cliente, "after_insert")
+def _cliente_inserido(mapper, conexao, cliente):
+    atualizar_termos_clientes(conexao, [cliente.id])
+
+
+@event.listens_for(Cliente, "after_update")
+def _cliente_alterado(mapper, conexao, cliente):
+    if any(get_history(cliente, campo).has_changes() for campo in _CAMPOS_TERMOS):
+        atualizar_termos_clientes(conexao, [cliente.id])
@@ -0,0 +1,155 @@
+"""Busca textual das OS.
+
+Em SQLite usa uma tabela virtual FTS5 (`os_busca`) mantida por triggers nas
+tabelas `ordens_servico` e `clientes`; em MySQL usa índices FULLTEXT nas
+próprias tabelas. Os campos indexados são número da OS, marca/modelo,
+IMEI/serial, problema relatado, diagnóstico técnico e nome do cliente.
+Para outros bancos a busca cai para LIKE, sem índice.
+"""
+
+import re
+
+from sqlalchemy import inspect, or_, text
+
+from extensions import db
+from models import Cliente, OrdemServico
+
+_COLUNAS_OS = [
+    "numero_os",
+    "marca_modelo",
+    "imei_serial",
+    "problema_relatado",
+    "diagnostico_tecnico",
+]
+
+# Pesos do bm25 por coluna (mesma ordem da tabela os_busca, incluindo cliente_nome)
+_PESOS_SQLITE = "10.0, 4.0, 10.0, 2.0, 1.0, 5.0"
+
+_SQL_SQLITE = [
+    """
+    CREATE VIRTUAL TABLE os_busca USING fts5(
+        numero_os, marca_modelo, imei_serial, problema_relatado,
+        diagnostico_tecnico, cliente_nome,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER os_busca_ai AFTER INSERT ON ordens_servico BEGIN
+        INSERT INTO os_busca (rowid, numero_os, marca_modelo, imei_serial,
+                              problema_relatado, diagnostico_tecnico, cliente_nome)
+        VALUES (NEW.id, NEW.numero_os, NEW.marca_modelo, NEW.imei_serial,
+                NEW.problema_relatado, NEW.diagnostico_tecnico,
+                (SELECT nome FROM clientes WHERE id = NEW.cliente_id));
+    END
+    """,
+    """
+    CREATE TRIGGER os_busca_au AFTER UPDATE OF numero_os, marca_modelo, imei_serial,
+        problema_relatado, diagnostico_tecnico, cliente_id ON ordens_servico BEGIN
+        DELETE FROM os_busca WHERE rowid = OLD.id;
+        INSERT INTO os_busca (rowid, numero_os, marca_modelo, imei_serial,
+                              problema_relatado, diagnostico_tecnico, cliente_nome)
+        VALUES (NEW.id, NEW.numero_os, NEW.marca_modelo, NEW.imei_serial,
+                NEW.problema_relatado, NEW.diagnostico_tecnico,
+                (SELECT nome FROM clientes WHERE id = NEW.cliente_id));
+    END
+    """,
+    """
+    CREATE TRIGGER os_busca_ad AFTER DELETE ON ordens_servico BEGIN
+        DELETE FROM os_busca WHERE rowid = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER os_busca_cliente_au AFTER UPDATE OF nome ON clientes BEGIN
+        UPDATE os_busca SET cliente_nome = NEW.nome
+        WHERE rowid IN (SELECT id FROM ordens_servico WHERE cliente_id = NEW.id);
+    END
+    """,
+    """
+    INSERT INTO os_busca (rowid, numero_os, marca_modelo, imei_serial,
+                          problema_relatado, diagnostico_tecnico, cliente_nome)
+    SELECT o.id, o.numero_os, o.marca_modelo, o.imei_serial,
+           o.problema_relatado, o.diagnostico_tecnico, c.nome
+    FROM ordens_servico o LEFT JOIN clientes c ON c.id = o.cliente_id
+    """,
+]
+
+_SQL_MYSQL = [
+    "CREATE FULLTEXT INDEX ft_ordens_servico_busca ON ordens_servico "
+    "(numero_os, marca_modelo, imei_serial, problema_relatado, diagnostico_tecnico)",
+    "CREATE FULLTEXT INDEX ft_clientes_nome ON clientes (nome)",
+]
+
+
+def configurar_indice_busca():
+    """Cria o índice de busca (e preenche com as OS existentes) se ainda não existir."""
+    dialeto = db.engine.dialect.name
+    inspetor = inspect(db.engine)
+
+    if dialeto == "sqlite":
+        if "os_busca" in inspetor.get_table_names():
+            return
+        with db.engine.begin() as conn:
+            for sql in _SQL_SQLITE:
+                conn.execute(text(sql))
+
+    elif dialeto == "mysql":
+        indices = {i["name"] for i in inspetor.get_indexes("ordens_servico")}
+        if "ft_ordens_servico_busca" in indices:
+            return
+        with db.engine.begin() as conn:
+            for sql in _SQL_MYSQL:
+                conn.execute(text(sql))
+
+
+def _termos(consulta: str) -> list:
+    return re.findall(r"\w+", consulta or "", flags=re.UNICODE)[:10]
+
+
+def buscar_ids_os(consulta: str, limite: int) -> list:
+    """Retorna os ids das OS que casam com a consulta, do mais para o menos relevante."""
+    termos = _termos(consulta)
+    if not termos:
+        return []
+
+    dialeto = db.engine.dialect.name
+
+    if dialeto == "sqlite":
+        # Cada termo vira uma busca por prefixo; todos precisam aparecer
+        expressao = " ".join(f'"{t}"*' for t in termos)
+        linhas = db.session.execute(
+            text(
+                f"SELECT os_busca.rowid FROM os_busca "
+                f"JOIN ordens_servico o ON o.id = os_busca.rowid "
+                f"WHERE os_busca MATCH :expressao AND o.excluido_em IS NULL "
+                f"ORDER BY bm25(os_busca, {_PESOS_SQLITE}) LIMIT :limite"
+            ),
+            {"expressao": expressao, "limite": limite},
+        )
+        return [linha[0] for linha in linhas]
+
+    if dialeto == "mysql":
+        expressao = " ".join(f"{t}*" for t in termos)
+        linhas = db.session.execute(
+            text(
+                f"SELECT o.id, "
+                f"MATCH (o.{', o.'.join(_COLUNAS_OS)}) AGAINST (:expressao IN BOOLEAN MODE) "
+                f"+ MATCH (c.nome) AGAINST (:expressao IN BOOLEAN MODE) AS relevancia "
+                f"FROM ordens_servico o JOIN clientes c ON c.id = o.cliente_id "
+                f"WHERE (MATCH (o.{', o.'.join(_COLUNAS_OS)}) AGAINST (:expressao IN BOOLEAN MODE) "
+                f"OR MATCH (c.nome) AGAINST (:expressao IN BOOLEAN MODE)) "
+                f"AND o.excluido_em IS NULL "
+                f"ORDER BY relevancia DESC LIMIT :limite"
+            ),
+            {"expressao": expressao, "limite": limite},
+        )
+        return [linha[0] for linha in linhas]
+
+    # Fallback sem índice: todos os termos precisam aparecer em algum campo
+    query = db.session.query(OrdemServico.id).join(Cliente)
+    for termo in termos:
+        padrao = f"%{termo}%"
+        query = query.filter(or_(
+            *[getattr(OrdemServico, coluna).ilike(padrao) for coluna in _COLUNAS_OS],
+            Cliente.nome.ilike(padrao),
+        ))
+    return [i for (i,) in query.order_by(OrdemServico.criado_em.desc()).limit(limite)]
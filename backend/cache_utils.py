@@ -0,0 +1,44 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheTTL:
+    """Cache em memória, local ao processo, com expiração e tamanho máximo.
+
+    Seguro para uso entre threads. Ao atingir `max_itens`, descarta o item
+    usado há mais tempo.
+    """
+
+    def __init__(self, ttl_segundos: float, max_itens: int = 1000):
+        self.ttl_segundos = ttl_segundos
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave, padrao=None):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return padrao
+            expira_em, valor = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                return padrao
+            self._itens.move_to_end(chave)
+            return valor
+
+    def definir(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + self.ttl_segundos, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def invalidar(self, chave):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
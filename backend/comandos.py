@@ -0,0 +1,116 @@
+"""Comandos de linha de comando da aplicação (`flask --app app <grupo> <comando>`)."""
+
+import click
+from flask.cli import AppGroup
+
+ia_cli = AppGroup("ia", help="Operações de IA.")
+
+
+@ia_cli.command("aquecer-cache")
+@click.option("--limite", type=int, default=None, help="Máximo de OS a analisar.")
+def aquecer_cache_ia(limite):
+    """Pré-carrega o cache de IA a partir do histórico de OS."""
+    from ai_cache import aquecer_cache
+
+    resultado = aquecer_cache(limite=limite)
+    click.echo(
+        f"✅ Cache de IA aquecido: {resultado['inseridas']} entradas novas "
+        f"de {resultado['candidatas']} candidatas"
+    )
+
+
+notificacoes_cli = AppGroup("notificacoes", help="Operações de notificações.")
+
+
+@notificacoes_cli.command("reconciliar-contadores")
+def reconciliar_contadores_notificacoes():
+    """Recalcula os contadores de não lidas e corrige divergências."""
+    from contadores_notificacoes import reconciliar_contadores
+
+    resultado = reconciliar_contadores()
+    click.echo(
+        f"✅ Contadores verificados: {resultado['verificados']}, "
+        f"corrigidos: {resultado['corrigidos']}"
+    )
+
+
+@notificacoes_cli.command("aplicar-retencao")
+@click.option("--dias", type=int, default=None, help="Idade mínima (padrão: NOTIFICACOES_RETENCAO_DIAS).")
+@click.option("--dias-arquivo", type=int, default=None,
+              help="Tempo no arquivo antes da remoção (padrão: NOTIFICACOES_ARQUIVO_RETENCAO_DIAS).")
+def aplicar_retencao_notificacoes(dias, dias_arquivo):
+    """Arquiva/compacta as notificações antigas e expurga o arquivo antigo."""
+    from retencao_notificacoes import aplicar_retencao
+
+    resultado = aplicar_retencao(dias=dias, dias_arquivo=dias_arquivo)
+    click.echo(
+        f"✅ {resultado['compactadas']} compactadas, {resultado['arquivadas']} arquivadas, "
+        f"{resultado['leituras_removidas']} leituras removidas, "
+        f"{resultado['expurgadas']} removidas do arquivo"
+    )
+
+
+clientes_cli = AppGroup("clientes", help="Operações de clientes.")
+
+
+@clientes_cli.command("importar")
+@click.argument("arquivo", type=click.File("rb"))
+@click.option("--formato", type=click.Choice(["csv", "ndjson"]), default=None,
+              help="Padrão: pela extensão do arquivo.")
+@click.option("--lote", type=int, default=None, help="Linhas por INSERT (padrão: CLIENTES_IMPORTACAO_LOTE).")
+def importar_clientes_cli(arquivo, formato, lote):
+    """Importa clientes de um arquivo CSV ou NDJSON."""
+    from importacao_clientes import importar_clientes
+
+    formato = formato or ("ndjson" if arquivo.name.endswith((".ndjson", ".jsonl")) else "csv")
+    resumo = importar_clientes(arquivo, formato, lote)
+    for erro in resumo["erros"]:
+        click.echo(f"Linha {erro['linha']}: {erro['erro']}", err=True)
+    click.echo(
+        f"✅ {resumo['novos']} clientes novos, {resumo['atualizados']} atualizados, "
+        f"{resumo['com_erro']} linhas com erro ({resumo['duracao_ms']} ms)"
+    )
+
+
+@clientes_cli.command("recalcular-contadores")
+def recalcular_contadores_clientes_cli():
+    """Recalcula os totais de OS de todos os clientes a partir das OS."""
+    from contadores_clientes import recalcular_contadores_clientes
+
+    click.echo(f"✅ Totais recalculados para {recalcular_contadores_clientes()} clientes")
+
+
+agendador_cli = AppGroup("agendador", help="Tarefas periódicas.")
+
+
+@agendador_cli.command("executar")
+@click.option("--tarefa", "nomes", multiple=True, help="Tarefa a executar (padrão: todas).")
+@click.option("--completa", is_flag=True, help="Ignora a marca d'água e analisa tudo.")
+def executar_tarefas_agendadas(nomes, completa):
+    """Executa as tarefas uma vez (para uso com cron)."""
+    from agendador import TAREFAS, executar_tarefa
+
+    for nome in nomes or TAREFAS:
+        if nome not in TAREFAS:
+            raise click.BadParameter(f"tarefa desconhecida: {nome}", param_hint="--tarefa")
+        resultado = executar_tarefa(nome, completa=completa)
+        if resultado is None:
+            click.echo(f"⏭️  {nome}: em execução em outro processo")
+        else:
+            click.echo(f"✅ {nome}: {resultado}")
+
+
+@agendador_cli.command("iniciar")
+def iniciar_agendador_cli():
+    """Roda o agendador em primeiro plano (processo dedicado)."""
+    from flask import current_app
+    from agendador import executar_continuamente
+
+    executar_continuamente(current_app._get_current_object())
+
+
+def registrar_comandos(app):
+    app.cli.add_command(ia_cli)
+    app.cli.add_command(notificacoes_cli)
+    app.cli.add_command(clientes_cli)
+    app.cli.add_command(agendador_cli)
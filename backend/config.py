@@ -23,6 +23,75 @@ class Config:
 
     MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 
+    # Numeração das OS: prefixo + número sequencial com 4 dígitos.
+    # Com OS_NUMERO_POR_ANO o ano entra no prefixo e a contagem reinicia a cada ano
+    # (ex: #OS2026-0001).
+    OS_NUMERO_PREFIXO = os.getenv("OS_NUMERO_PREFIXO", "#OS")
+    OS_NUMERO_POR_ANO = os.getenv("OS_NUMERO_POR_ANO", "false").lower() == "true"
+    OS_NUMERO_MAXIMO_RESERVA = int(os.getenv("OS_NUMERO_MAXIMO_RESERVA", "1000"))
+
+    # Consulta pública de status da OS: cache por número e limite por IP
+    STATUS_OS_CACHE_TTL = int(os.getenv("STATUS_OS_CACHE_TTL", "30"))
+    STATUS_OS_LIMITE_RAJADA = int(os.getenv("STATUS_OS_LIMITE_RAJADA", "20"))
+    STATUS_OS_LIMITE_POR_MINUTO = int(os.getenv("STATUS_OS_LIMITE_POR_MINUTO", "30"))
+
+    # Quantidade de threads que geram resumo/pré-diagnóstico em segundo plano.
+    # Com 0 o enriquecimento fica desligado neste processo.
+    IA_WORKERS = int(os.getenv("IA_WORKERS", "2"))
+    IA_FILA_MAXIMA = int(os.getenv("IA_FILA_MAXIMA", "100"))
+    # Recoloca na fila as OS pendentes e libera as presas em "processando"
+    IA_REVARREDURA_SEGUNDOS = int(os.getenv("IA_REVARREDURA_SEGUNDOS", "60"))
+    IA_PROCESSANDO_TIMEOUT_MINUTOS = int(os.getenv("IA_PROCESSANDO_TIMEOUT_MINUTOS", "15"))
+
+    # Diagnóstico em lote: chamadas simultâneas ao modelo e OS por commit
+    IA_LOTE_CONCORRENCIA_PADRAO = int(os.getenv("IA_LOTE_CONCORRENCIA_PADRAO", "4"))
+    IA_LOTE_CONCORRENCIA_MAXIMA = int(os.getenv("IA_LOTE_CONCORRENCIA_MAXIMA", "8"))
+    IA_LOTE_TAMANHO_COMMIT = int(os.getenv("IA_LOTE_TAMANHO_COMMIT", "20"))
+    IA_LOTE_MAXIMO_OS = int(os.getenv("IA_LOTE_MAXIMO_OS", "1000"))
+    IA_LOTE_TIMEOUT_MINUTOS = int(os.getenv("IA_LOTE_TIMEOUT_MINUTOS", "15"))
+
+    # Cache persistente das respostas da IA (tabela cache_ia)
+    IA_CACHE_HABILITADO = os.getenv("IA_CACHE_HABILITADO", "true").lower() == "true"
+    IA_CACHE_MAX_ENTRADAS = int(os.getenv("IA_CACHE_MAX_ENTRADAS", "5000"))
+    IA_CACHE_TTL_DIAS = int(os.getenv("IA_CACHE_TTL_DIAS", "30"))
+
+    # Contador de notificações não lidas: cache por processo
+    CONTADOR_NOTIFICACOES_CACHE_TTL = int(os.getenv("CONTADOR_NOTIFICACOES_CACHE_TTL", "10"))
+
+    # Agendador interno: thread por processo, trava no banco e intervalo de cada tarefa
+    # (0 desliga a tarefa)
+    AGENDADOR_HABILITADO = os.getenv("AGENDADOR_HABILITADO", "true").lower() == "true"
+    AGENDADOR_INTERVALO_SEGUNDOS = int(os.getenv("AGENDADOR_INTERVALO_SEGUNDOS", "30"))
+    AGENDADOR_TRAVA_SEGUNDOS = int(os.getenv("AGENDADOR_TRAVA_SEGUNDOS", "600"))
+    NOTIFICACOES_VARREDURA_MINUTOS = int(os.getenv("NOTIFICACOES_VARREDURA_MINUTOS", "5"))
+    CONTADOR_NOTIFICACOES_RECONCILIAR_MINUTOS = int(
+        os.getenv("CONTADOR_NOTIFICACOES_RECONCILIAR_MINUTOS", "60")
+    )
+    NOTIFICACOES_RETENCAO_INTERVALO_MINUTOS = int(
+        os.getenv("NOTIFICACOES_RETENCAO_INTERVALO_MINUTOS", "1440")
+    )
+
+    # Retenção: notificações mais antigas que isso vão para notificacoes_arquivo
+    NOTIFICACOES_RETENCAO_DIAS = int(os.getenv("NOTIFICACOES_RETENCAO_DIAS", "30"))
+    NOTIFICACOES_RETENCAO_LOTE = int(os.getenv("NOTIFICACOES_RETENCAO_LOTE", "500"))
+    # ...e saem de vez do arquivo depois disso (0 mantém o arquivo para sempre)
+    NOTIFICACOES_ARQUIVO_RETENCAO_DIAS = int(os.getenv("NOTIFICACOES_ARQUIVO_RETENCAO_DIAS", "365"))
+
+    # Exclusão de clientes/OS quando a requisição não informa o modo: "definitiva" ou "logica"
+    EXCLUSAO_MODO_PADRAO = os.getenv("EXCLUSAO_MODO_PADRAO", "definitiva")
+
+    # Importação de clientes em massa: linhas por INSERT ... ON CONFLICT
+    CLIENTES_IMPORTACAO_LOTE = int(os.getenv("CLIENTES_IMPORTACAO_LOTE", "500"))
+
+    # Eventos em tempo real (SSE): "memoria" para um processo, "banco" para vários workers
+    EVENTOS_BROKER = os.getenv("EVENTOS_BROKER", "memoria")
+    EVENTOS_POLL_SEGUNDOS = float(os.getenv("EVENTOS_POLL_SEGUNDOS", "1"))
+    EVENTOS_RETENCAO_MINUTOS = int(os.getenv("EVENTOS_RETENCAO_MINUTOS", "10"))
+    EVENTOS_HEARTBEAT_SEGUNDOS = int(os.getenv("EVENTOS_HEARTBEAT_SEGUNDOS", "15"))
+    EVENTOS_FILA_POR_CONEXAO = int(os.getenv("EVENTOS_FILA_POR_CONEXAO", "100"))
+    # Validade do token de `/api/eventos/token`, usado só para abrir o stream
+    EVENTOS_TOKEN_SEGUNDOS = int(os.getenv("EVENTOS_TOKEN_SEGUNDOS", "60"))
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
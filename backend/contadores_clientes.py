@@ -0,0 +1,138 @@
+"""Totais de OS de cada cliente, guardados nas colunas de `clientes`.
+
+- total_os: quantidade de OS;
+- os_abertas: OS que não estão entregues nem canceladas;
+- total_faturado: soma do orçamento das OS entregues;
+- ultima_visita: abertura da OS mais recente.
+
+Os eventos de mapper de `OrdemServico` ajustam as colunas na mesma transação
+que insere, altera ou remove a OS. Alterações feitas por UPDATE direto (como
+a troca de status em massa) chamam `ajustar_contadores_cliente`.
+`recalcular_contadores_clientes` refaz tudo a partir das OS (preenchimento
+inicial, conferência e exclusões em conjunto). OS com exclusão lógica não
+entram nos totais.
+"""
+
+from decimal import Decimal
+
+from sqlalchemy import and_, case, event, func, select, update
+from sqlalchemy.orm.attributes import get_history
+
+from extensions import db
+from models import STATUS_OS_ENCERRADAS, Cliente, OrdemServico
+
+_clientes = Cliente.__table__
+_ordens = OrdemServico.__table__
+
+
+def contribuicao_os(status, valor_orcamento) -> tuple:
+    """(total, abertas, faturado) com que uma OS entra nos totais do cliente."""
+    aberta = 0 if status in STATUS_OS_ENCERRADAS else 1
+    faturado = Decimal(str(valor_orcamento or 0)) if status == "entregue" else Decimal(0)
+    return 1, aberta, faturado
+
+
+def _ultima_visita_recalculada(cliente_id):
+    return (
+        select(func.max(_ordens.c.criado_em))
+        .where(_ordens.c.cliente_id == cliente_id, _ordens.c.excluido_em.is_(None))
+        .scalar_subquery()
+    )
+
+
+def ajustar_contadores_cliente(
+    conexao, cliente_id, total=0, abertas=0, faturado=0, visita=None, recalcular_visita=False
+):
+    """Soma os deltas aos totais do cliente com um único UPDATE."""
+    if not (total or abertas or faturado or visita or recalcular_visita):
+        return
+
+    valores = {
+        "total_os": func.coalesce(_clientes.c.total_os, 0) + total,
+        "os_abertas": func.coalesce(_clientes.c.os_abertas, 0) + abertas,
+        "total_faturado": func.coalesce(_clientes.c.total_faturado, 0) + faturado,
+        # Os totais não são uma alteração do cadastro
+        "atualizado_em": _clientes.c.atualizado_em,
+    }
+    if recalcular_visita:
+        valores["ultima_visita"] = _ultima_visita_recalculada(cliente_id)
+    elif visita is not None:
+        valores["ultima_visita"] = case(
+            (_clientes.c.ultima_visita.is_(None), visita),
+            (_clientes.c.ultima_visita < visita, visita),
+            else_=_clientes.c.ultima_visita,
+        )
+    conexao.execute(update(_clientes).where(_clientes.c.id == cliente_id).values(**valores))
+
+
+def _anterior(os_obj, atributo):
+    historico = get_history(os_obj, atributo)
+    if historico.deleted:
+        return historico.deleted[0]
+    return getattr(os_obj, atributo)
+
+
+@event.listens_for(OrdemServico, "after_insert")
+def _os_inserida(mapper, conexao, os_obj):
+    total, abertas, faturado = contribuicao_os(os_obj.status, os_obj.valor_orcamento)
+    ajustar_contadores_cliente(
+        conexao, os_obj.cliente_id, total, abertas, faturado, visita=os_obj.criado_em
+    )
+
+
+@event.listens_for(OrdemServico, "after_update")
+def _os_alterada(mapper, conexao, os_obj):
+    cliente_anterior = _anterior(os_obj, "cliente_id")
+    antes = contribuicao_os(_anterior(os_obj, "status"), _anterior(os_obj, "valor_orcamento"))
+    depois = contribuicao_os(os_obj.status, os_obj.valor_orcamento)
+
+    if cliente_anterior != os_obj.cliente_id:
+        ajustar_contadores_cliente(
+            conexao, cliente_anterior, *(-v for v in antes), recalcular_visita=True
+        )
+        ajustar_contadores_cliente(conexao, os_obj.cliente_id, *depois, recalcular_visita=True)
+        return
+
+    ajustar_contadores_cliente(
+        conexao, os_obj.cliente_id, *(d - a for a, d in zip(antes, depois))
+    )
+
+
+@event.listens_for(OrdemServico, "after_delete")
+def _os_removida(mapper, conexao, os_obj):
+    antes = contribuicao_os(_anterior(os_obj, "status"), _anterior(os_obj, "valor_orcamento"))
+    ajustar_contadores_cliente(
+        conexao, _anterior(os_obj, "cliente_id"), *(-v for v in antes), recalcular_visita=True
+    )
+
+
+def recalcular_contadores_clientes(
+    apenas_sem_valor: bool = False, cliente_ids=None, conexao=None
+) -> int:
+    """Recalcula os totais a partir das OS com um UPDATE por subconsultas correlacionadas.
+
+    Com `apenas_sem_valor`, só os clientes ainda sem totais (preenchimento
+    após criar as colunas); com `cliente_ids` (lista ou subconsulta), só
+    esses clientes. `conexao` permite rodar dentro de uma transação já aberta.
+    Retorna quantos clientes foram atualizados.
+    """
+    da_os = and_(_ordens.c.cliente_id == _clientes.c.id, _ordens.c.excluido_em.is_(None))
+    encerrada = _ordens.c.status.in_(STATUS_OS_ENCERRADAS)
+    comando = update(_clientes).values(
+        total_os=select(func.count()).where(da_os).scalar_subquery(),
+        os_abertas=select(func.count()).where(da_os, ~encerrada).scalar_subquery(),
+        total_faturado=select(func.coalesce(func.sum(_ordens.c.valor_orcamento), 0))
+        .where(da_os, _ordens.c.status == "entregue")
+        .scalar_subquery(),
+        ultima_visita=select(func.max(_ordens.c.criado_em)).where(da_os).scalar_subquery(),
+        atualizado_em=_clientes.c.atualizado_em,
+    )
+    if apenas_sem_valor:
+        comando = comando.where(_clientes.c.total_os.is_(None))
+    if cliente_ids is not None:
+        comando = comando.where(_clientes.c.id.in_(cliente_ids))
+
+    if conexao is not None:
+        return conexao.execute(comando).rowcount
+    with db.engine.begin() as conexao:
+        return conexao.execute(comando).rowcount
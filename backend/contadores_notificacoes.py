@@ -0,0 +1,170 @@
+"""Contador de notificações não lidas por usuário.
+
+O contador fica na tabela `contadores_notificacoes` e é ajustado na mesma
+transação que cria notificações ou altera o estado de leitura. A leitura
+passa por um cache em memória (CONTADOR_NOTIFICACOES_CACHE_TTL), invalidado
+após o commit das alterações feitas no próprio processo.
+
+Usuários sem linha na tabela têm o contador calculado na primeira leitura.
+`reconciliar_contadores` (tarefa do agendador) recalcula todos a partir das
+notificações e corrige eventuais divergências (ex.: alterações concorrentes
+com essa primeira leitura).
+"""
+
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, case, event, func, update
+from sqlalchemy.orm import Session
+
+from cache_utils import CacheTTL
+from extensions import db
+from models import ContadorNotificacoes, Notificacao, NotificacaoLeitura, Usuario
+from sql_utils import insert_ignorando_duplicadas
+
+_TODOS = "*"
+
+
+def _cache() -> CacheTTL:
+    cache = current_app.extensions.get("cache_contador_notificacoes")
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            "cache_contador_notificacoes",
+            CacheTTL(current_app.config["CONTADOR_NOTIFICACOES_CACHE_TTL"], max_itens=10000),
+        )
+    return cache
+
+
+def _invalidar_apos_commit(usuario_id=_TODOS):
+    pendentes = db.session.info.setdefault("contadores_invalidar", set())
+    pendentes.add(usuario_id)
+    db.session.info["contadores_cache"] = _cache()
+
+
+# insert=True: invalida antes de os eventos SSE serem publicados (pubsub), que releem o contador
+@event.listens_for(Session, "after_commit", insert=True)
+def _invalidar_pendentes(sessao):
+    pendentes = sessao.info.pop("contadores_invalidar", None)
+    cache = sessao.info.pop("contadores_cache", None)
+    if not pendentes or cache is None:
+        return
+    if _TODOS in pendentes:
+        cache.limpar()
+    else:
+        for usuario_id in pendentes:
+            cache.invalidar(usuario_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_pendentes(sessao, transacao_anterior):
+    if transacao_anterior.parent is None:
+        sessao.info.pop("contadores_invalidar", None)
+        sessao.info.pop("contadores_cache", None)
+
+
+def contar_nao_lidas_reais(usuario_id=None) -> dict:
+    """Conta as não lidas a partir das notificações: {usuario_id: quantidade}.
+
+    Mesma regra de visibilidade da listagem: notificações criadas a partir do
+    cadastro do usuário, sem leitura nem exclusão.
+    """
+    query = (
+        db.session.query(Usuario.id, func.count(Notificacao.id))
+        .outerjoin(
+            Notificacao,
+            (Usuario.criado_em.is_(None)) | (Notificacao.criado_em >= Usuario.criado_em),
+        )
+        .outerjoin(
+            NotificacaoLeitura,
+            and_(
+                NotificacaoLeitura.notificacao_id == Notificacao.id,
+                NotificacaoLeitura.usuario_id == Usuario.id,
+            ),
+        )
+        .filter(NotificacaoLeitura.lida_em.is_(None), NotificacaoLeitura.excluida_em.is_(None))
+        .group_by(Usuario.id)
+    )
+    if usuario_id is not None:
+        query = query.filter(Usuario.id == usuario_id)
+    return dict(query.all())
+
+
+def obter_nao_lidas(usuario_id) -> int:
+    """Contador de não lidas do usuário: cache, depois tabela, depois cálculo completo."""
+    cache = _cache()
+    nao_lidas = cache.obter(usuario_id)
+    if nao_lidas is not None:
+        return nao_lidas
+
+    nao_lidas = db.session.query(ContadorNotificacoes.nao_lidas).filter_by(
+        usuario_id=usuario_id
+    ).scalar()
+    if nao_lidas is None:
+        nao_lidas = contar_nao_lidas_reais(usuario_id).get(usuario_id, 0)
+        # Conexão própria: a leitura não deve fazer commit da sessão de quem chamou
+        with db.engine.begin() as conn:
+            conn.execute(
+                insert_ignorando_duplicadas(ContadorNotificacoes.__table__),
+                {"usuario_id": usuario_id, "nao_lidas": nao_lidas, "atualizado_em": datetime.now()},
+            )
+
+    cache.definir(usuario_id, nao_lidas)
+    return nao_lidas
+
+
+def ajustar_nao_lidas(delta: int, usuario_id=None):
+    """Soma `delta` ao contador do usuário (ou de todos, se None) na transação atual."""
+    if not delta:
+        return
+    contador = ContadorNotificacoes.nao_lidas
+    query = update(ContadorNotificacoes).values(
+        nao_lidas=case((contador + delta < 0, 0), else_=contador + delta),
+        atualizado_em=datetime.now(),
+    )
+    if usuario_id is not None:
+        query = query.where(ContadorNotificacoes.usuario_id == usuario_id)
+    db.session.execute(query, execution_options={"synchronize_session": False})
+    _invalidar_apos_commit(_TODOS if usuario_id is None else usuario_id)
+
+
+def zerar_nao_lidas(usuario_id):
+    db.session.execute(
+        update(ContadorNotificacoes)
+        .where(ContadorNotificacoes.usuario_id == usuario_id)
+        .values(nao_lidas=0, atualizado_em=datetime.now()),
+        execution_options={"synchronize_session": False},
+    )
+    _invalidar_apos_commit(usuario_id)
+
+
+def reconciliar_contadores(avisar: bool = True) -> dict:
+    """Recalcula os contadores existentes e corrige os que divergirem.
+
+    `avisar=False` quando a divergência é esperada (após remover notificações).
+    """
+    reais = contar_nao_lidas_reais()
+    gravados = dict(
+        db.session.query(ContadorNotificacoes.usuario_id, ContadorNotificacoes.nao_lidas)
+    )
+
+    corrigidos = {
+        usuario_id: reais.get(usuario_id, 0)
+        for usuario_id, nao_lidas in gravados.items()
+        if reais.get(usuario_id, 0) != nao_lidas
+    }
+    if corrigidos:
+        agora = datetime.now()
+        db.session.execute(
+            update(ContadorNotificacoes),
+            [
+                {"usuario_id": usuario_id, "nao_lidas": nao_lidas, "atualizado_em": agora}
+                for usuario_id, nao_lidas in corrigidos.items()
+            ],
+        )
+        _invalidar_apos_commit()
+    db.session.commit()
+
+    if corrigidos and avisar:
+        print(f"Aviso: contadores de notificações corrigidos: {corrigidos}")
+    return {"verificados": len(gravados), "corrigidos": len(corrigidos)}
+
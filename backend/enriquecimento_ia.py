@@ -0,0 +1,366 @@
+"""Enriquecimento das OS com IA executado fora do ciclo da requisição.
+
+A OS é gravada com `ia_status="pendente"` e o id é colocado em uma fila
+atendida por um pequeno conjunto de threads. Antes de chamar o modelo, a
+thread reivindica a OS com um UPDATE condicional (pendente -> processando):
+como vários processos podem ter a mesma OS na fila, só quem consegue a troca
+a processa. Depois gera o resumo e o pré-diagnóstico e grava o resultado.
+
+Uma thread de varredura recoloca na fila, a cada IA_REVARREDURA_SEGUNDOS, as
+OS que continuam pendentes (reinício, fila cheia) e devolve a pendente as que
+ficaram em "processando" além de IA_PROCESSANDO_TIMEOUT_MINUTOS (processo
+encerrado no meio do enriquecimento).
+
+Os lotes de pré-diagnóstico (`LoteDiagnostico`) rodam em uma thread própria
+que dispara as chamadas ao modelo com concorrência limitada e grava os
+resultados em blocos, atualizando o progresso do lote a cada bloco.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from functools import partial
+
+from sqlalchemy import bindparam, or_, update
+
+from ai_utils import (
+    PRE_DIAGNOSTICO_INDISPONIVEL,
+    RESUMO_INDISPONIVEL,
+    gerar_pre_diagnostico,
+    gerar_resumo,
+)
+from extensions import db
+from models import LoteDiagnostico, OrdemServico
+
+IA_PENDENTE = "pendente"
+IA_PROCESSANDO = "processando"
+IA_CONCLUIDO = "concluido"
+IA_FALHOU = "falhou"
+
+_app = None
+_fila = None
+_agendadas = set()
+_lock = threading.Lock()
+
+
+def iniciar_workers(app):
+    """Sobe as threads de enriquecimento e a varredura das OS pendentes."""
+    global _app, _fila
+
+    quantidade = app.config.get("IA_WORKERS", 0)
+    if quantidade <= 0 or _fila is not None:
+        return
+
+    _app = app
+    _fila = queue.Queue(maxsize=app.config.get("IA_FILA_MAXIMA", 100))
+    for i in range(quantidade):
+        threading.Thread(
+            target=_executar_worker, name=f"enriquecimento-ia-{i}", daemon=True
+        ).start()
+    threading.Thread(
+        target=_varrer_continuamente, name="enriquecimento-ia-varredura", daemon=True
+    ).start()
+
+
+def agendar_enriquecimento(os_id: int) -> bool:
+    """Coloca a OS na fila de enriquecimento.
+
+    Retorna False se os workers não estiverem ativos ou a fila estiver cheia;
+    nesses casos a OS continua pendente e volta para a fila na próxima varredura.
+    """
+    if _fila is None:
+        return False
+
+    with _lock:
+        if os_id in _agendadas:
+            return True
+        try:
+            _fila.put_nowait(os_id)
+        except queue.Full:
+            print(f"Aviso: fila de enriquecimento IA cheia, OS {os_id} segue pendente")
+            return False
+        _agendadas.add(os_id)
+    return True
+
+
+def reenfileirar_pendentes() -> int:
+    """Recoloca na fila as OS pendentes (até as vagas livres) e retorna quantas.
+
+    Antes, as OS presas em "processando" além do timeout voltam a pendente.
+    """
+    tabela = OrdemServico.__table__
+    limite = datetime.now() - timedelta(minutes=_app.config["IA_PROCESSANDO_TIMEOUT_MINUTOS"])
+    with db.engine.begin() as conn:
+        conn.execute(
+            update(tabela)
+            .where(
+                tabela.c.ia_status == IA_PROCESSANDO,
+                or_(tabela.c.ia_iniciado_em.is_(None), tabela.c.ia_iniciado_em < limite),
+            )
+            .values(ia_status=IA_PENDENTE, atualizado_em=tabela.c.atualizado_em)
+        )
+
+    with _lock:
+        vagas = _fila.maxsize - _fila.qsize()
+        agendadas = set(_agendadas)
+    if vagas <= 0:
+        return 0
+
+    pendentes = (
+        db.session.query(OrdemServico.id)
+        .filter(OrdemServico.ia_status == IA_PENDENTE)
+        .order_by(OrdemServico.id)
+        .limit(vagas + len(agendadas))
+        .all()
+    )
+    db.session.rollback()
+    return sum(
+        1 for (os_id,) in pendentes
+        if os_id not in agendadas and agendar_enriquecimento(os_id)
+    )
+
+
+def _varrer_continuamente():
+    while True:
+        try:
+            with _app.app_context():
+                reenfileirar_pendentes()
+        except Exception as e:
+            print(f"Erro na varredura do enriquecimento IA: {e}")
+        time.sleep(_app.config["IA_REVARREDURA_SEGUNDOS"])
+
+
+def _executar_worker():
+    while True:
+        os_id = _fila.get()
+        try:
+            with _app.app_context():
+                enriquecer_os(os_id)
+        except Exception as e:
+            print(f"Erro no enriquecimento IA da OS {os_id}: {e}")
+        finally:
+            with _lock:
+                _agendadas.discard(os_id)
+            _fila.task_done()
+
+
+def _reivindicar(os_id: int) -> bool:
+    """Passa a OS de pendente para processando; só um worker, de qualquer processo, consegue."""
+    tabela = OrdemServico.__table__
+    with db.engine.begin() as conn:
+        resultado = conn.execute(
+            update(tabela)
+            .where(tabela.c.id == os_id, tabela.c.ia_status == IA_PENDENTE)
+            .values(
+                ia_status=IA_PROCESSANDO,
+                ia_iniciado_em=datetime.now(),
+                # A reivindicação não é uma alteração da OS
+                atualizado_em=tabela.c.atualizado_em,
+            )
+        )
+    return resultado.rowcount == 1
+
+
+def _diagnostico_vazio():
+    return or_(OrdemServico.diagnostico_tecnico.is_(None), OrdemServico.diagnostico_tecnico == "")
+
+
+def enriquecer_os(os_id: int):
+    """Gera resumo e pré-diagnóstico da OS e grava o resultado.
+
+    Nenhuma transação fica aberta durante as chamadas ao modelo: a OS é
+    reivindicada, os dados de entrada são lidos, a sessão é encerrada e a OS
+    só é recarregada para gravar o resultado. O pré-diagnóstico só é gravado
+    se o diagnóstico técnico continuar vazio ou igual ao lido na
+    reivindicação (um diagnóstico digitado nesse meio-tempo é mantido).
+    """
+    if not _reivindicar(os_id):
+        return
+
+    os_obj = db.session.get(OrdemServico, os_id)
+    if not os_obj:
+        db.session.rollback()
+        return
+
+    tipo_aparelho = os_obj.tipo_aparelho
+    marca_modelo = os_obj.marca_modelo
+    problema_relatado = os_obj.problema_relatado
+    diagnostico_anterior = os_obj.diagnostico_tecnico
+    db.session.rollback()
+
+    resumo = gerar_resumo(problema_relatado)
+    pre_diag = gerar_pre_diagnostico(tipo_aparelho, marca_modelo, problema_relatado)
+
+    os_obj = db.session.get(OrdemServico, os_id)
+    if not os_obj or os_obj.ia_status != IA_PROCESSANDO:
+        db.session.rollback()
+        return
+
+    if pre_diag == PRE_DIAGNOSTICO_INDISPONIVEL and resumo == RESUMO_INDISPONIVEL:
+        os_obj.ia_status = IA_FALHOU
+    else:
+        if pre_diag != PRE_DIAGNOSTICO_INDISPONIVEL:
+            inalterado = _diagnostico_vazio()
+            if diagnostico_anterior:
+                inalterado = or_(
+                    inalterado, OrdemServico.diagnostico_tecnico == diagnostico_anterior
+                )
+            db.session.execute(
+                update(OrdemServico)
+                .where(OrdemServico.id == os_id, inalterado)
+                .values(diagnostico_tecnico=pre_diag),
+                execution_options={"synchronize_session": False},
+            )
+        if resumo != RESUMO_INDISPONIVEL:
+            os_obj.observacoes = (os_obj.observacoes or "") + f"\n\nResumo: {resumo}"
+        os_obj.ia_status = IA_CONCLUIDO
+
+    db.session.commit()
+
+
+# ================================
+# DIAGNÓSTICO EM LOTE
+# ================================
+
+def lote_to_dict(lote: LoteDiagnostico) -> dict:
+    return {
+        "id": lote.id,
+        "status": lote.status,
+        "total": lote.total,
+        "processados": lote.processados,
+        "falhas": lote.falhas,
+        "concorrencia": lote.concorrencia,
+        "erro": lote.erro,
+        "dataCriacao": lote.criado_em.isoformat() if lote.criado_em else None,
+        "dataFinalizacao": lote.finalizado_em.isoformat() if lote.finalizado_em else None,
+    }
+
+
+def iniciar_lote(app, lote_id: int):
+    """Executa o lote em uma thread separada."""
+    threading.Thread(
+        target=_executar_lote, args=(app, lote_id), name=f"lote-diagnostico-{lote_id}",
+        daemon=True,
+    ).start()
+
+
+def _diagnosticar(app, entrada):
+    os_id, tipo_aparelho, marca_modelo, problema_relatado = entrada
+    with app.app_context():
+        return os_id, gerar_pre_diagnostico(tipo_aparelho, marca_modelo, problema_relatado)
+
+
+def _executar_lote(app, lote_id: int):
+    with app.app_context():
+        lote = db.session.get(LoteDiagnostico, lote_id)
+        if not lote or lote.status != "pendente":
+            return
+        lote.status = "executando"
+        db.session.commit()
+
+        try:
+            entradas = (
+                db.session.query(
+                    OrdemServico.id,
+                    OrdemServico.tipo_aparelho,
+                    OrdemServico.marca_modelo,
+                    OrdemServico.problema_relatado,
+                )
+                .filter(OrdemServico.id.in_(lote.os_ids))
+                .all()
+            )
+            # OS removidas depois da criação do lote contam como processadas (sem falha)
+            nao_encontradas = lote.total - len(entradas)
+            concorrencia = lote.concorrencia
+            apenas_sem_diagnostico = bool(lote.apenas_sem_diagnostico)
+            db.session.rollback()
+
+            tamanho_bloco = app.config["IA_LOTE_TAMANHO_COMMIT"]
+            gravar = partial(
+                _gravar_bloco, lote_id, apenas_sem_diagnostico=apenas_sem_diagnostico
+            )
+            if nao_encontradas:
+                gravar([], 0, ignoradas=nao_encontradas)
+            bloco = []
+            falhas_bloco = 0
+            with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+                futuros = [executor.submit(_diagnosticar, app, e) for e in entradas]
+                for futuro in as_completed(futuros):
+                    try:
+                        os_id, pre_diag = futuro.result()
+                    except Exception as e:
+                        print(f"Erro no diagnóstico em lote {lote_id}: {e}")
+                        falhas_bloco += 1
+                        continue
+                    if pre_diag == PRE_DIAGNOSTICO_INDISPONIVEL:
+                        falhas_bloco += 1
+                    else:
+                        bloco.append({"os_id": os_id, "diagnostico": pre_diag})
+
+                    if len(bloco) + falhas_bloco >= tamanho_bloco:
+                        gravar(bloco, falhas_bloco)
+                        bloco, falhas_bloco = [], 0
+
+            gravar(bloco, falhas_bloco, finalizar=True)
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao executar lote de diagnóstico {lote_id}: {e}")
+            lote = db.session.get(LoteDiagnostico, lote_id)
+            lote.status = "falhou"
+            lote.erro = str(e)
+            lote.finalizado_em = datetime.now()
+            db.session.commit()
+
+
+def _gravar_bloco(
+    lote_id: int,
+    bloco: list,
+    falhas: int,
+    ignoradas: int = 0,
+    finalizar: bool = False,
+    apenas_sem_diagnostico: bool = False,
+):
+    """Grava um bloco de diagnósticos e o progresso do lote na mesma transação.
+
+    OS excluídas no meio-tempo não são alteradas; com `apenas_sem_diagnostico`,
+    também não as que ganharam um diagnóstico depois da criação do lote.
+    """
+    if bloco:
+        comando = (
+            update(OrdemServico)
+            .where(OrdemServico.id == bindparam("os_id"), OrdemServico.excluido_em.is_(None))
+            .values(diagnostico_tecnico=bindparam("diagnostico"))
+        )
+        if apenas_sem_diagnostico:
+            comando = comando.where(_diagnostico_vazio())
+        db.session.connection().execute(comando, bloco)
+
+    valores = {
+        "processados": LoteDiagnostico.processados + len(bloco) + falhas + ignoradas,
+        "falhas": LoteDiagnostico.falhas + falhas,
+    }
+    if finalizar:
+        valores.update(status="concluido", finalizado_em=datetime.now())
+    db.session.execute(
+        update(LoteDiagnostico).where(LoteDiagnostico.id == lote_id).values(**valores)
+    )
+    db.session.commit()
+
+
+def verificar_lote_interrompido(lote: LoteDiagnostico, timeout_minutos: int) -> bool:
+    """Marca como falho um lote em execução sem progresso há mais que o timeout.
+
+    Cobre lotes cujo processo foi reiniciado no meio da execução.
+    """
+    if lote.status not in ("pendente", "executando") or not lote.atualizado_em:
+        return False
+    if datetime.now() - lote.atualizado_em < timedelta(minutes=timeout_minutos):
+        return False
+    lote.status = "falhou"
+    lote.erro = "Execução interrompida sem progresso (servidor reiniciado?)"
+    lote.finalizado_em = datetime.now()
+    db.session.commit()
+    return True
@@ -0,0 +1,256 @@
+"""Exclusão de clientes e OS com comandos sobre conjuntos de linhas.
+
+Nada é carregado no ORM: cada etapa é um DELETE (ou UPDATE) com `IN
+(subconsulta)`, na ordem dependentes -> dono (notificações que apontam para
+as OS e clientes, histórico das OS, OS, termos de busca, clientes). As chaves estrangeiras
+também declaram ON DELETE CASCADE, mas a ordem explícita não depende de o
+banco aplicá-las (o SQLite só aplica com `PRAGMA foreign_keys`).
+
+Exclusão lógica ("logica"): as linhas recebem `excluido_em` e deixam de
+aparecer em qualquer consulta do ORM (listener `_ocultar_excluidos`); para
+enxergá-las, use `.execution_options(incluir_excluidos=True)`. As
+notificações das linhas excluídas são removidas nos dois modos.
+`restaurar_clientes` desfaz a exclusão lógica de clientes.
+"""
+
+from datetime import datetime
+
+from flask import abort
+from sqlalchemy import and_, delete, event, select, update
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from autocomplete import INDICES, registrar_alteracoes_autocomplete
+from contadores_clientes import recalcular_contadores_clientes
+from extensions import db
+from models import (
+    Cliente,
+    ClienteTermoBusca,
+    EventoOS,
+    Notificacao,
+    NotificacaoArquivo,
+    NotificacaoLeitura,
+    OrdemServico,
+)
+from pubsub import publicar_apos_commit
+
+MODOS_EXCLUSAO = ("definitiva", "logica")
+MAXIMO_IDS_POR_EXCLUSAO = 500
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _ocultar_excluidos(estado):
+    # Recarga de atributos e relacionamentos de objetos já carregados não é filtrada
+    if (
+        estado.is_select
+        and not estado.is_column_load
+        and not estado.is_relationship_load
+        and not estado.execution_options.get("incluir_excluidos", False)
+    ):
+        estado.statement = estado.statement.options(
+            with_loader_criteria(
+                Cliente, lambda cls: cls.excluido_em.is_(None), include_aliases=True
+            ),
+            with_loader_criteria(
+                OrdemServico, lambda cls: cls.excluido_em.is_(None), include_aliases=True
+            ),
+        )
+
+
+def ler_pedido_exclusao(data: dict, modo_padrao: str):
+    """Lê {"ids": [...], "modo": "definitiva" | "logica"} de uma exclusão em conjunto."""
+    modo = data.get("modo") or modo_padrao
+    if modo not in MODOS_EXCLUSAO:
+        abort(400, description=f"modo deve ser um de: {', '.join(MODOS_EXCLUSAO)}")
+    try:
+        ids = list(dict.fromkeys(int(i) for i in data.get("ids") or []))
+    except (TypeError, ValueError):
+        abort(400, description="ids deve ser uma lista de números inteiros")
+    if not ids:
+        abort(400, description="Informe ao menos um id")
+    if len(ids) > MAXIMO_IDS_POR_EXCLUSAO:
+        abort(400, description=f"Máximo de {MAXIMO_IDS_POR_EXCLUSAO} ids por requisição")
+    return ids, modo
+
+
+def _remover_notificacoes(ref_tipo: str, ids) -> int:
+    """Remove as notificações (com leituras e arquivo) que apontam para `ids` (lista ou subconsulta)."""
+    da_referencia = (Notificacao.ref_tipo == ref_tipo, Notificacao.ref_id.in_(ids))
+    db.session.execute(
+        delete(NotificacaoLeitura).where(
+            NotificacaoLeitura.notificacao_id.in_(select(Notificacao.id).where(*da_referencia))
+        )
+    )
+    db.session.execute(
+        delete(NotificacaoArquivo).where(
+            NotificacaoArquivo.ref_tipo == ref_tipo, NotificacaoArquivo.ref_id.in_(ids)
+        )
+    )
+    return db.session.execute(delete(Notificacao).where(*da_referencia)).rowcount
+
+
+def _excluir_ordens(filtro, logica: bool, agora: datetime) -> dict:
+    """Exclui as OS que atendem `filtro` (condição sobre OrdemServico).
+
+    A exclusão definitiva inclui as OS que já tinham exclusão lógica, para
+    não deixar OS sem cliente.
+    """
+    ordens = (
+        db.session.query(OrdemServico.id, OrdemServico.numero_os)
+        .filter(filtro)
+        .execution_options(incluir_excluidos=not logica)
+        .all()
+    )
+    resultado = {
+        "ordens": len(ordens),
+        "eventos": 0,
+        "notificacoes": 0,
+        "numeros_os": [linha.numero_os for linha in ordens],
+    }
+
+    if logica:
+        alvo = select(OrdemServico.id).where(filtro, OrdemServico.excluido_em.is_(None))
+    else:
+        alvo = select(OrdemServico.id).where(filtro)
+    resultado["notificacoes"] = _remover_notificacoes("os", alvo)
+
+    if logica:
+        db.session.execute(
+            update(OrdemServico)
+            .where(filtro, OrdemServico.excluido_em.is_(None))
+            .values(excluido_em=agora),
+            execution_options={"synchronize_session": False},
+        )
+    else:
+        resultado["eventos"] = db.session.execute(
+            delete(EventoOS).where(EventoOS.os_id.in_(alvo))
+        ).rowcount
+        db.session.execute(
+            delete(OrdemServico).where(filtro),
+            execution_options={"synchronize_session": False},
+        )
+
+    if ordens:
+        publicar_apos_commit(
+            "os_status", {"ordens": [{"id": linha.id, "status": None} for linha in ordens]}
+        )
+    return resultado
+
+
+def excluir_ordens_servico(ids: list, modo: str = "definitiva") -> dict:
+    """Exclui as OS e ajusta os totais dos clientes delas. Não faz commit.
+
+    A exclusão definitiva também alcança OS que já tinham exclusão lógica.
+    Retorna as quantidades e `numeros_os`, para invalidar os caches por número.
+    """
+    agora = datetime.now()
+    opcoes = {"incluir_excluidos": modo == "definitiva"}
+    ids = [
+        i for (i,) in db.session.query(OrdemServico.id)
+        .filter(OrdemServico.id.in_(ids))
+        .execution_options(**opcoes)
+    ]
+    if not ids:
+        return {"ordens": 0, "eventos": 0, "notificacoes": 0, "numeros_os": []}
+
+    clientes = [
+        cliente_id for (cliente_id,) in db.session.query(OrdemServico.cliente_id)
+        .filter(OrdemServico.id.in_(ids))
+        .execution_options(**opcoes)
+        .distinct()
+    ]
+    resultado = _excluir_ordens(OrdemServico.id.in_(ids), modo == "logica", agora)
+    if clientes:
+        recalcular_contadores_clientes(cliente_ids=clientes, conexao=db.session.connection())
+    return resultado
+
+
+def excluir_clientes(ids: list, modo: str = "definitiva") -> dict:
+    """Exclui os clientes e as OS deles. Não faz commit.
+
+    A exclusão definitiva também alcança clientes que já tinham exclusão lógica.
+    """
+    agora = datetime.now()
+    logica = modo == "logica"
+    ids = [
+        i for (i,) in db.session.query(Cliente.id)
+        .filter(Cliente.id.in_(ids))
+        .execution_options(incluir_excluidos=not logica)
+    ]
+    if not ids:
+        return {"clientes": 0, "ordens": 0, "eventos": 0, "notificacoes": 0, "numeros_os": []}
+
+    resultado = _excluir_ordens(OrdemServico.cliente_id.in_(ids), logica, agora)
+    resultado["notificacoes"] += _remover_notificacoes("cliente", ids)
+    if logica:
+        db.session.execute(
+            update(Cliente).where(Cliente.id.in_(ids)).values(excluido_em=agora),
+            execution_options={"synchronize_session": False},
+        )
+        # Sem OS visíveis, os totais zeram (e ficam certos se o cliente voltar)
+        recalcular_contadores_clientes(cliente_ids=ids, conexao=db.session.connection())
+    else:
+        db.session.execute(delete(ClienteTermoBusca).where(ClienteTermoBusca.cliente_id.in_(ids)))
+        db.session.execute(
+            delete(Cliente).where(Cliente.id.in_(ids)),
+            execution_options={"synchronize_session": False},
+        )
+    registrar_alteracoes_autocomplete("clientes", removidos=ids)
+    resultado["clientes"] = len(ids)
+    return resultado
+
+
+def restaurar_clientes(ids: list) -> dict:
+    """Desfaz a exclusão lógica dos clientes e das OS excluídas junto com eles.
+
+    OS excluídas antes (com outro `excluido_em`) continuam excluídas. Não faz
+    commit; retorna as quantidades e `numeros_os`.
+    """
+    opcoes = {"incluir_excluidos": True}
+    ids = [
+        i for (i,) in db.session.query(Cliente.id)
+        .filter(Cliente.id.in_(ids), Cliente.excluido_em.isnot(None))
+        .execution_options(**opcoes)
+    ]
+    if not ids:
+        return {"clientes": 0, "ordens": 0, "numeros_os": []}
+
+    excluidas_junto = and_(
+        OrdemServico.cliente_id.in_(ids),
+        OrdemServico.excluido_em == (
+            select(Cliente.excluido_em)
+            .where(Cliente.id == OrdemServico.cliente_id)
+            .scalar_subquery()
+        ),
+    )
+    ordens = (
+        db.session.query(OrdemServico.id, OrdemServico.numero_os, OrdemServico.status)
+        .filter(excluidas_junto)
+        .execution_options(**opcoes)
+        .all()
+    )
+    if ordens:
+        db.session.execute(
+            update(OrdemServico)
+            .where(OrdemServico.id.in_([linha.id for linha in ordens]))
+            .values(excluido_em=None),
+            execution_options={"synchronize_session": False},
+        )
+        publicar_apos_commit(
+            "os_status",
+            {"ordens": [{"id": linha.id, "status": linha.status} for linha in ordens]},
+        )
+    db.session.execute(
+        update(Cliente).where(Cliente.id.in_(ids)).values(excluido_em=None),
+        execution_options={"synchronize_session": False},
+    )
+    recalcular_contadores_clientes(cliente_ids=ids, conexao=db.session.connection())
+
+    _, colunas, _, _ = INDICES["clientes"]
+    registrar_alteracoes_autocomplete(
+        "clientes", db.session.execute(select(*colunas).where(Cliente.id.in_(ids))).all()
+    )
+    return {
+        "clientes": len(ids),
+        "ordens": len(ordens),
+        "numeros_os": [linha.numero_os for linha in ordens],
+    }
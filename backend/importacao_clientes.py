@@ -0,0 +1,263 @@
+"""Importação de clientes em massa a partir de CSV ou NDJSON.
+
+O arquivo é lido linha a linha, sem carregar tudo na memória. Cada linha é
+validada e normalizada (CPF/CNPJ só com dígitos, colunas de busca) e as
+linhas válidas são gravadas em lotes de CLIENTES_IMPORTACAO_LOTE com um
+único INSERT ... ON CONFLICT (executemany) por lote, cada lote na sua
+transação. Um CPF/CNPJ repetido no arquivo vale só na primeira ocorrência;
+um já cadastrado tem atualizados só os campos que a linha preenche (nome e
+telefone sempre; e-mail, endereço etc. quando vierem no arquivo), então
+reimportar um arquivo com menos colunas não apaga dados.
+
+No lugar da notificação "cliente_novo" por cliente, a importação gera uma
+única notificação com o resumo.
+"""
+
+import codecs
+import csv
+import json
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select, update
+
+from autocomplete import INDICES, registrar_alteracoes_autocomplete
+from busca_clientes import atualizar_termos_clientes
+from extensions import db
+from models import Cliente, SequenciaOS
+from normalizacao import normalizar_nome, somente_digitos
+from sql_utils import insert_ignorando_duplicadas, upsert_em_lote
+
+FORMATOS_IMPORTACAO = ("csv", "ndjson")
+TIPOS_PESSOA = ("pessoa_fisica", "pessoa_juridica")
+PREFIXO_IMPORTACAO = "importacao-clientes"
+
+# Erros detalhados na resposta; acima disso só a contagem
+MAXIMO_ERROS_RELATADOS = 1000
+
+# Colunas sempre atualizadas quando o CPF/CNPJ já está cadastrado (um cliente
+# com exclusão lógica volta a aparecer)
+_COLUNAS_ATUALIZADAS = [
+    "nome", "telefone", "nome_busca", "telefone_digitos", "cpf_cnpj_digitos",
+    "atualizado_em", "excluido_em",
+]
+
+# Atualizadas só quando a linha traz o valor; senão ficam as já gravadas
+_COLUNAS_OPCIONAIS = ("tipo_pessoa", "email", "endereco", "observacoes", "status")
+
+# Nome no arquivo -> coluna; aceita o formato da API (camelCase) e o das colunas
+_CAMPOS = {
+    "nome": "nome",
+    "cpfCnpj": "cpf_cnpj",
+    "cpf_cnpj": "cpf_cnpj",
+    "tipoPessoa": "tipo_pessoa",
+    "tipo_pessoa": "tipo_pessoa",
+    "telefone": "telefone",
+    "email": "email",
+    "endereco": "endereco",
+    "observacoes": "observacoes",
+    "status": "status",
+}
+
+
+class LinhaInvalida(ValueError):
+    pass
+
+
+def ler_registros(arquivo_binario, formato: str):
+    """Gera (número da linha, dict) a partir de um arquivo binário aberto.
+
+    Linhas de NDJSON que não são JSON válido geram (número, LinhaInvalida).
+    """
+    texto = codecs.getreader("utf-8-sig")(arquivo_binario)
+    if formato == "csv":
+        leitor = csv.DictReader(texto)
+        for registro in leitor:
+            yield leitor.line_num, registro
+        return
+
+    for numero, linha in enumerate(texto, start=1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except ValueError:
+            yield numero, LinhaInvalida("JSON inválido")
+            continue
+        if not isinstance(registro, dict):
+            yield numero, LinhaInvalida("Cada linha deve ser um objeto JSON")
+            continue
+        yield numero, registro
+
+
+def _texto(valor):
+    if valor is None:
+        return None
+    return str(valor).strip() or None
+
+
+def validar_registro(registro: dict, agora: datetime) -> tuple:
+    """Converte um registro do arquivo na linha da tabela `clientes`.
+
+    Retorna (linha, colunas opcionais preenchidas no registro).
+    """
+    dados = {}
+    for campo, valor in registro.items():
+        coluna = _CAMPOS.get((campo or "").strip())
+        if coluna:
+            dados[coluna] = _texto(valor)
+
+    faltando = [c for c in ("nome", "cpf_cnpj", "telefone") if not dados.get(c)]
+    if faltando:
+        raise LinhaInvalida(f"Campos obrigatórios ausentes: {', '.join(faltando)}")
+
+    cpf_cnpj = somente_digitos(dados["cpf_cnpj"])
+    if len(cpf_cnpj) not in (11, 14):
+        raise LinhaInvalida("CPF/CNPJ deve ter 11 ou 14 dígitos")
+
+    tipo_pessoa = dados.get("tipo_pessoa") or (
+        "pessoa_fisica" if len(cpf_cnpj) == 11 else "pessoa_juridica"
+    )
+    if tipo_pessoa not in TIPOS_PESSOA:
+        raise LinhaInvalida(f"tipoPessoa deve ser um de: {', '.join(TIPOS_PESSOA)}")
+
+    if len(dados["nome"]) > 150 or len(dados["telefone"]) > 20:
+        raise LinhaInvalida("nome ou telefone maior que o permitido")
+
+    informadas = frozenset(c for c in _COLUNAS_OPCIONAIS if dados.get(c))
+
+    # Inserção fora do ORM: as colunas de busca e as datas são preenchidas aqui
+    return {
+        "nome": dados["nome"],
+        "cpf_cnpj": cpf_cnpj,
+        "tipo_pessoa": tipo_pessoa,
+        "telefone": dados["telefone"],
+        "email": dados.get("email"),
+        "endereco": dados.get("endereco"),
+        "observacoes": dados.get("observacoes"),
+        "status": dados.get("status") or "ativo",
+        "nome_busca": normalizar_nome(dados["nome"]),
+        "telefone_digitos": somente_digitos(dados["telefone"]),
+        "cpf_cnpj_digitos": cpf_cnpj,
+        "total_os": 0,
+        "os_abertas": 0,
+        "total_faturado": 0,
+        "excluido_em": None,
+        "criado_em": agora,
+        "atualizado_em": agora,
+    }, informadas
+
+
+def _gravar_lote(lote: list) -> int:
+    """Grava o lote em uma transação e retorna quantos clientes eram novos.
+
+    `lote` tem pares (linha, colunas informadas); cada conjunto de colunas
+    informadas vira um INSERT ... ON CONFLICT (em CSV, um só por lote).
+    """
+    cpfs = [linha["cpf_cnpj"] for linha, _ in lote]
+    existentes = db.session.execute(
+        select(db.func.count()).where(Cliente.cpf_cnpj.in_(cpfs)),
+        execution_options={"incluir_excluidos": True},
+    ).scalar()
+
+    grupos = {}
+    for linha, informadas in lote:
+        grupos.setdefault(informadas, []).append(linha)
+    for informadas, linhas in grupos.items():
+        db.session.execute(
+            upsert_em_lote(
+                Cliente.__table__, ["cpf_cnpj"], _COLUNAS_ATUALIZADAS + sorted(informadas)
+            ),
+            linhas,
+        )
+
+    _, colunas, _, _ = INDICES["clientes"]
+    linhas = db.session.execute(select(*colunas).where(Cliente.cpf_cnpj.in_(cpfs))).all()
+    atualizar_termos_clientes(db.session.connection(), [linha.id for linha in linhas])
+    registrar_alteracoes_autocomplete("clientes", linhas)
+    db.session.commit()
+    return len(lote) - existentes
+
+
+def _proximo_id_importacao() -> int:
+    """Número sequencial da importação (usa o contador de `sequencias_os` com prefixo próprio)."""
+    tabela = SequenciaOS.__table__
+    with db.engine.begin() as conn:
+        conn.execute(
+            insert_ignorando_duplicadas(tabela), {"prefixo": PREFIXO_IMPORTACAO, "ultimo_numero": 0}
+        )
+        conn.execute(
+            update(tabela)
+            .where(tabela.c.prefixo == PREFIXO_IMPORTACAO)
+            .values(ultimo_numero=tabela.c.ultimo_numero + 1)
+        )
+        return conn.execute(
+            select(tabela.c.ultimo_numero).where(tabela.c.prefixo == PREFIXO_IMPORTACAO)
+        ).scalar()
+
+
+def importar_clientes(arquivo_binario, formato: str, tamanho_lote: int = None) -> dict:
+    """Importa o arquivo e retorna o resumo com os erros por linha."""
+    from routes_notificacoes import criar_notificacao_clientes_importados
+
+    if formato not in FORMATOS_IMPORTACAO:
+        raise ValueError(f"formato deve ser um de: {', '.join(FORMATOS_IMPORTACAO)}")
+    tamanho_lote = tamanho_lote or current_app.config["CLIENTES_IMPORTACAO_LOTE"]
+
+    inicio = time.perf_counter()
+    agora = datetime.now()
+    resumo = {
+        "importacao_id": _proximo_id_importacao(),
+        "linhas": 0,
+        "novos": 0,
+        "atualizados": 0,
+        "com_erro": 0,
+        "erros": [],
+    }
+
+    def registrar_erro(numero, mensagem):
+        resumo["com_erro"] += 1
+        if len(resumo["erros"]) < MAXIMO_ERROS_RELATADOS:
+            resumo["erros"].append({"linha": numero, "erro": mensagem})
+
+    def gravar(lote):
+        novos = _gravar_lote(lote)
+        resumo["novos"] += novos
+        resumo["atualizados"] += len(lote) - novos
+
+    primeira_linha = {}
+    lote = []
+    for numero, registro in ler_registros(arquivo_binario, formato):
+        resumo["linhas"] += 1
+        try:
+            if isinstance(registro, LinhaInvalida):
+                raise registro
+            linha, informadas = validar_registro(registro, agora)
+        except LinhaInvalida as e:
+            registrar_erro(numero, str(e))
+            continue
+
+        anterior = primeira_linha.setdefault(linha["cpf_cnpj"], numero)
+        if anterior != numero:
+            registrar_erro(numero, f"CPF/CNPJ repetido no arquivo (linha {anterior})")
+            continue
+
+        lote.append((linha, informadas))
+        if len(lote) >= tamanho_lote:
+            gravar(lote)
+            lote = []
+
+    if lote:
+        gravar(lote)
+
+    if resumo["novos"] or resumo["atualizados"]:
+        try:
+            criar_notificacao_clientes_importados(resumo)
+            db.session.commit()
+        except Exception as e:
+            print(f"Aviso: Não foi possível criar a notificação da importação: {e}")
+            db.session.rollback()
+
+    resumo["duracao_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+    return resumo
@@ -0,0 +1,35 @@
+"""Serialização JSON das respostas da API.
+
+Usa `orjson` quando instalado (serializa datetime nativamente em C) e cai
+para o módulo `json` da biblioteca padrão caso contrário. Nos dois casos
+datetime/date saem em ISO 8601 e Decimal sai como número, então os
+serializadores das rotas podem devolver esses valores sem conversão.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+def _converter(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável em JSON: {type(valor).__name__}")
+
+
+class JSONProviderRapido(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        if orjson is not None:
+            return orjson.dumps(obj, default=_converter).decode("utf-8")
+        kwargs.setdefault("default", _converter)
+        kwargs.setdefault("ensure_ascii", False)
+        return json.dumps(obj, **kwargs)
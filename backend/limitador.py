@@ -0,0 +1,73 @@
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+
+class LimitadorTokenBucket:
+    """Limitador de requisições por chave (ex: IP) no algoritmo token bucket.
+
+    Cada chave acumula até `capacidade` fichas, repostas à taxa de
+    `fichas_por_segundo`; cada requisição consome uma ficha.
+    """
+
+    def __init__(self, capacidade: float, fichas_por_segundo: float, max_chaves: int = 10000):
+        self.capacidade = capacidade
+        self.fichas_por_segundo = fichas_por_segundo
+        self.max_chaves = max_chaves
+        self._baldes = {}
+        self._lock = threading.Lock()
+
+    def consumir(self, chave) -> float:
+        """Consome uma ficha. Retorna 0 se permitido ou os segundos até a próxima ficha."""
+        agora = time.monotonic()
+        with self._lock:
+            fichas, ultimo = self._baldes.get(chave, (self.capacidade, agora))
+            fichas = min(self.capacidade, fichas + (agora - ultimo) * self.fichas_por_segundo)
+            if fichas < 1:
+                self._baldes[chave] = (fichas, agora)
+                return (1 - fichas) / self.fichas_por_segundo
+
+            self._baldes[chave] = (fichas - 1, agora)
+            if len(self._baldes) > self.max_chaves:
+                self._descartar_cheios(agora)
+            return 0
+
+    def _descartar_cheios(self, agora: float):
+        """Remove baldes que já teriam se reabastecido por completo."""
+        tempo_cheio = self.capacidade / self.fichas_por_segundo
+        for chave, (_, ultimo) in list(self._baldes.items()):
+            if agora - ultimo >= tempo_cheio:
+                del self._baldes[chave]
+
+
+def limitar_por_ip(limitador_factory):
+    """Decorator que aplica um `LimitadorTokenBucket` por IP de origem.
+
+    `limitador_factory` recebe a app e devolve o limitador, criado uma única
+    vez na primeira requisição para poder ler a configuração da app.
+    """
+    def decorator(f):
+        estado = {}
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if "limitador" not in estado:
+                estado["limitador"] = limitador_factory(current_app)
+
+            espera = estado["limitador"].consumir(request.remote_addr or "desconhecido")
+            if espera:
+                resposta = jsonify({
+                    "erro": "Muitas requisições",
+                    "mensagem": "Limite de consultas excedido. Tente novamente em instantes."
+                })
+                resposta.status_code = 429
+                resposta.headers["Retry-After"] = str(int(espera) + 1)
+                return resposta
+
+            return f(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
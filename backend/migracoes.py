@@ -0,0 +1,280 @@
+"""Ajustes de schema aplicados na inicialização da aplicação.
+
+O projeto cria as tabelas com `db.create_all()`, que não altera tabelas já
+existentes. As funções abaixo complementam isso de forma idempotente para
+bancos criados por versões anteriores.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import (
+    MetaData,
+    Table,
+    and_,
+    bindparam,
+    func,
+    insert,
+    inspect,
+    literal,
+    or_,
+    select,
+    text,
+    true,
+    update,
+)
+
+from extensions import db
+
+
+def garantir_colunas():
+    """Adiciona às tabelas existentes as colunas novas declaradas nos models.
+
+    As colunas são criadas como anuláveis; quando precisam de valor inicial,
+    o preenchimento é feito por uma função de migração específica.
+    """
+    inspetor = inspect(db.engine)
+    tabelas_existentes = set(inspetor.get_table_names())
+
+    with db.engine.begin() as conn:
+        for tabela in db.metadata.sorted_tables:
+            if tabela.name not in tabelas_existentes:
+                continue
+            existentes = {c["name"] for c in inspetor.get_columns(tabela.name)}
+            for coluna in tabela.columns:
+                if coluna.name in existentes:
+                    continue
+                tipo = coluna.type.compile(dialect=db.engine.dialect)
+                conn.execute(
+                    text(f"ALTER TABLE {tabela.name} ADD COLUMN {coluna.name} {tipo}")
+                )
+
+
+# Índices trocados por outros (tabela -> nomes), removidos dos bancos antigos
+INDICES_SUBSTITUIDOS = {
+    "clientes": ["ix_clientes_criado_em_id", "ix_clientes_nome_busca"],
+    "ordens_servico": ["ix_ordens_servico_criado_em_id"],
+}
+
+
+def remover_indices_substituidos():
+    inspetor = inspect(db.engine)
+    tabelas_existentes = set(inspetor.get_table_names())
+    with db.engine.begin() as conn:
+        for tabela, nomes in INDICES_SUBSTITUIDOS.items():
+            if tabela not in tabelas_existentes:
+                continue
+            existentes = {i["name"] for i in inspetor.get_indexes(tabela)}
+            for nome in nomes:
+                if nome not in existentes:
+                    continue
+                if db.engine.dialect.name == "mysql":
+                    conn.execute(text(f"DROP INDEX {nome} ON {tabela}"))
+                else:
+                    conn.execute(text(f"DROP INDEX {nome}"))
+
+
+def garantir_indices():
+    """Cria os índices declarados nos models que ainda não existem no banco."""
+    for tabela in db.metadata.sorted_tables:
+        for indice in tabela.indexes:
+            indice.create(db.engine, checkfirst=True)
+
+
+def preencher_colunas_busca_clientes(tamanho_lote: int = 1000):
+    """Preenche as colunas normalizadas de busca dos clientes cadastrados antes delas."""
+    from models import Cliente
+    from normalizacao import normalizar_nome, somente_digitos
+
+    tabela = Cliente.__table__
+    while True:
+        with db.engine.begin() as conn:
+            linhas = conn.execute(
+                select(tabela.c.id, tabela.c.nome, tabela.c.telefone, tabela.c.cpf_cnpj)
+                .where(tabela.c.nome_busca.is_(None))
+                .limit(tamanho_lote)
+            ).all()
+            if not linhas:
+                return
+            conn.execute(
+                update(tabela).where(tabela.c.id == bindparam("_id")),
+                [
+                    {
+                        "_id": linha.id,
+                        "nome_busca": normalizar_nome(linha.nome),
+                        "telefone_digitos": somente_digitos(linha.telefone),
+                        "cpf_cnpj_digitos": somente_digitos(linha.cpf_cnpj),
+                    }
+                    for linha in linhas
+                ],
+            )
+
+
+def preencher_termos_busca_clientes(tamanho_lote: int = 1000):
+    """Gera os termos de busca (busca_clientes.py) dos clientes que ainda não têm."""
+    from busca_clientes import atualizar_termos_clientes
+    from models import Cliente, ClienteTermoBusca
+
+    clientes = Cliente.__table__
+    termos = ClienteTermoBusca.__table__
+    ultimo_id = 0
+    while True:
+        with db.engine.begin() as conn:
+            ids = conn.execute(
+                select(clientes.c.id)
+                .where(
+                    clientes.c.id > ultimo_id,
+                    ~select(termos.c.cliente_id)
+                    .where(termos.c.cliente_id == clientes.c.id)
+                    .exists(),
+                )
+                .order_by(clientes.c.id)
+                .limit(tamanho_lote)
+            ).scalars().all()
+            if not ids:
+                return
+            atualizar_termos_clientes(conn, ids)
+            ultimo_id = ids[-1]
+
+
+def preencher_prazo_limite():
+    """Calcula `prazo_limite` das OS criadas antes da coluna existir."""
+    dialeto = db.engine.dialect.name
+    if dialeto == "sqlite":
+        expressao = "datetime(criado_em, '+' || COALESCE(prazo_estimado, 3) || ' days')"
+    elif dialeto == "mysql":
+        expressao = "DATE_ADD(criado_em, INTERVAL COALESCE(prazo_estimado, 3) DAY)"
+    else:
+        return
+
+    with db.engine.begin() as conn:
+        conn.execute(text(
+            f"UPDATE ordens_servico SET prazo_limite = {expressao} "
+            f"WHERE prazo_limite IS NULL AND criado_em IS NOT NULL"
+        ))
+
+
+def migrar_notificacoes_compartilhadas():
+    """Converte as cópias por usuário de `notificacoes` em notificações compartilhadas.
+
+    O formato antigo tinha uma linha por usuário (colunas `usuario_id` e
+    `lida`). Cada grupo (tipo, ref_tipo, ref_id) vira uma única notificação,
+    mantendo o id da cópia mais antiga; as cópias lidas viram linhas em
+    `notificacao_leituras` e os usuários que não tinham cópia (excluíram ou
+    ainda não existiam) recebem a notificação já marcada como excluída, para
+    que nada reapareça.
+    """
+    from models import REFERENCIAS_NOTIFICACAO, Notificacao, NotificacaoLeitura
+
+    inspetor = inspect(db.engine)
+    colunas = {c["name"] for c in inspetor.get_columns("notificacoes")}
+    if "usuario_id" not in colunas:
+        return
+
+    leituras = NotificacaoLeitura.__table__
+    with db.engine.begin() as conn:
+        # Tabela ainda vazia (criada agora pelo create_all); é recriada depois
+        # do RENAME para que a FK aponte para a nova `notificacoes`
+        leituras.drop(conn, checkfirst=True)
+        conn.execute(text("ALTER TABLE notificacoes RENAME TO notificacoes_legado"))
+        legado = Table("notificacoes_legado", MetaData(), autoload_with=conn)
+
+        for tipo, (ref_tipo, chave) in REFERENCIAS_NOTIFICACAO.items():
+            conn.execute(
+                update(legado)
+                .where(legado.c.tipo == tipo, legado.c.ref_tipo.is_(None))
+                .values(ref_tipo=ref_tipo, ref_id=legado.c.dados_referencia[chave].as_integer())
+            )
+
+        Notificacao.__table__.create(conn)
+        leituras.create(conn)
+
+        # Id da notificação compartilhada de cada cópia antiga
+        canonica = (
+            select(
+                legado.c.tipo, legado.c.ref_tipo, legado.c.ref_id,
+                func.min(legado.c.id).label("id"),
+            )
+            .where(legado.c.ref_id.isnot(None))
+            .group_by(legado.c.tipo, legado.c.ref_tipo, legado.c.ref_id)
+            .subquery("canonica")
+        )
+        copias = (
+            select(
+                legado.c.id.label("copia_id"),
+                legado.c.usuario_id,
+                legado.c.lida,
+                func.coalesce(legado.c.atualizado_em, legado.c.criado_em).label("lida_em"),
+                func.coalesce(canonica.c.id, legado.c.id).label("notificacao_id"),
+            )
+            .select_from(legado)
+            .outerjoin(
+                canonica,
+                and_(
+                    canonica.c.tipo == legado.c.tipo,
+                    canonica.c.ref_tipo == legado.c.ref_tipo,
+                    canonica.c.ref_id == legado.c.ref_id,
+                ),
+            )
+            .subquery("copias")
+        )
+
+        nova = Notificacao.__table__
+        campos = [
+            "id", "tipo", "titulo", "mensagem", "dados_referencia", "ref_tipo", "ref_id",
+            "prioridade", "criado_em", "atualizado_em",
+        ]
+        conn.execute(
+            insert(nova).from_select(
+                campos,
+                select(*[legado.c[c] for c in campos]).where(
+                    legado.c.id.in_(select(copias.c.notificacao_id))
+                ),
+            )
+        )
+
+        conn.execute(
+            insert(leituras).from_select(
+                ["usuario_id", "notificacao_id", "lida_em"],
+                select(copias.c.usuario_id, copias.c.notificacao_id, func.max(copias.c.lida_em))
+                .where(copias.c.lida == True)  # noqa: E712
+                .group_by(copias.c.usuario_id, copias.c.notificacao_id),
+            )
+        )
+
+        usuarios = Table("usuarios", MetaData(), autoload_with=conn)
+        conn.execute(
+            insert(leituras).from_select(
+                ["usuario_id", "notificacao_id", "excluida_em"],
+                select(usuarios.c.id, nova.c.id, literal(datetime.now()))
+                .select_from(usuarios)
+                .join(nova, true())
+                .where(
+                    or_(usuarios.c.criado_em.is_(None), nova.c.criado_em >= usuarios.c.criado_em),
+                    ~select(copias.c.copia_id)
+                    .where(
+                        copias.c.usuario_id == usuarios.c.id,
+                        copias.c.notificacao_id == nova.c.id,
+                    )
+                    .exists()
+                ),
+            )
+        )
+
+        conn.execute(text("DROP TABLE notificacoes_legado"))
+
+    print("Migração: notificações convertidas para o formato compartilhado")
+
+
+def aplicar_migracoes():
+    from busca_os import configurar_indice_busca
+    from contadores_clientes import recalcular_contadores_clientes
+
+    garantir_colunas()
+    preencher_prazo_limite()
+    preencher_colunas_busca_clientes()
+    preencher_termos_busca_clientes()
+    recalcular_contadores_clientes(apenas_sem_valor=True)
+    migrar_notificacoes_compartilhadas()
+    remover_indices_substituidos()
+    garantir_indices()
+    configurar_indice_busca()
@@ -1,6 +1,9 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
 
 from extensions import db
+from normalizacao import normalizar_nome, somente_digitos
 
 
 class TimestampMixin:
@@ -10,8 +13,27 @@ class TimestampMixin:
     )
 
 
+def _indice_nao_excluidos(nome, *colunas):
+    """Índice parcial só com as linhas sem `excluido_em` (exclusão lógica).
+
+    SQLite e PostgreSQL suportam índices parciais; no MySQL vira um índice comum.
+    """
+    condicao = text("excluido_em IS NULL")
+    return db.Index(nome, *colunas, sqlite_where=condicao, postgresql_where=condicao)
+
+
+# Status em que a OS deixa de contar como aberta
+STATUS_OS_ENCERRADAS = ("entregue", "cancelado")
+
+
 class Cliente(TimestampMixin, db.Model):
     __tablename__ = "clientes"
+    __table_args__ = (
+        _indice_nao_excluidos("ix_clientes_ativos_criado_em_id", "criado_em", "id"),
+        _indice_nao_excluidos("ix_clientes_ativos_nome_busca", "nome_busca", "id"),
+        db.Index("ix_clientes_telefone_digitos", "telefone_digitos"),
+        db.Index("ix_clientes_cpf_cnpj_digitos", "cpf_cnpj_digitos"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(150), nullable=False)
@@ -22,14 +44,54 @@ class Cliente(TimestampMixin, db.Model):
     telefone = db.Column(db.String(20), nullable=False)
     observacoes = db.Column(db.Text)
     status = db.Column(db.String(20), nullable=False, default="ativo")
+    # Exclusão lógica: a linha fica no banco, mas sai das consultas (ver exclusao.py)
+    excluido_em = db.Column(db.DateTime)
+
+    # Cópias normalizadas para a busca, mantidas por `_atualizar_colunas_busca_cliente`
+    nome_busca = db.Column(db.String(150))
+    telefone_digitos = db.Column(db.String(20))
+    cpf_cnpj_digitos = db.Column(db.String(14))
+
+    # Totais das OS do cliente, mantidos por contadores_clientes.py
+    total_os = db.Column(db.Integer, default=0)
+    os_abertas = db.Column(db.Integer, default=0)
+    total_faturado = db.Column(db.Numeric(12, 2), default=0)
+    ultima_visita = db.Column(db.DateTime)
 
+    # As OS são removidas pelo banco (ON DELETE CASCADE) ou por exclusao.py, sem carregá-las
     ordens_servico = db.relationship(
-        "OrdemServico", back_populates="cliente", cascade="all, delete-orphan"
+        "OrdemServico", back_populates="cliente", cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+@event.listens_for(Cliente, "before_insert")
+@event.listens_for(Cliente, "before_update")
+def _atualizar_colunas_busca_cliente(mapper, connection, cliente):
+    cliente.nome_busca = normalizar_nome(cliente.nome)
+    cliente.telefone_digitos = somente_digitos(cliente.telefone)
+    cliente.cpf_cnpj_digitos = somente_digitos(cliente.cpf_cnpj)
+
+
+class ClienteTermoBusca(db.Model):
+    """Palavras do nome, e-mail e números de um cliente, mantidas por busca_clientes.py."""
+
+    __tablename__ = "clientes_termos_busca"
+    __table_args__ = (db.Index("ix_clientes_termos_busca_cliente_id", "cliente_id"),)
+
+    termo = db.Column(db.String(150), primary_key=True)
+    cliente_id = db.Column(
+        db.Integer, db.ForeignKey("clientes.id", ondelete="CASCADE"), primary_key=True
     )
 
 
 class ProdutoEstoque(TimestampMixin, db.Model):
     __tablename__ = "produtos_estoque"
+    __table_args__ = (
+        db.Index("ix_produtos_estoque_criado_em_id", "criado_em", "id"),
+        db.Index("ix_produtos_estoque_categoria", "categoria"),
+        db.Index("ix_produtos_estoque_atualizado_em", "atualizado_em"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     codigo = db.Column(db.String(20), nullable=False, unique=True)
@@ -46,11 +108,21 @@ class ProdutoEstoque(TimestampMixin, db.Model):
 
 class OrdemServico(TimestampMixin, db.Model):
     __tablename__ = "ordens_servico"
+    __table_args__ = (
+        _indice_nao_excluidos("ix_ordens_servico_ativas_criado_em_id", "criado_em", "id"),
+        db.Index("ix_ordens_servico_status_criado_em", "status", "criado_em"),
+        db.Index("ix_ordens_servico_cliente_id", "cliente_id"),
+        db.Index("ix_ordens_servico_ia_status", "ia_status"),
+        db.Index("ix_ordens_servico_status_prazo_limite", "status", "prazo_limite"),
+        db.Index("ix_ordens_servico_atualizado_em", "atualizado_em"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     numero_os = db.Column(db.String(20), nullable=False, unique=True)
 
-    cliente_id = db.Column(db.Integer, db.ForeignKey("clientes.id"), nullable=False)
+    cliente_id = db.Column(
+        db.Integer, db.ForeignKey("clientes.id", ondelete="CASCADE"), nullable=False
+    )
     cliente = db.relationship("Cliente", back_populates="ordens_servico")
 
     tipo_aparelho = db.Column(db.String(50), nullable=False)
@@ -62,6 +134,8 @@ class OrdemServico(TimestampMixin, db.Model):
     diagnostico_tecnico = db.Column(db.String(400))
 
     prazo_estimado = db.Column(db.Integer, nullable=False, default=3)
+    # criado_em + prazo_estimado dias, mantido pelos eventos abaixo
+    prazo_limite = db.Column(db.DateTime)
     valor_orcamento = db.Column(db.Numeric(10, 2))
 
     status = db.Column(
@@ -77,6 +151,50 @@ class OrdemServico(TimestampMixin, db.Model):
 
     observacoes = db.Column(db.Text)
 
+    # Enriquecimento com IA feito em segundo plano após a criação
+    ia_status = db.Column(db.String(20))  # pendente, processando, concluido, falhou
+    ia_iniciado_em = db.Column(db.DateTime)  # quando um worker reivindicou a OS
+
+    # Exclusão lógica (ver exclusao.py)
+    excluido_em = db.Column(db.DateTime)
+
+
+class EventoOS(db.Model):
+    """Histórico (somente inserção) das mudanças de status e prioridade de uma OS."""
+
+    __tablename__ = "os_eventos"
+    __table_args__ = (
+        db.Index("ix_os_eventos_os_id_criado_em", "os_id", "criado_em"),
+        db.Index("ix_os_eventos_tipo_criado_em", "tipo", "criado_em"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    os_id = db.Column(
+        db.Integer, db.ForeignKey("ordens_servico.id", ondelete="CASCADE"), nullable=False
+    )
+    tipo = db.Column(db.String(20), nullable=False)  # status, prioridade
+    valor_anterior = db.Column(db.String(20))
+    valor_novo = db.Column(db.String(20), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id"))
+    criado_em = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+
+@event.listens_for(OrdemServico, "before_insert")
+@event.listens_for(OrdemServico, "before_update")
+def _atualizar_prazo_limite(mapper, connection, os_obj):
+    if os_obj.criado_em is None:
+        os_obj.criado_em = datetime.now()
+    os_obj.prazo_limite = os_obj.criado_em + timedelta(days=os_obj.prazo_estimado or 3)
+
+
+class SequenciaOS(db.Model):
+    """Contador atômico usado na numeração das OS, um registro por prefixo."""
+
+    __tablename__ = "sequencias_os"
+
+    prefixo = db.Column(db.String(20), primary_key=True)
+    ultimo_numero = db.Column(db.Integer, nullable=False, default=0)
+
 
 class Usuario(TimestampMixin, db.Model):
     __tablename__ = "usuarios"
@@ -88,22 +206,174 @@ class Usuario(TimestampMixin, db.Model):
     email = db.Column(db.String(120), unique=True)
     ativo = db.Column(db.Boolean, default=True)
 
-    # Relacionamento com notificações
-    notificacoes = db.relationship(
-        "Notificacao", back_populates="usuario", cascade="all, delete-orphan"
+    leituras_notificacoes = db.relationship(
+        "NotificacaoLeitura", back_populates="usuario", cascade="all, delete-orphan"
     )
 
 
+# Tipo de notificação -> (ref_tipo, chave de dados_referencia com o id referenciado)
+REFERENCIAS_NOTIFICACAO = {
+    "os_atrasada": ("os", "os_id"),
+    "os_pronta": ("os", "os_id"),
+    "estoque_critico": ("produto", "produto_id"),
+    "cliente_novo": ("cliente", "cliente_id"),
+    "clientes_importados": ("importacao", "importacao_id"),
+}
+
+
 class Notificacao(TimestampMixin, db.Model):
+    """Notificação compartilhada por todos os usuários.
+
+    O estado de cada usuário (lida/excluída) fica em `NotificacaoLeitura`;
+    um usuário vê as notificações criadas depois do seu cadastro que ele não
+    excluiu.
+    """
+
     __tablename__ = "notificacoes"
+    __table_args__ = (
+        db.Index("ix_notificacoes_criado_em_id", "criado_em", "id"),
+        # Uma notificação de cada tipo por registro referenciado
+        db.Index("uq_notificacoes_evento", "tipo", "ref_tipo", "ref_id", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tipo = db.Column(db.String(50), nullable=False)  # os_atrasada, estoque_critico, etc.
     titulo = db.Column(db.String(200), nullable=False)
     mensagem = db.Column(db.Text, nullable=False)
     dados_referencia = db.Column(db.JSON)  # Dados para link/ação (ex: {"os_id": 123})
-    lida = db.Column(db.Boolean, default=False)
+    ref_tipo = db.Column(db.String(20))  # os, produto, cliente
+    ref_id = db.Column(db.Integer)
     prioridade = db.Column(db.String(20), default="normal")  # baixa, normal, alta, urgente
 
-    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id"), nullable=False)
-    usuario = db.relationship("Usuario", back_populates="notificacoes")
+    leituras = db.relationship(
+        "NotificacaoLeitura", back_populates="notificacao", passive_deletes=True
+    )
+
+
+class NotificacaoArquivo(db.Model):
+    """Notificações removidas pela retenção.
+
+    As que ainda tinham leitor pendente são guardadas inteiras; as já lidas
+    por todos ficam compactadas (só a chave e as datas), o suficiente para a
+    varredura não recriá-las. Depois de NOTIFICACOES_ARQUIVO_RETENCAO_DIAS
+    são removidas.
+    """
+
+    __tablename__ = "notificacoes_arquivo"
+    __table_args__ = (
+        db.Index("ix_notificacoes_arquivo_referencia", "tipo", "ref_tipo", "ref_id"),
+        db.Index("ix_notificacoes_arquivo_arquivado_em", "arquivado_em"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # id original
+    tipo = db.Column(db.String(50), nullable=False)
+    titulo = db.Column(db.String(200))
+    mensagem = db.Column(db.Text)
+    dados_referencia = db.Column(db.JSON)
+    ref_tipo = db.Column(db.String(20))
+    ref_id = db.Column(db.Integer)
+    prioridade = db.Column(db.String(20))
+    compactada = db.Column(db.Boolean, nullable=False, default=False)
+    criado_em = db.Column(db.DateTime)
+    arquivado_em = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+
+class NotificacaoLeitura(db.Model):
+    """Estado de uma notificação para um usuário; sem linha, ela está não lida."""
+
+    __tablename__ = "notificacao_leituras"
+    __table_args__ = (
+        db.Index("ix_notificacao_leituras_notificacao_id", "notificacao_id"),
+        # Filtro/ordenação por lida na listagem e UPDATEs em lote de um usuário
+        db.Index(
+            "ix_notificacao_leituras_usuario_lida", "usuario_id", "lida_em", "notificacao_id"
+        ),
+    )
+
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id"), primary_key=True)
+    notificacao_id = db.Column(
+        db.Integer, db.ForeignKey("notificacoes.id", ondelete="CASCADE"), primary_key=True
+    )
+    lida_em = db.Column(db.DateTime)
+    excluida_em = db.Column(db.DateTime)
+
+    usuario = db.relationship("Usuario", back_populates="leituras_notificacoes")
+    notificacao = db.relationship("Notificacao", back_populates="leituras")
+
+
+class ContadorNotificacoes(db.Model):
+    """Quantidade de notificações não lidas de cada usuário, mantida a cada alteração."""
+
+    __tablename__ = "contadores_notificacoes"
+
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id"), primary_key=True)
+    nao_lidas = db.Column(db.Integer, nullable=False, default=0)
+    atualizado_em = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class TarefaAgendada(db.Model):
+    """Estado das tarefas do agendador: trava entre processos e marca d'água."""
+
+    __tablename__ = "tarefas_agendadas"
+
+    nome = db.Column(db.String(50), primary_key=True)
+    dono = db.Column(db.String(100))  # processo que detém a trava
+    bloqueada_ate = db.Column(db.DateTime)
+    marca_dagua = db.Column(db.DateTime)  # início da última execução concluída
+    ultima_execucao = db.Column(db.DateTime)
+    ultimo_resultado = db.Column(db.JSON)
+
+
+class EventoSistema(db.Model):
+    """Eventos publicados para os clientes SSE quando o broker "banco" está ativo."""
+
+    __tablename__ = "eventos_sistema"
+    __table_args__ = (
+        db.Index("ix_eventos_sistema_criado_em", "criado_em"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    dados = db.Column(db.JSON)
+    criado_em = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+
+class CacheIA(TimestampMixin, db.Model):
+    """Respostas do modelo de IA indexadas pelo hash das entradas normalizadas."""
+
+    __tablename__ = "cache_ia"
+    __table_args__ = (
+        db.Index("ix_cache_ia_ultimo_acesso", "ultimo_acesso"),
+    )
+
+    chave = db.Column(db.String(64), primary_key=True)  # sha256 hex
+    tipo = db.Column(db.String(30), nullable=False)  # resumo, pre_diagnostico
+    modelo = db.Column(db.String(50), nullable=False)
+    versao_prompt = db.Column(db.String(20), nullable=False)
+    resposta = db.Column(db.Text, nullable=False)
+    acessos = db.Column(db.Integer, nullable=False, default=0)
+    ultimo_acesso = db.Column(db.DateTime, default=datetime.now)
+
+
+class LoteDiagnostico(TimestampMixin, db.Model):
+    """Execução em lote de pré-diagnósticos com IA, consultada por polling."""
+
+    __tablename__ = "lotes_diagnostico"
+
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(
+        db.String(20),
+        nullable=False,
+        default="pendente",  # pendente, executando, concluido, falhou
+    )
+    os_ids = db.Column(db.JSON, nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    processados = db.Column(db.Integer, nullable=False, default=0)
+    falhas = db.Column(db.Integer, nullable=False, default=0)
+    concorrencia = db.Column(db.Integer, nullable=False, default=1)
+    # Lote escolhido por `filtro.semDiagnostico`: só grava em OS ainda sem diagnóstico
+    apenas_sem_diagnostico = db.Column(db.Boolean, default=False)
+    erro = db.Column(db.Text)
+    finalizado_em = db.Column(db.DateTime)
+
+    usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id"))
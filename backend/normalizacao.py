@@ -0,0 +1,27 @@
+"""Normalização de textos usada nas colunas e índices de busca."""
+
+import re
+import unicodedata
+
+_NAO_DIGITOS = re.compile(r"\D")
+_ESPACOS = re.compile(r"\s+")
+
+
+def somente_digitos(valor) -> str:
+    return _NAO_DIGITOS.sub("", valor or "")
+
+
+def normalizar_nome(valor) -> str:
+    """Minúsculas, sem acentos e com espaços simples: "  José  DA Silva" -> "jose da silva"."""
+    decomposto = unicodedata.normalize("NFKD", valor or "")
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return _ESPACOS.sub(" ", sem_acentos.casefold()).strip()
+
+
+def intervalo_prefixo(coluna, prefixo: str):
+    """Condição `coluna` começa com `prefixo` escrita como intervalo, para usar o índice.
+
+    "jo" vira coluna >= 'jo' AND coluna < 'jp'.
+    """
+    fim = prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+    return (coluna >= prefixo) & (coluna < fim)
@@ -0,0 +1,118 @@
+"""Numeração das OS a partir da tabela `sequencias_os`.
+
+Cada prefixo tem um contador próprio. A reserva incrementa o contador com um
+único UPDATE dentro da transação de quem chama, então duas requisições
+simultâneas nunca recebem o mesmo número: a segunda espera o lock da linha
+até a primeira terminar. Nenhuma consulta percorre `ordens_servico`, exceto
+na criação do contador de um prefixo novo.
+
+Números reservados em bloco (`reservar_numeros_os` com quantidade > 1) são
+usados depois na criação da OS (`numeroOS`), conferidos por `numero_reservado`.
+"""
+
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import OrdemServico, SequenciaOS
+
+
+def prefixo_atual() -> str:
+    """Prefixo padrão configurado, incluindo o ano quando OS_NUMERO_POR_ANO."""
+    prefixo = current_app.config["OS_NUMERO_PREFIXO"]
+    if current_app.config["OS_NUMERO_POR_ANO"]:
+        prefixo = f"{prefixo}{datetime.now().year}-"
+    return prefixo
+
+
+def formatar_numero(prefixo: str, numero: int) -> str:
+    return f"{prefixo}{numero:04d}"
+
+
+def separar_numero(numero_os: str):
+    """(prefixo, número) de um número formatado, ou None se não tiver o formato."""
+    sufixo = len(numero_os) - len(numero_os.rstrip("0123456789"))
+    if sufixo < 4:
+        return None
+    prefixo, numero = numero_os[:-sufixo], int(numero_os[-sufixo:])
+    if formatar_numero(prefixo, numero) != numero_os:
+        return None
+    return prefixo, numero
+
+
+def numero_reservado(numero_os: str) -> bool:
+    """O número já foi entregue pelo contador do seu prefixo (e pode ser usado)."""
+    partes = separar_numero(numero_os or "")
+    if partes is None:
+        return False
+    prefixo, numero = partes
+    ultimo = db.session.execute(
+        select(SequenciaOS.ultimo_numero).where(SequenciaOS.prefixo == prefixo)
+    ).scalar()
+    return ultimo is not None and 1 <= numero <= ultimo
+
+
+def _escapar_like(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _maior_numero_existente(prefixo: str) -> int:
+    """Maior número já usado com o prefixo (para bancos com OS anteriores à sequência).
+
+    Conta as OS com exclusão lógica: o número continua ocupado no índice único.
+    """
+    maior = 0
+    numeros = (
+        db.session.query(OrdemServico.numero_os)
+        .filter(OrdemServico.numero_os.like(f"{_escapar_like(prefixo)}%", escape="\\"))
+        .execution_options(incluir_excluidos=True)
+        .yield_per(1000)
+    )
+    for (numero_os,) in numeros:
+        sufixo = numero_os[len(prefixo):]
+        if sufixo.isdigit():
+            maior = max(maior, int(sufixo))
+    return maior
+
+
+def _garantir_sequencia(prefixo: str):
+    if db.session.get(SequenciaOS, prefixo) is not None:
+        return
+
+    inicial = _maior_numero_existente(prefixo)
+    # Conexão própria: o contador passa a existir mesmo que a transação
+    # de quem chamou seja desfeita. Se outro processo criou antes, ignora.
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(
+                insert(SequenciaOS.__table__).values(prefixo=prefixo, ultimo_numero=inicial)
+            )
+    except IntegrityError:
+        pass
+
+
+def reservar_numeros_os(quantidade: int = 1, prefixo: str = None) -> list:
+    """Reserva `quantidade` números consecutivos e devolve-os formatados.
+
+    A reserva só é confirmada no commit da sessão atual; se a transação for
+    desfeita, os números voltam a ficar disponíveis.
+    """
+    if quantidade < 1:
+        raise ValueError("quantidade deve ser maior que zero")
+
+    prefixo = prefixo or prefixo_atual()
+    _garantir_sequencia(prefixo)
+
+    db.session.execute(
+        update(SequenciaOS)
+        .where(SequenciaOS.prefixo == prefixo)
+        .values(ultimo_numero=SequenciaOS.ultimo_numero + quantidade)
+    )
+    ultimo = db.session.execute(
+        select(SequenciaOS.ultimo_numero).where(SequenciaOS.prefixo == prefixo)
+    ).scalar_one()
+
+    return [formatar_numero(prefixo, n) for n in range(ultimo - quantidade + 1, ultimo + 1)]
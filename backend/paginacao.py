@@ -0,0 +1,145 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import abort, request
+from sqlalchemy import and_, false, or_
+
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+
+def obter_limite() -> int:
+    """Lê o parâmetro `limite` da query string respeitando o máximo permitido."""
+    try:
+        limite = int(request.args.get("limite", LIMITE_PADRAO))
+    except (TypeError, ValueError):
+        abort(400, description="Parâmetro limite deve ser um número inteiro")
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+
+def obter_lista(parametro: str) -> list:
+    """Lê um parâmetro que aceita vários valores separados por vírgula."""
+    valor = request.args.get(parametro) or ""
+    return [v.strip() for v in valor.split(",") if v.strip()]
+
+
+def obter_data(parametro: str):
+    """Converte um parâmetro de data (ISO 8601) da query string em datetime."""
+    valor = request.args.get(parametro)
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(valor)
+    except ValueError:
+        abort(400, description=f"Parâmetro {parametro} deve estar no formato ISO 8601")
+
+
+def aplicar_filtro_periodo(query, coluna):
+    """Aplica os filtros `dataInicio`/`dataFim` sobre a coluna de data informada."""
+    inicio = obter_data("dataInicio")
+    fim = obter_data("dataFim")
+    if inicio:
+        query = query.filter(coluna >= inicio)
+    if fim:
+        query = query.filter(coluna <= fim)
+    return query
+
+
+def _serializar_valor(valor):
+    if isinstance(valor, datetime):
+        return {"dt": valor.isoformat()}
+    return valor
+
+
+def _deserializar_valor(valor):
+    if isinstance(valor, dict) and "dt" in valor:
+        return datetime.fromisoformat(valor["dt"])
+    return valor
+
+
+def codificar_cursor(valores) -> str:
+    """Codifica os valores da última linha da página em um cursor opaco."""
+    bruto = json.dumps([_serializar_valor(v) for v in valores], separators=(",", ":"))
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, quantidade: int) -> list:
+    """Decodifica um cursor gerado por `codificar_cursor`."""
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        bruto = base64.urlsafe_b64decode(cursor + preenchimento).decode()
+        valores = [_deserializar_valor(v) for v in json.loads(bruto)]
+    except (ValueError, TypeError):
+        abort(400, description="Cursor de paginação inválido")
+    if len(valores) != quantidade:
+        abort(400, description="Cursor de paginação inválido")
+    return valores
+
+
+def _comparar(coluna, valor, descendente):
+    if isinstance(valor, bool):
+        # Colunas booleanas só aceitam igualdade: False < True
+        if descendente:
+            return coluna == False if valor else false()  # noqa: E712
+        return false() if valor else coluna == True  # noqa: E712
+    return coluna < valor if descendente else coluna > valor
+
+
+def _condicao_apos_cursor(ordenacao, valores):
+    """Monta a condição de keyset: linhas estritamente depois da posição do cursor.
+
+    Para ordenação (a, b, c) gera
+    (a > va) OR (a = va AND b > vb) OR (a = va AND b = vb AND c > vc),
+    trocando `>` por `<` nas colunas em ordem decrescente.
+    """
+    condicoes = []
+    for i, (coluna, descendente) in enumerate(ordenacao):
+        iguais = [ordenacao[j][0] == valores[j] for j in range(i)]
+        condicoes.append(and_(*iguais, _comparar(coluna, valores[i], descendente)))
+    return or_(*condicoes)
+
+
+def paginar(query, ordenacao, serializar, chave_linha=None):
+    """Executa uma página de `query` usando paginação por cursor (keyset).
+
+    `ordenacao` é uma lista de tuplas (coluna, descendente) que precisa terminar
+    em uma coluna única (normalmente o id) para garantir ordem estável.
+    `chave_linha` extrai da linha os valores correspondentes às colunas de
+    ordenação; por padrão lê os atributos de mesmo nome da entidade.
+
+    Retorna o envelope padrão das listagens:
+    {"items": [...], "next_cursor": str | None, "total_estimate": int | None}.
+    O total só é calculado na primeira página, para não repetir o COUNT a
+    cada página navegada.
+    """
+    limite = obter_limite()
+    cursor = request.args.get("cursor")
+
+    if chave_linha is None:
+        def chave_linha(linha):
+            return [getattr(linha, coluna.key) for coluna, _ in ordenacao]
+
+    total_estimado = None
+    if cursor:
+        valores = decodificar_cursor(cursor, len(ordenacao))
+        query = query.filter(_condicao_apos_cursor(ordenacao, valores))
+    else:
+        total_estimado = query.order_by(None).count()
+
+    query = query.order_by(
+        *[coluna.desc() if descendente else coluna.asc() for coluna, descendente in ordenacao]
+    )
+    linhas = query.limit(limite + 1).all()
+
+    proximo_cursor = None
+    if len(linhas) > limite:
+        linhas = linhas[:limite]
+        proximo_cursor = codificar_cursor(chave_linha(linhas[-1]))
+
+    return {
+        "items": [serializar(linha) for linha in linhas],
+        "next_cursor": proximo_cursor,
+        "total_estimate": total_estimado,
+    }
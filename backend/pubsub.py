@@ -0,0 +1,179 @@
+"""Publicação de eventos para os clientes conectados via SSE.
+
+Os eventos são publicados depois do commit da transação que os originou
+(`publicar_apos_commit`) e entregues a todas as assinaturas abertas no
+processo. Há dois brokers:
+
+- "memoria": entrega direta entre as threads do processo. Suficiente quando
+  a aplicação roda em um único processo.
+- "banco": cada evento também é gravado na tabela `eventos_sistema` e uma
+  thread de cada processo lê os eventos novos e os entrega às assinaturas
+  locais. Substitui um broker externo quando há vários workers.
+"""
+
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import EventoSistema
+
+_broker = None
+
+
+class Assinatura:
+    """Fila de eventos de uma conexão SSE."""
+
+    def __init__(self, max_itens: int):
+        self._fila = queue.Queue(maxsize=max_itens)
+
+    def entregar(self, tipo: str, dados: dict):
+        try:
+            self._fila.put_nowait((tipo, dados))
+        except queue.Full:
+            # Cliente lento: descarta o evento; o contador é recalculado no próximo
+            pass
+
+    def proximo(self, timeout: float):
+        """Próximo evento (tipo, dados) ou None se nada chegou dentro do timeout."""
+        try:
+            return self._fila.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class BrokerMemoria:
+    """Distribui os eventos para as assinaturas do próprio processo."""
+
+    def __init__(self, max_itens_assinatura: int = 100):
+        self.max_itens_assinatura = max_itens_assinatura
+        self._assinaturas = set()
+        self._lock = threading.Lock()
+
+    def assinar(self) -> Assinatura:
+        assinatura = Assinatura(self.max_itens_assinatura)
+        with self._lock:
+            self._assinaturas.add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura: Assinatura):
+        with self._lock:
+            self._assinaturas.discard(assinatura)
+
+    def conexoes(self) -> int:
+        with self._lock:
+            return len(self._assinaturas)
+
+    def distribuir(self, tipo: str, dados: dict):
+        with self._lock:
+            assinaturas = list(self._assinaturas)
+        for assinatura in assinaturas:
+            assinatura.entregar(tipo, dados)
+
+    def publicar(self, eventos: list):
+        for tipo, dados in eventos:
+            self.distribuir(tipo, dados)
+
+
+class BrokerBanco(BrokerMemoria):
+    """Repassa os eventos entre processos pela tabela `eventos_sistema`."""
+
+    def __init__(self, app, max_itens_assinatura: int = 100):
+        super().__init__(max_itens_assinatura)
+        self.app = app
+        self.intervalo = app.config["EVENTOS_POLL_SEGUNDOS"]
+        self.retencao = timedelta(minutes=app.config["EVENTOS_RETENCAO_MINUTOS"])
+
+        with app.app_context():
+            self._ultimo_id = db.session.query(db.func.max(EventoSistema.id)).scalar() or 0
+            db.session.remove()
+
+        threading.Thread(target=self._ler_eventos, name="eventos-banco", daemon=True).start()
+
+    def publicar(self, eventos: list):
+        # Entregues às assinaturas locais pela thread de leitura, como nos demais processos
+        agora = datetime.now()
+        with db.engine.begin() as conn:
+            conn.execute(
+                insert(EventoSistema.__table__),
+                [{"tipo": tipo, "dados": dados, "criado_em": agora} for tipo, dados in eventos],
+            )
+
+    def _ler_eventos(self):
+        tabela = EventoSistema.__table__
+        ultima_limpeza = time.monotonic()
+        while True:
+            time.sleep(self.intervalo)
+            try:
+                with self.app.app_context(), db.engine.connect() as conn:
+                    linhas = conn.execute(
+                        select(tabela.c.id, tabela.c.tipo, tabela.c.dados)
+                        .where(tabela.c.id > self._ultimo_id)
+                        .order_by(tabela.c.id)
+                    ).all()
+
+                    if time.monotonic() - ultima_limpeza > 60:
+                        conn.execute(
+                            delete(tabela).where(tabela.c.criado_em < datetime.now() - self.retencao)
+                        )
+                        conn.commit()
+                        ultima_limpeza = time.monotonic()
+            except Exception as e:
+                print(f"Aviso: falha ao ler eventos publicados: {e}")
+                continue
+
+            for id_, tipo, dados in linhas:
+                self._ultimo_id = id_
+                self.distribuir(tipo, dados)
+
+
+def iniciar_broker(app):
+    """Cria o broker configurado em EVENTOS_BROKER e liga a publicação ao commit."""
+    global _broker
+    if _broker is not None:
+        return _broker
+
+    max_itens = app.config["EVENTOS_FILA_POR_CONEXAO"]
+    if app.config["EVENTOS_BROKER"] == "banco":
+        _broker = BrokerBanco(app, max_itens)
+    else:
+        _broker = BrokerMemoria(max_itens)
+    return _broker
+
+
+def obter_broker():
+    return _broker
+
+
+def publicar_apos_commit(tipo: str, dados: dict):
+    """Agenda a publicação do evento para quando a sessão atual fizer commit.
+
+    Se a transação for desfeita, o evento é descartado.
+    """
+    db.session.info.setdefault("eventos_pendentes", []).append((tipo, dados))
+
+
+@event.listens_for(Session, "after_commit")
+def _publicar_pendentes(sessao):
+    eventos = sessao.info.pop("eventos_pendentes", None)
+    if not eventos or _broker is None:
+        return
+    try:
+        _broker.publicar(eventos)
+    except Exception as e:
+        print(f"Aviso: falha ao publicar eventos: {e}")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_pendentes(sessao, transacao_anterior):
+    if transacao_anterior.parent is None:
+        sessao.info.pop("eventos_pendentes", None)
+
+
+def formatar_sse(tipo: str, dados: dict) -> str:
+    return f"event: {tipo}\ndata: {json.dumps(dados, default=str)}\n\n"
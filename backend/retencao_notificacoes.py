@@ -0,0 +1,145 @@
+"""Retenção das notificações.
+
+Notificações mais antigas que NOTIFICACOES_RETENCAO_DIAS saem da tabela
+`notificacoes` (e suas leituras de `notificacao_leituras`) para
+`notificacoes_arquivo`:
+
+- lidas ou excluídas por todos os usuários ativos que as veem: compactadas
+  (o arquivo guarda só tipo/referência e datas);
+- as demais: arquivadas com o conteúdo completo.
+
+Linhas arquivadas há mais de NOTIFICACOES_ARQUIVO_RETENCAO_DIAS são
+removidas do arquivo (0 desliga a remoção). A partir daí a varredura pode
+voltar a notificar uma referência que continue na mesma situação.
+
+O trabalho é feito em lotes de NOTIFICACOES_RETENCAO_LOTE linhas, cada lote
+na sua própria transação curta.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, insert, literal, or_, select
+
+from extensions import db
+from models import Notificacao, NotificacaoArquivo, NotificacaoLeitura, Usuario
+
+
+def _pendente_para_alguem():
+    """Existe usuário ativo que vê a notificação e ainda não a leu nem excluiu."""
+    return (
+        select(Usuario.id)
+        .where(
+            Usuario.ativo == True,  # noqa: E712
+            or_(Usuario.criado_em.is_(None), Notificacao.criado_em >= Usuario.criado_em),
+            ~select(NotificacaoLeitura.usuario_id)
+            .where(
+                NotificacaoLeitura.notificacao_id == Notificacao.id,
+                NotificacaoLeitura.usuario_id == Usuario.id,
+                or_(
+                    NotificacaoLeitura.lida_em.isnot(None),
+                    NotificacaoLeitura.excluida_em.isnot(None),
+                ),
+            )
+            .exists(),
+        )
+        .exists()
+    )
+
+
+def _mover_lote(ids: list, compactar: bool, agora: datetime):
+    """Copia o lote para o arquivo e o remove das tabelas quentes (uma transação)."""
+    if compactar:
+        colunas = [
+            Notificacao.id, Notificacao.tipo, Notificacao.ref_tipo, Notificacao.ref_id,
+            Notificacao.criado_em,
+        ]
+    else:
+        colunas = [
+            Notificacao.id, Notificacao.tipo, Notificacao.titulo, Notificacao.mensagem,
+            Notificacao.dados_referencia, Notificacao.ref_tipo, Notificacao.ref_id,
+            Notificacao.prioridade, Notificacao.criado_em,
+        ]
+
+    db.session.execute(
+        insert(NotificacaoArquivo).from_select(
+            [c.key for c in colunas] + ["compactada", "arquivado_em"],
+            select(*colunas, literal(compactar), literal(agora)).where(Notificacao.id.in_(ids)),
+        )
+    )
+    leituras = db.session.execute(
+        delete(NotificacaoLeitura).where(NotificacaoLeitura.notificacao_id.in_(ids))
+    ).rowcount
+    db.session.execute(delete(Notificacao).where(Notificacao.id.in_(ids)))
+    db.session.commit()
+    return leituras
+
+
+def _expurgar_arquivo(dias: int, tamanho_lote: int) -> int:
+    """Remove do arquivo as linhas arquivadas há mais de `dias` dias; retorna quantas."""
+    limite = datetime.now() - timedelta(days=dias)
+    removidas = 0
+    while True:
+        ids = db.session.execute(
+            select(NotificacaoArquivo.id)
+            .where(NotificacaoArquivo.arquivado_em < limite)
+            .limit(tamanho_lote)
+        ).scalars().all()
+        if not ids:
+            break
+        db.session.execute(delete(NotificacaoArquivo).where(NotificacaoArquivo.id.in_(ids)))
+        db.session.commit()
+        removidas += len(ids)
+    return removidas
+
+
+def aplicar_retencao(dias: int = None, dias_arquivo: int = None) -> dict:
+    """Move as notificações antigas para o arquivo e expurga o arquivo antigo.
+
+    Retorna as quantidades por destino.
+    """
+    inicio = time.perf_counter()
+    dias = dias if dias is not None else current_app.config["NOTIFICACOES_RETENCAO_DIAS"]
+    if dias_arquivo is None:
+        dias_arquivo = current_app.config["NOTIFICACOES_ARQUIVO_RETENCAO_DIAS"]
+    tamanho_lote = current_app.config["NOTIFICACOES_RETENCAO_LOTE"]
+    limite = datetime.now() - timedelta(days=dias)
+    agora = datetime.now()
+
+    resultado = {
+        "compactadas": 0, "arquivadas": 0, "leituras_removidas": 0, "lotes": 0,
+        "expurgadas": 0,
+    }
+    for compactar, condicao in ((True, ~_pendente_para_alguem()), (False, _pendente_para_alguem())):
+        ultimo_id = 0
+        while True:
+            ids = db.session.execute(
+                select(Notificacao.id)
+                .where(Notificacao.criado_em < limite, Notificacao.id > ultimo_id, condicao)
+                .order_by(Notificacao.id)
+                .limit(tamanho_lote)
+            ).scalars().all()
+            if not ids:
+                break
+
+            resultado["leituras_removidas"] += _mover_lote(ids, compactar, agora)
+            resultado["compactadas" if compactar else "arquivadas"] += len(ids)
+            resultado["lotes"] += 1
+            ultimo_id = ids[-1]
+
+    if dias_arquivo > 0:
+        resultado["expurgadas"] = _expurgar_arquivo(dias_arquivo, tamanho_lote)
+
+    if resultado["arquivadas"]:
+        # Notificações não lidas saíram da lista de alguém
+        from contadores_notificacoes import reconciliar_contadores
+        reconciliar_contadores(avisar=False)
+
+    resultado["duracao_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+    print(
+        f"✅ Retenção de notificações: {resultado['compactadas']} compactadas, "
+        f"{resultado['arquivadas']} arquivadas em {resultado['lotes']} lotes, "
+        f"{resultado['expurgadas']} removidas do arquivo"
+    )
+    return resultado
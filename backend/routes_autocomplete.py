@@ -0,0 +1,36 @@
+from flask import Blueprint, abort, jsonify, request
+
+from auth_utils import login_required
+from autocomplete import obter_indice
+
+bp = Blueprint("autocomplete", __name__)
+
+LIMITE_PADRAO_AUTOCOMPLETE = 10
+LIMITE_MAXIMO_AUTOCOMPLETE = 50
+
+
+def _sugestoes(nome_indice: str):
+    try:
+        limite = int(request.args.get("limite", LIMITE_PADRAO_AUTOCOMPLETE))
+    except (TypeError, ValueError):
+        abort(400, description="Parâmetro limite deve ser um número inteiro")
+    limite = max(1, min(limite, LIMITE_MAXIMO_AUTOCOMPLETE))
+
+    indice = obter_indice(nome_indice)
+    if indice is None:
+        return jsonify({"erro": "Autocompletar indisponível"}), 503
+    return jsonify({"items": indice.buscar(request.args.get("q") or "", limite)})
+
+
+@bp.get("/clientes")
+@login_required
+def autocomplete_clientes():
+    """Sugestões de clientes por nome, CPF/CNPJ ou telefone (parâmetros `q` e `limite`)."""
+    return _sugestoes("clientes")
+
+
+@bp.get("/produtos")
+@login_required
+def autocomplete_produtos():
+    """Sugestões de produtos por nome ou código (parâmetros `q` e `limite`)."""
+    return _sugestoes("produtos")
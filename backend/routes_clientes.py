@@ -1,15 +1,42 @@
-from flask import Blueprint, jsonify, request, abort
+from flask import Blueprint, current_app, jsonify, request, abort
 from sqlalchemy.exc import IntegrityError
 
 from extensions import db
-from models import Cliente, Usuario
+from busca_clientes import condicao_busca, palavras_busca
+from exclusao import excluir_clientes, ler_pedido_exclusao, restaurar_clientes
+from models import Cliente, OrdemServico
 from auth_utils import login_required, get_usuario_atual
+from importacao_clientes import FORMATOS_IMPORTACAO, importar_clientes
+from paginacao import aplicar_filtro_periodo, obter_lista, paginar
 from routes_notificacoes import criar_notificacao_cliente_novo
+from routes_os import (
+    concluir_exclusao,
+    consultar_listagem_os,
+    invalidar_status_publico,
+    os_linha_to_dict,
+)
 
 bp = Blueprint("clientes", __name__)
 
 
+# Colunas lidas na listagem (linhas leves em vez de objetos do ORM)
+COLUNAS_LISTAGEM_CLIENTE = (
+    Cliente.id,
+    Cliente.nome,
+    Cliente.cpf_cnpj,
+    Cliente.tipo_pessoa,
+    Cliente.telefone,
+    Cliente.email,
+    Cliente.endereco,
+    Cliente.observacoes,
+    Cliente.status,
+    Cliente.criado_em,
+    Cliente.atualizado_em,
+)
+
+
 def cliente_to_dict(cliente: Cliente) -> dict:
+    """Aceita um `Cliente` ou uma linha com as colunas de `COLUNAS_LISTAGEM_CLIENTE`."""
     return {
         "id": cliente.id,
         "nome": cliente.nome,
@@ -20,23 +47,88 @@ def cliente_to_dict(cliente: Cliente) -> dict:
         "endereco": cliente.endereco,
         "observacoes": cliente.observacoes,
         "status": cliente.status,
-        "dataCadastro": cliente.criado_em.isoformat() if cliente.criado_em else None,
-        "dataAtualizacao": cliente.atualizado_em.isoformat()
-        if cliente.atualizado_em
-        else None,
+        "dataCadastro": cliente.criado_em,
+        "dataAtualizacao": cliente.atualizado_em,
     }
 
 
+def consultar_listagem_clientes():
+    return db.session.query(*COLUNAS_LISTAGEM_CLIENTE)
+
+
+def filtrar_listagem_clientes(query):
+    """Aplica os filtros da query string comuns à listagem e à exportação."""
+    status = obter_lista("status")
+    if status:
+        query = query.filter(Cliente.status.in_(status))
+    tipo_pessoa = obter_lista("tipoPessoa")
+    if tipo_pessoa:
+        query = query.filter(Cliente.tipo_pessoa.in_(tipo_pessoa))
+    return aplicar_filtro_periodo(query, Cliente.criado_em)
+
+
 @bp.get("/")
 @login_required
 def listar_clientes():
-    clientes = Cliente.query.order_by(Cliente.criado_em.desc()).all()
-    return jsonify([cliente_to_dict(c) for c in clientes])
+    return jsonify(
+        paginar(
+            filtrar_listagem_clientes(consultar_listagem_clientes()),
+            [(Cliente.criado_em, True), (Cliente.id, True)],
+            cliente_to_dict,
+        )
+    )
+
+
+# Ordenações aceitas pela busca (parâmetro `ordenar`)
+ORDENACOES_BUSCA_CLIENTES = {
+    "nome": [(Cliente.nome_busca, False), (Cliente.id, False)],
+    "recentes": [(Cliente.criado_em, True), (Cliente.id, True)],
+}
+
+
+@bp.get("/busca")
+@login_required
+def buscar_clientes():
+    """Busca de clientes por início de palavra, paginada por cursor.
+
+    Parâmetros: `q` (termo), `ordenar` ("nome" ou "recentes") e os filtros da
+    listagem. Cada palavra de `q` precisa ser início de uma palavra do nome
+    (sem acentos e sem diferença de maiúsculas), do e-mail, do CPF/CNPJ ou do
+    telefone, este com ou sem DDD. Termos só com dígitos e pontuação contam
+    como um número só. Ver busca_clientes.py.
+    """
+    termo = (request.args.get("q") or "").strip()
+    ordenar = request.args.get("ordenar") or "nome"
+    if ordenar not in ORDENACOES_BUSCA_CLIENTES:
+        abort(400, description=f"ordenar deve ser um de: {', '.join(ORDENACOES_BUSCA_CLIENTES)}")
+
+    query = filtrar_listagem_clientes(
+        consultar_listagem_clientes().add_columns(Cliente.nome_busca)
+    )
+    for palavra in palavras_busca(termo):
+        query = query.filter(condicao_busca(palavra))
+
+    return jsonify(paginar(query, ORDENACOES_BUSCA_CLIENTES[ordenar], cliente_to_dict))
+
+
+def _buscar_por_cpf_cnpj(cpf_cnpj: str):
+    """Cliente com o CPF/CNPJ, incluindo os com exclusão lógica (o índice único vale para todos)."""
+    return (
+        Cliente.query.filter_by(cpf_cnpj=cpf_cnpj)
+        .execution_options(incluir_excluidos=True)
+        .first()
+    )
 
 
 @bp.post("/")
 @login_required
 def criar_cliente():
+    """Cadastra o cliente.
+
+    Se o CPF/CNPJ for de um cliente com exclusão lógica, o cadastro dele volta
+    com os dados enviados (como na importação) e a resposta é 200; as OS
+    excluídas continuam excluídas (use `/<id>/restaurar` para trazê-las).
+    """
     data = request.get_json() or {}
 
     obrigatorios = ["nome", "cpfCnpj", "telefone"]
@@ -47,14 +139,14 @@ def criar_cliente():
     cpf_cnpj_limpo = data["cpfCnpj"].replace(".", "").replace("-", "").replace("/", "").strip()
 
     # Verifica se o CPF/CNPJ já existe
-    cliente_existente = Cliente.query.filter_by(cpf_cnpj=cpf_cnpj_limpo).first()
-    if cliente_existente:
+    cliente_existente = _buscar_por_cpf_cnpj(cpf_cnpj_limpo)
+    if cliente_existente and cliente_existente.excluido_em is None:
         return jsonify({
             "erro": "CPF/CNPJ já cadastrado",
             "mensagem": f"Já existe um cliente cadastrado com o CPF/CNPJ {data['cpfCnpj']}"
         }), 409
 
-    cliente = Cliente(
+    campos = dict(
         nome=data["nome"].strip(),
         cpf_cnpj=cpf_cnpj_limpo,
         tipo_pessoa=data.get("tipoPessoa") or "pessoa_fisica",
@@ -65,15 +157,22 @@ def criar_cliente():
         status=data.get("status") or "ativo",
     )
 
+    if cliente_existente:
+        for campo, valor in campos.items():
+            setattr(cliente_existente, campo, valor)
+        cliente_existente.excluido_em = None
+        db.session.commit()
+        return jsonify(cliente_to_dict(cliente_existente)), 200
+
+    cliente = Cliente(**campos)
+
     try:
         db.session.add(cliente)
         db.session.commit()
 
-        # Criar notificações para todos os usuários após cadastrar cliente
+        # Criar notificação (compartilhada entre os usuários) após cadastrar cliente
         try:
-            usuarios = Usuario.query.filter_by(ativo=True).all()
-            for usuario in usuarios:
-                criar_notificacao_cliente_novo(cliente, usuario.id)
+            criar_notificacao_cliente_novo(cliente)
             db.session.commit()
         except Exception as e:
             print(f"Aviso: Não foi possível criar notificações para novo cliente: {e}")
@@ -94,6 +193,32 @@ def criar_cliente():
     return jsonify(cliente_to_dict(cliente)), 201
 
 
+@bp.post("/importar")
+@login_required
+def importar_clientes_endpoint():
+    """Importa clientes de um arquivo CSV ou NDJSON (mesmas colunas da exportação).
+
+    O arquivo vem no campo `arquivo` (multipart) ou no corpo da requisição;
+    `formato` (csv/ndjson) é lido da query string ou da extensão do arquivo, e
+    `lote` define as linhas por INSERT. Responde com o resumo e os erros por
+    linha: {"linhas", "novos", "atualizados", "com_erro", "erros": [{"linha", "erro"}]}.
+    """
+    arquivo = request.files.get("arquivo")
+    nome_arquivo = (arquivo.filename if arquivo else "") or ""
+    formato = request.args.get("formato") or (
+        "ndjson" if nome_arquivo.endswith((".ndjson", ".jsonl")) else "csv"
+    )
+    if formato not in FORMATOS_IMPORTACAO:
+        abort(400, description=f"formato deve ser um de: {', '.join(FORMATOS_IMPORTACAO)}")
+    try:
+        lote = int(request.args["lote"]) if request.args.get("lote") else None
+    except ValueError:
+        abort(400, description="Parâmetro lote deve ser um número inteiro")
+
+    resumo = importar_clientes(arquivo.stream if arquivo else request.stream, formato, lote)
+    return jsonify(resumo)
+
+
 @bp.get("/<int:cliente_id>")
 @login_required
 def obter_cliente(cliente_id: int):
@@ -101,6 +226,36 @@ def obter_cliente(cliente_id: int):
     return jsonify(cliente_to_dict(cliente))
 
 
+def totais_cliente_to_dict(cliente: Cliente) -> dict:
+    return {
+        "totalOS": cliente.total_os or 0,
+        "osAbertas": cliente.os_abertas or 0,
+        "totalFaturado": float(cliente.total_faturado or 0),
+        "ultimaVisita": cliente.ultima_visita,
+    }
+
+
+@bp.get("/<int:cliente_id>/resumo")
+@login_required
+def resumo_cliente(cliente_id: int):
+    """Cliente, totais das OS e histórico de OS paginado por cursor (mais recentes primeiro).
+
+    Os totais vêm das colunas mantidas em `contadores_clientes`; `limite` e
+    `cursor` se aplicam ao histórico.
+    """
+    cliente = Cliente.query.get_or_404(cliente_id)
+    historico = paginar(
+        consultar_listagem_os().filter(OrdemServico.cliente_id == cliente_id),
+        [(OrdemServico.criado_em, True), (OrdemServico.id, True)],
+        os_linha_to_dict,
+    )
+    return jsonify({
+        "cliente": cliente_to_dict(cliente),
+        "totais": totais_cliente_to_dict(cliente),
+        "ordens": historico,
+    })
+
+
 @bp.put("/<int:cliente_id>")
 @login_required
 def atualizar_cliente(cliente_id: int):
@@ -115,12 +270,12 @@ def atualizar_cliente(cliente_id: int):
         )
         # Verifica se o novo CPF/CNPJ já está sendo usado por outro cliente
         if cpf_cnpj_limpo != cliente.cpf_cnpj:
-            cliente_existente = Cliente.query.filter_by(cpf_cnpj=cpf_cnpj_limpo).first()
+            cliente_existente = _buscar_por_cpf_cnpj(cpf_cnpj_limpo)
             if cliente_existente and cliente_existente.id != cliente_id:
-                return jsonify({
-                    "erro": "CPF/CNPJ já cadastrado",
-                    "mensagem": f"Já existe outro cliente cadastrado com o CPF/CNPJ {data['cpfCnpj']}"
-                }), 409
+                mensagem = f"Já existe outro cliente cadastrado com o CPF/CNPJ {data['cpfCnpj']}"
+                if cliente_existente.excluido_em is not None:
+                    mensagem += f" (excluído; restaure o cliente {cliente_existente.id})"
+                return jsonify({"erro": "CPF/CNPJ já cadastrado", "mensagem": mensagem}), 409
         cliente.cpf_cnpj = cpf_cnpj_limpo
     if "tipoPessoa" in data:
         cliente.tipo_pessoa = data["tipoPessoa"]
@@ -155,7 +310,45 @@ def atualizar_cliente(cliente_id: int):
 @bp.delete("/<int:cliente_id>")
 @login_required
 def deletar_cliente(cliente_id: int):
-    cliente = Cliente.query.get_or_404(cliente_id)
-    db.session.delete(cliente)
-    db.session.commit()
+    """Exclui o cliente e as OS dele (`modo=logica` para exclusão lógica).
+
+    A exclusão definitiva também remove um cliente que já tinha exclusão lógica.
+    """
+    _, modo = ler_pedido_exclusao(
+        {"ids": [cliente_id], "modo": request.args.get("modo")},
+        current_app.config["EXCLUSAO_MODO_PADRAO"],
+    )
+    resultado = concluir_exclusao(excluir_clientes([cliente_id], modo))
+    if not resultado["clientes"]:
+        abort(404)
     return "", 204
+
+
+@bp.post("/<int:cliente_id>/restaurar")
+@login_required
+def restaurar_cliente(cliente_id: int):
+    """Desfaz a exclusão lógica do cliente e das OS excluídas junto com ele."""
+    resultado = restaurar_clientes([cliente_id])
+    if not resultado["clientes"]:
+        abort(404)
+    db.session.commit()
+    for numero_os in resultado.pop("numeros_os"):
+        invalidar_status_publico(numero_os)
+
+    cliente = db.session.get(Cliente, cliente_id)
+    return jsonify({**resultado, "cliente": cliente_to_dict(cliente)})
+
+
+@bp.post("/lote/excluir")
+@login_required
+def excluir_clientes_em_massa():
+    """Exclui vários clientes e as OS deles com comandos em conjunto.
+
+    Body: {"ids": [1, 2, ...], "modo": "definitiva" | "logica"}. Responde com
+    as quantidades de clientes, OS, eventos e notificações removidos.
+    """
+    ids, modo = ler_pedido_exclusao(
+        request.get_json() or {}, current_app.config["EXCLUSAO_MODO_PADRAO"]
+    )
+    resultado = concluir_exclusao(excluir_clientes(ids, modo))
+    return jsonify({"modo": modo, **resultado})
@@ -3,11 +3,31 @@ from flask import Blueprint, jsonify, request, abort
 from extensions import db
 from models import ProdutoEstoque
 from auth_utils import login_required
+from paginacao import aplicar_filtro_periodo, obter_lista, paginar
 
 bp = Blueprint("estoque", __name__)
 
 
+# Colunas lidas na listagem (linhas leves em vez de objetos do ORM)
+COLUNAS_LISTAGEM_PRODUTO = (
+    ProdutoEstoque.id,
+    ProdutoEstoque.codigo,
+    ProdutoEstoque.nome,
+    ProdutoEstoque.categoria,
+    ProdutoEstoque.descricao,
+    ProdutoEstoque.quantidade,
+    ProdutoEstoque.estoque_minimo,
+    ProdutoEstoque.preco_custo,
+    ProdutoEstoque.preco_venda,
+    ProdutoEstoque.fornecedor,
+    ProdutoEstoque.localizacao,
+    ProdutoEstoque.criado_em,
+    ProdutoEstoque.atualizado_em,
+)
+
+
 def produto_to_dict(produto: ProdutoEstoque) -> dict:
+    """Aceita um `ProdutoEstoque` ou uma linha com as colunas de `COLUNAS_LISTAGEM_PRODUTO`."""
     return {
         "id": produto.id,
         "codigo": produto.codigo,
@@ -20,16 +40,35 @@ def produto_to_dict(produto: ProdutoEstoque) -> dict:
         "precoVenda": float(produto.preco_venda or 0),
         "fornecedor": produto.fornecedor,
         "localizacao": produto.localizacao,
-        "dataCadastro": produto.criado_em.isoformat() if produto.criado_em else None,
-        "dataAtualizacao": produto.atualizado_em.isoformat() if produto.atualizado_em else None,
+        "dataCadastro": produto.criado_em,
+        "dataAtualizacao": produto.atualizado_em,
     }
 
 
+def consultar_listagem_produtos():
+    return db.session.query(*COLUNAS_LISTAGEM_PRODUTO)
+
+
+def filtrar_listagem_produtos(query):
+    """Aplica os filtros da query string comuns à listagem e à exportação."""
+    categoria = obter_lista("categoria")
+    if categoria:
+        query = query.filter(ProdutoEstoque.categoria.in_(categoria))
+    if request.args.get("estoqueCritico") == "true":
+        query = query.filter(ProdutoEstoque.quantidade <= ProdutoEstoque.estoque_minimo)
+    return aplicar_filtro_periodo(query, ProdutoEstoque.criado_em)
+
+
 @bp.get("/")
 @login_required
 def listar_produtos():
-    produtos = ProdutoEstoque.query.order_by(ProdutoEstoque.criado_em.desc()).all()
-    return jsonify([produto_to_dict(p) for p in produtos])
+    return jsonify(
+        paginar(
+            filtrar_listagem_produtos(consultar_listagem_produtos()),
+            [(ProdutoEstoque.criado_em, True), (ProdutoEstoque.id, True)],
+            produto_to_dict,
+        )
+    )
 
 
 @bp.post("/")
@@ -0,0 +1,99 @@
+import jwt
+from flask import Blueprint, Response, current_app, g, jsonify, request, stream_with_context
+
+from auth_utils import ESCOPO_EVENTOS, gerar_token_eventos, login_required, verificar_token_jwt
+from autocomplete import EVENTO_AUTOCOMPLETE
+from extensions import db
+from pubsub import formatar_sse, obter_broker
+from routes_notificacoes import contar_nao_lidas
+
+bp = Blueprint("eventos", __name__)
+
+
+def _token_da_requisicao():
+    """(token, escopo): o de login no cabeçalho ou o de eventos na query string.
+
+    EventSource não envia cabeçalhos; a query string só aceita o token curto
+    de `/token`, para o token de login não ficar em logs e no histórico.
+    """
+    auth_header = request.headers.get("Authorization") or ""
+    if auth_header.startswith("Bearer "):
+        return auth_header.split(" ")[1], None
+    return request.args.get("token"), ESCOPO_EVENTOS
+
+
+@bp.post("/token")
+@login_required
+def token_eventos():
+    """Token para abrir o stream, válido por EVENTOS_TOKEN_SEGUNDOS."""
+    segundos = current_app.config["EVENTOS_TOKEN_SEGUNDOS"]
+    return jsonify({"token": gerar_token_eventos(g.usuario_id, segundos), "expiraEm": segundos})
+
+
+@bp.get("/stream")
+def stream_eventos():
+    """Stream SSE com notificações novas, contador de não lidas e mudanças de status das OS.
+
+    Autenticação: token de login no cabeçalho ou `?token=` obtido em `/token`.
+
+    Eventos enviados:
+    - `contador`: {"nao_lidas": n}, na conexão e sempre que o número pode ter mudado;
+    - `notificacao_nova`: {"tipo", "quantidade"[, "titulo"]};
+    - `os_status`: {"ordens": [{"id", "status", "statusAnterior"}]} (status None = OS removida).
+
+    Cada conexão ocupa uma thread do servidor enquanto estiver aberta.
+    """
+    token, escopo = _token_da_requisicao()
+    if not token:
+        return jsonify({
+            "erro": "Token de autenticação ausente",
+            "mensagem": "Acesso negado. Token Bearer necessário."
+        }), 401
+    try:
+        usuario_id = verificar_token_jwt(token, escopo)["user_id"]
+    except jwt.InvalidTokenError as e:
+        return jsonify({"erro": "Token inválido", "mensagem": str(e)}), 401
+
+    broker = obter_broker()
+    if broker is None:
+        return jsonify({"erro": "Eventos em tempo real indisponíveis"}), 503
+
+    heartbeat = current_app.config["EVENTOS_HEARTBEAT_SEGUNDOS"]
+
+    def evento_contador():
+        nao_lidas = contar_nao_lidas(usuario_id)
+        db.session.close()  # não segura conexão entre um evento e outro
+        return formatar_sse("contador", {"nao_lidas": nao_lidas})
+
+    def gerar():
+        assinatura = broker.assinar()
+        try:
+            yield "retry: 5000\n\n"
+            yield evento_contador()
+            while True:
+                evento = assinatura.proximo(timeout=heartbeat)
+                if evento is None:
+                    yield ": ping\n\n"
+                    continue
+
+                tipo, dados = evento
+                if tipo == EVENTO_AUTOCOMPLETE:
+                    continue  # uso interno entre processos
+                if tipo == "notificacoes_lidas":
+                    # Leitura feita pelo mesmo usuário em outra aba
+                    if dados.get("usuarioId") == usuario_id:
+                        yield evento_contador()
+                    continue
+
+                yield formatar_sse(tipo, dados)
+                if tipo == "notificacao_nova":
+                    yield evento_contador()
+        finally:
+            broker.cancelar(assinatura)
+
+    db.session.close()
+    return Response(
+        stream_with_context(gerar()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,130 @@
+import csv
+import io
+import zlib
+from datetime import date, datetime
+
+from flask import Blueprint, abort, current_app, request, Response, stream_with_context
+
+from auth_utils import login_required
+from models import Cliente, OrdemServico, ProdutoEstoque
+from routes_clientes import cliente_to_dict, consultar_listagem_clientes, filtrar_listagem_clientes
+from routes_estoque import consultar_listagem_produtos, filtrar_listagem_produtos, produto_to_dict
+from routes_os import consultar_listagem_os, filtrar_listagem_os, os_linha_to_dict
+
+bp = Blueprint("export", __name__)
+
+# Linhas lidas do banco por vez e linhas por bloco enviado ao cliente
+LINHAS_POR_LOTE = 1000
+
+# entidade -> (consulta, filtros, serializador, coluna de ordenação)
+ENTIDADES = {
+    "os": (consultar_listagem_os, filtrar_listagem_os, os_linha_to_dict, OrdemServico.id),
+    "clientes": (
+        consultar_listagem_clientes, filtrar_listagem_clientes, cliente_to_dict, Cliente.id
+    ),
+    "estoque": (
+        consultar_listagem_produtos, filtrar_listagem_produtos, produto_to_dict, ProdutoEstoque.id
+    ),
+}
+
+FORMATOS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def _gerar_csv(linhas, serializar):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    cabecalho = None
+    pendentes = 0
+
+    for linha in linhas:
+        dados = serializar(linha)
+        if cabecalho is None:
+            cabecalho = list(dados.keys())
+            escritor.writerow(cabecalho)
+        escritor.writerow([_valor_csv(dados.get(campo)) for campo in cabecalho])
+
+        pendentes += 1
+        if pendentes >= LINHAS_POR_LOTE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pendentes = 0
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _gerar_ndjson(linhas, serializar):
+    dumps = current_app.json.dumps
+    bloco = []
+    for linha in linhas:
+        bloco.append(dumps(serializar(linha)))
+        if len(bloco) >= LINHAS_POR_LOTE:
+            yield "\n".join(bloco) + "\n"
+            bloco = []
+    if bloco:
+        yield "\n".join(bloco) + "\n"
+
+
+def _compactar_gzip(partes):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for parte in partes:
+        dados = compressor.compress(parte.encode("utf-8"))
+        if dados:
+            yield dados
+    yield compressor.flush()
+
+
+@bp.get("/<entidade>")
+@login_required
+def exportar(entidade: str):
+    """Exporta uma entidade completa em CSV ou NDJSON, em streaming.
+
+    Aceita os mesmos filtros da listagem correspondente. As linhas são lidas
+    do banco em lotes (cursor do lado do servidor quando o driver suporta) e
+    enviadas em blocos, sem montar o arquivo inteiro em memória. Com
+    `gzip=true` a saída é compactada durante o envio e o download é um
+    arquivo .gz (application/gzip, sem Content-Encoding, para que o cliente
+    não descompacte o conteúdo e grave texto com a extensão .gz).
+    """
+    if entidade not in ENTIDADES:
+        abort(404)
+
+    formato = request.args.get("formato", "csv")
+    if formato not in FORMATOS:
+        abort(400, description="formato deve ser csv ou ndjson")
+
+    consultar, filtrar, serializar, coluna_id = ENTIDADES[entidade]
+    linhas = (
+        filtrar(consultar())
+        .order_by(coluna_id.asc())
+        .execution_options(stream_results=True)
+        .yield_per(LINHAS_POR_LOTE)
+    )
+
+    gerar = _gerar_csv if formato == "csv" else _gerar_ndjson
+    partes = gerar(linhas, serializar)
+
+    nome_arquivo = f"{entidade}_{datetime.now():%Y%m%d_%H%M%S}.{formato}"
+    mimetype = FORMATOS[formato]
+    if request.args.get("gzip") == "true":
+        partes = _compactar_gzip(partes)
+        nome_arquivo += ".gz"
+        mimetype = "application/gzip"
+
+    return Response(
+        stream_with_context(partes),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'},
+    )
@@ -1,39 +1,121 @@
-from flask import Blueprint, request, jsonify, g
-from sqlalchemy import desc
+import time
+from datetime import datetime
+
+from flask import Blueprint, abort, request, jsonify, g
+from sqlalchemy import and_, case, cast, func, insert, literal, or_, select
+from werkzeug.exceptions import HTTPException
 
 from extensions import db
-from models import Notificacao, Usuario, OrdemServico, ProdutoEstoque, Cliente
+from models import (
+    REFERENCIAS_NOTIFICACAO,
+    Cliente,
+    Notificacao,
+    NotificacaoArquivo,
+    NotificacaoLeitura,
+    OrdemServico,
+    ProdutoEstoque,
+    Usuario,
+)
 from auth_utils import login_required
+from contadores_notificacoes import ajustar_nao_lidas, obter_nao_lidas, zerar_nao_lidas
+from paginacao import aplicar_filtro_periodo, obter_lista, paginar
+from pubsub import publicar_apos_commit
+from sql_utils import insert_ignorando_duplicadas, upsert
 
 bp = Blueprint('notificacoes', __name__)
 
+MAXIMO_NOTIFICACOES_POR_LOTE = 1000
+
+
+def notificacao_to_dict(notif: Notificacao, lida: bool = False) -> dict:
+    return {
+        "id": notif.id,
+        "tipo": notif.tipo,
+        "titulo": notif.titulo,
+        "mensagem": notif.mensagem,
+        "dados_referencia": notif.dados_referencia,
+        "lida": bool(lida),
+        "prioridade": notif.prioridade,
+        "criado_em": notif.criado_em.isoformat() if notif.criado_em else None
+    }
+
+
+# 1 se o usuário já leu a notificação (usada na ordenação: não lidas primeiro)
+_LIDA = case((NotificacaoLeitura.lida_em.isnot(None), 1), else_=0)
+
+
+def consultar_visiveis(usuario_id, *colunas):
+    """Notificações visíveis para o usuário, com o estado de leitura dele.
+
+    Visíveis são as criadas a partir do cadastro do usuário que ele não
+    excluiu; a leitura entra por outer join (sem linha = não lida).
+    """
+    cadastro = db.session.query(Usuario.criado_em).filter_by(id=usuario_id).scalar()
+    query = (
+        db.session.query(*colunas)
+        .select_from(Notificacao)
+        .outerjoin(
+            NotificacaoLeitura,
+            and_(
+                NotificacaoLeitura.notificacao_id == Notificacao.id,
+                NotificacaoLeitura.usuario_id == usuario_id,
+            ),
+        )
+        .filter(NotificacaoLeitura.excluida_em.is_(None))
+    )
+    if cadastro:
+        query = query.filter(Notificacao.criado_em >= cadastro)
+    return query
+
+
+def contar_nao_lidas(usuario_id) -> int:
+    return obter_nao_lidas(usuario_id)
+
+
+def _gravar_leitura(usuario_id, notificacao_id, **valores):
+    """Cria ou atualiza o estado da notificação para o usuário (upsert)."""
+    db.session.execute(upsert(
+        NotificacaoLeitura.__table__,
+        dict(usuario_id=usuario_id, notificacao_id=notificacao_id, **valores),
+        ["usuario_id", "notificacao_id"],
+        valores,
+    ))
+
 
 @bp.get('/api/notificacoes')
 @login_required
 def listar_notificacoes():
-    """Lista notificações do usuário logado."""
+    """Lista notificações do usuário logado, paginadas por cursor."""
     try:
-        # Busca notificações não lidas primeiro, depois as lidas
-        notificacoes = Notificacao.query.filter_by(usuario_id=g.usuario_id)\
-            .order_by(Notificacao.lida.asc(), desc(Notificacao.criado_em))\
-            .limit(50)\
-            .all()
-
-        resultado = []
-        for notif in notificacoes:
-            resultado.append({
-                "id": notif.id,
-                "tipo": notif.tipo,
-                "titulo": notif.titulo,
-                "mensagem": notif.mensagem,
-                "dados_referencia": notif.dados_referencia,
-                "lida": notif.lida,
-                "prioridade": notif.prioridade,
-                "criado_em": notif.criado_em.isoformat() if notif.criado_em else None
-            })
-
-        return jsonify(resultado)
-
+        query = consultar_visiveis(g.usuario_id, Notificacao, _LIDA.label("lida"))
+
+        tipos = obter_lista("tipo")
+        if tipos:
+            query = query.filter(Notificacao.tipo.in_(tipos))
+        if request.args.get("lida") == "true":
+            query = query.filter(NotificacaoLeitura.lida_em.isnot(None))
+        elif request.args.get("lida") == "false":
+            query = query.filter(NotificacaoLeitura.lida_em.is_(None))
+        query = aplicar_filtro_periodo(query, Notificacao.criado_em)
+
+        # Não lidas primeiro, depois as lidas, das mais recentes para as mais antigas
+        return jsonify(
+            paginar(
+                query,
+                [
+                    (_LIDA, False),
+                    (Notificacao.criado_em, True),
+                    (Notificacao.id, True),
+                ],
+                lambda linha: notificacao_to_dict(linha.Notificacao, linha.lida),
+                chave_linha=lambda linha: [
+                    linha.lida, linha.Notificacao.criado_em, linha.Notificacao.id
+                ],
+            )
+        )
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Erro ao listar notificações: {e}")
         return jsonify({"erro": "Erro interno do servidor"}), 500
@@ -44,15 +126,17 @@ def listar_notificacoes():
 def marcar_como_lida(notificacao_id):
     """Marca uma notificação como lida."""
     try:
-        notificacao = Notificacao.query.filter_by(
-            id=notificacao_id,
-            usuario_id=g.usuario_id
-        ).first()
+        visivel = consultar_visiveis(
+            g.usuario_id, Notificacao.id, NotificacaoLeitura.lida_em
+        ).filter(Notificacao.id == notificacao_id).first()
 
-        if not notificacao:
+        if not visivel:
             return jsonify({"erro": "Notificação não encontrada"}), 404
 
-        notificacao.lida = True
+        if visivel.lida_em is None:
+            _gravar_leitura(g.usuario_id, notificacao_id, lida_em=datetime.now())
+            ajustar_nao_lidas(-1, g.usuario_id)
+        publicar_apos_commit("notificacoes_lidas", {"usuarioId": g.usuario_id})
         db.session.commit()
 
         return jsonify({"sucesso": True})
@@ -63,16 +147,124 @@ def marcar_como_lida(notificacao_id):
         return jsonify({"erro": "Erro interno do servidor"}), 500
 
 
+def _gravar_leituras_em_lote(usuario_id, condicoes, **valores) -> int:
+    """Grava `valores` no estado das notificações visíveis que atendem `condicoes`.
+
+    São dois comandos, independente da quantidade: um UPDATE das leituras já
+    existentes e um INSERT ... SELECT para as notificações que o usuário ainda
+    não tinha aberto. Ajusta o contador de não lidas e retorna quantas
+    notificações foram alteradas.
+    """
+    marcando_lida = "lida_em" in valores
+    nao_lidas = consultar_visiveis(usuario_id, func.count(Notificacao.id)).filter(
+        *condicoes, NotificacaoLeitura.lida_em.is_(None)
+    ).scalar()
+
+    existentes = NotificacaoLeitura.query.filter(
+        NotificacaoLeitura.usuario_id == usuario_id,
+        NotificacaoLeitura.excluida_em.is_(None),
+        NotificacaoLeitura.notificacao_id.in_(select(Notificacao.id).where(*condicoes)),
+    )
+    if marcando_lida:
+        existentes = existentes.filter(NotificacaoLeitura.lida_em.is_(None))
+    alteradas = existentes.update(valores, synchronize_session=False)
+
+    colunas = list(valores)
+    sem_leitura = consultar_visiveis(
+        usuario_id, literal(usuario_id), Notificacao.id, *(literal(v) for v in valores.values())
+    ).filter(NotificacaoLeitura.usuario_id.is_(None), *condicoes)
+    tabela = NotificacaoLeitura.__table__
+    alteradas += db.session.execute(
+        insert(tabela).from_select(
+            [tabela.c.usuario_id, tabela.c.notificacao_id] + [tabela.c[c] for c in colunas],
+            sem_leitura.statement,
+        )
+    ).rowcount
+
+    if nao_lidas:
+        ajustar_nao_lidas(-nao_lidas, usuario_id)
+    return alteradas
+
+
+def _condicoes_do_lote(data: dict) -> list:
+    """Seleção de uma operação em lote: lista de ids e/ou filtro por tipo e idade.
+
+    Body: {"ids": [...]} e/ou {"tipos": [...], "criadasAntesDe": "<ISO 8601>"}.
+    """
+    condicoes = []
+    if data.get("ids") is not None:
+        try:
+            ids = list(dict.fromkeys(int(i) for i in data["ids"]))
+        except (TypeError, ValueError):
+            abort(400, description="ids deve ser uma lista de números inteiros")
+        if not ids:
+            abort(400, description="Informe ao menos um id")
+        if len(ids) > MAXIMO_NOTIFICACOES_POR_LOTE:
+            abort(400, description=f"Máximo de {MAXIMO_NOTIFICACOES_POR_LOTE} ids por requisição")
+        condicoes.append(Notificacao.id.in_(ids))
+
+    tipos = data.get("tipos")
+    if tipos:
+        if isinstance(tipos, str):
+            tipos = [tipos]
+        condicoes.append(Notificacao.tipo.in_(tipos))
+
+    if data.get("criadasAntesDe"):
+        try:
+            condicoes.append(Notificacao.criado_em < datetime.fromisoformat(data["criadasAntesDe"]))
+        except (TypeError, ValueError):
+            abort(400, description="criadasAntesDe deve estar no formato ISO 8601")
+
+    if not condicoes:
+        abort(400, description="Informe ids, tipos ou criadasAntesDe")
+    return condicoes
+
+
+@bp.put('/api/notificacoes/lote/lida')
+@login_required
+def marcar_lote_como_lida():
+    """Marca como lidas as notificações selecionadas por ids e/ou filtro."""
+    condicoes = _condicoes_do_lote(request.get_json() or {})
+    try:
+        alteradas = _gravar_leituras_em_lote(g.usuario_id, condicoes, lida_em=datetime.now())
+        publicar_apos_commit("notificacoes_lidas", {"usuarioId": g.usuario_id})
+        db.session.commit()
+
+        return jsonify({"sucesso": True, "alteradas": alteradas})
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao marcar notificações como lidas: {e}")
+        return jsonify({"erro": "Erro interno do servidor"}), 500
+
+
+@bp.post('/api/notificacoes/lote/excluir')
+@login_required
+def excluir_lote():
+    """Exclui para o usuário logado as notificações selecionadas por ids e/ou filtro."""
+    condicoes = _condicoes_do_lote(request.get_json() or {})
+    try:
+        alteradas = _gravar_leituras_em_lote(g.usuario_id, condicoes, excluida_em=datetime.now())
+        publicar_apos_commit("notificacoes_lidas", {"usuarioId": g.usuario_id})
+        db.session.commit()
+
+        return jsonify({"sucesso": True, "alteradas": alteradas})
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao excluir notificações: {e}")
+        return jsonify({"erro": "Erro interno do servidor"}), 500
+
+
 @bp.put('/api/notificacoes/marcar-todas-lidas')
 @login_required
 def marcar_todas_lidas():
     """Marca todas as notificações do usuário como lidas."""
     try:
-        Notificacao.query.filter_by(
-            usuario_id=g.usuario_id,
-            lida=False
-        ).update({"lida": True})
+        _gravar_leituras_em_lote(g.usuario_id, [], lida_em=datetime.now())
+        zerar_nao_lidas(g.usuario_id)
 
+        publicar_apos_commit("notificacoes_lidas", {"usuarioId": g.usuario_id})
         db.session.commit()
 
         return jsonify({"sucesso": True})
@@ -86,17 +278,19 @@ def marcar_todas_lidas():
 @bp.delete('/api/notificacoes/<int:notificacao_id>')
 @login_required
 def excluir_notificacao(notificacao_id):
-    """Exclui uma notificação."""
+    """Exclui a notificação para o usuário logado (os demais continuam vendo)."""
     try:
-        notificacao = Notificacao.query.filter_by(
-            id=notificacao_id,
-            usuario_id=g.usuario_id
-        ).first()
+        visivel = consultar_visiveis(
+            g.usuario_id, Notificacao.id, NotificacaoLeitura.lida_em
+        ).filter(Notificacao.id == notificacao_id).first()
 
-        if not notificacao:
+        if not visivel:
             return jsonify({"erro": "Notificação não encontrada"}), 404
 
-        db.session.delete(notificacao)
+        _gravar_leitura(g.usuario_id, notificacao_id, excluida_em=datetime.now())
+        if visivel.lida_em is None:
+            ajustar_nao_lidas(-1, g.usuario_id)
+        publicar_apos_commit("notificacoes_lidas", {"usuarioId": g.usuario_id})
         db.session.commit()
 
         return jsonify({"sucesso": True})
@@ -112,12 +306,7 @@ def excluir_notificacao(notificacao_id):
 def contador_notificacoes():
     """Retorna o número de notificações não lidas."""
     try:
-        contador = Notificacao.query.filter_by(
-            usuario_id=g.usuario_id,
-            lida=False
-        ).count()
-
-        return jsonify({"nao_lidas": contador})
+        return jsonify({"nao_lidas": contar_nao_lidas(g.usuario_id)})
 
     except Exception as e:
         print(f"Erro ao contar notificações: {e}")
@@ -128,130 +317,221 @@ def contador_notificacoes():
 # FUNÇÕES PARA CRIAR NOTIFICAÇÕES
 # ================================
 
-def criar_notificacao_os_atrasada(os, usuario_id):
-    """Cria notificação para OS atrasada."""
-    titulo = f"OS {os.numero_os} - Prazo Vencido"
-    mensagem = f"Cliente {os.cliente.nome} aguardando retorno. Prazo estimado excedido."
-
-    notificacao = Notificacao(
-        tipo="os_atrasada",
-        titulo=titulo,
-        mensagem=mensagem,
-        dados_referencia={"os_id": os.id, "cliente_id": os.cliente_id},
-        prioridade="alta",
-        usuario_id=usuario_id
+def _inserir_notificacao(tipo, titulo, mensagem, dados_referencia, prioridade):
+    ref_tipo, chave = REFERENCIAS_NOTIFICACAO[tipo]
+    agora = datetime.now()
+    resultado = db.session.execute(
+        insert_ignorando_duplicadas(Notificacao.__table__),
+        dict(
+            tipo=tipo,
+            titulo=titulo,
+            mensagem=mensagem,
+            dados_referencia=dados_referencia,
+            ref_tipo=ref_tipo,
+            ref_id=dados_referencia[chave],
+            prioridade=prioridade,
+            criado_em=agora,
+            atualizado_em=agora,
+        ),
+    )
+    if resultado.rowcount:
+        ajustar_nao_lidas(resultado.rowcount)
+        publicar_apos_commit(
+            "notificacao_nova", {"tipo": tipo, "titulo": titulo, "quantidade": 1}
+        )
+
+
+def criar_notificacao_os_pronta(os):
+    """Cria notificação para OS pronta."""
+    _inserir_notificacao(
+        "os_pronta",
+        f"OS {os.numero_os} - Pronta para Retirada",
+        f"Aparelho de {os.cliente.nome} está pronto. Cliente deve ser contactado.",
+        {"os_id": os.id, "cliente_id": os.cliente_id},
+        "normal",
     )
-    db.session.add(notificacao)
 
 
-def criar_notificacao_estoque_critico(produto, usuario_id):
-    """Cria notificação para estoque crítico."""
-    titulo = f"{produto.nome} - Estoque Crítico"
-    mensagem = f"Apenas {produto.quantidade} unidades disponíveis (mínimo: {produto.estoque_minimo})."
+def criar_notificacoes_os_pronta_em_massa(os_ids):
+    """Cria, com um único INSERT, as notificações de OS pronta das OS informadas.
 
-    notificacao = Notificacao(
-        tipo="estoque_critico",
-        titulo=titulo,
-        mensagem=mensagem,
-        dados_referencia={"produto_id": produto.id},
-        prioridade="alta",
-        usuario_id=usuario_id
+    Retorna a quantidade de notificações criadas.
+    """
+    if not os_ids:
+        return 0
+    criadas = _inserir_os_pronta(datetime.now(), [OrdemServico.id.in_(os_ids)])
+    if criadas:
+        publicar_apos_commit("notificacao_nova", {"tipo": "os_pronta", "quantidade": criadas})
+    return criadas
+
+
+def criar_notificacao_cliente_novo(cliente):
+    """Cria notificação para novo cliente."""
+    _inserir_notificacao(
+        "cliente_novo",
+        "Novo Cliente Cadastrado",
+        f"{cliente.nome} foi adicionado à base de dados.",
+        {"cliente_id": cliente.id},
+        "baixa",
     )
-    db.session.add(notificacao)
 
 
-def criar_notificacao_os_pronta(os, usuario_id):
-    """Cria notificação para OS pronta."""
-    titulo = f"OS {os.numero_os} - Pronta para Retirada"
-    mensagem = f"Aparelho de {os.cliente.nome} está pronto. Cliente deve ser contactado."
-
-    notificacao = Notificacao(
-        tipo="os_pronta",
-        titulo=titulo,
-        mensagem=mensagem,
-        dados_referencia={"os_id": os.id, "cliente_id": os.cliente_id},
-        prioridade="normal",
-        usuario_id=usuario_id
+def criar_notificacao_clientes_importados(resumo: dict):
+    """Cria uma notificação com o resumo de uma importação de clientes."""
+    _inserir_notificacao(
+        "clientes_importados",
+        "Importação de Clientes Concluída",
+        f"{resumo['novos']} clientes novos e {resumo['atualizados']} atualizados; "
+        f"{resumo['com_erro']} linhas com erro.",
+        {
+            "importacao_id": resumo["importacao_id"],
+            "novos": resumo["novos"],
+            "atualizados": resumo["atualizados"],
+            "com_erro": resumo["com_erro"],
+        },
+        "normal",
     )
-    db.session.add(notificacao)
 
 
-def criar_notificacao_cliente_novo(cliente, usuario_id):
-    """Cria notificação para novo cliente."""
-    titulo = f"Novo Cliente Cadastrado"
-    mensagem = f"{cliente.nome} foi adicionado à base de dados."
-
-    notificacao = Notificacao(
-        tipo="cliente_novo",
-        titulo=titulo,
-        mensagem=mensagem,
-        dados_referencia={"cliente_id": cliente.id},
-        prioridade="baixa",
-        usuario_id=usuario_id
+# ================================
+# VERIFICAÇÃO AUTOMÁTICA
+# ================================
+
+def _ja_notificado(tipo, ref_tipo, ref_id):
+    """Condição NOT EXISTS: já existe notificação deste tipo para a referência.
+
+    Inclui as arquivadas pela retenção, para que não voltem a ser criadas.
+    """
+    condicoes = []
+    for tabela in (Notificacao, NotificacaoArquivo):
+        condicoes.append(~(
+            select(tabela.id)
+            .where(tabela.tipo == tipo, tabela.ref_tipo == ref_tipo, tabela.ref_id == ref_id)
+            .exists()
+        ))
+    return and_(*condicoes)
+
+
+def _inserir_notificacoes(tipo, prioridade, agora, titulo, mensagem, dados, origem, filtros, ref_id):
+    """Cria com um único INSERT ... SELECT as notificações que faltam.
+
+    Os candidatos são as linhas de `origem` que atendem `filtros`, menos as
+    que já têm notificação. Retorna a quantidade de linhas inseridas.
+    """
+    ref_tipo = REFERENCIAS_NOTIFICACAO[tipo][0]
+    candidatos = (
+        select(
+            literal(tipo),
+            titulo,
+            mensagem,
+            dados,
+            literal(ref_tipo),
+            ref_id,
+            literal(prioridade),
+            literal(agora),
+            literal(agora),
+        )
+        .select_from(origem)
+        .where(*filtros, _ja_notificado(tipo, ref_tipo, ref_id))
+    )
+    if origem is OrdemServico:
+        candidatos = candidatos.join(Cliente, Cliente.id == OrdemServico.cliente_id)
+
+    tabela = Notificacao.__table__
+    resultado = db.session.execute(
+        insert_ignorando_duplicadas(Notificacao.__table__).from_select(
+            [
+                tabela.c.tipo, tabela.c.titulo, tabela.c.mensagem, tabela.c.dados_referencia,
+                tabela.c.ref_tipo, tabela.c.ref_id, tabela.c.prioridade,
+                tabela.c.criado_em, tabela.c.atualizado_em,
+            ],
+            candidatos,
+        )
     )
-    db.session.add(notificacao)
+    ajustar_nao_lidas(resultado.rowcount)
+    return resultado.rowcount
 
 
-def verificar_e_criar_notificacoes():
-    """Verifica condições do sistema e cria notificações automaticamente."""
-    try:
-        # Busca todos os usuários ativos
-        usuarios = Usuario.query.filter_by(ativo=True).all()
-
-        for usuario in usuarios:
-            # Verifica OS atrasadas
-            from datetime import datetime, timedelta
-            hoje = datetime.utcnow()
-
-            os_atrasadas = OrdemServico.query.filter(
-                OrdemServico.status.in_(['aguardando', 'em_reparo']),
-                OrdemServico.criado_em + timedelta(days=OrdemServico.prazo_estimado) < hoje
-            ).all()
-
-            for os in os_atrasadas:
-                # Verifica se já existe notificação para esta OS
-                existente = Notificacao.query.filter_by(
-                    tipo="os_atrasada",
-                    usuario_id=usuario.id,
-                    dados_referencia={"os_id": os.id, "cliente_id": os.cliente_id}
-                ).first()
-
-                if not existente:
-                    criar_notificacao_os_atrasada(os, usuario.id)
-
-            # Verifica estoque crítico
-            produtos_criticos = ProdutoEstoque.query.filter(
-                ProdutoEstoque.quantidade <= ProdutoEstoque.estoque_minimo
-            ).all()
-
-            for produto in produtos_criticos:
-                # Verifica se já existe notificação para este produto
-                existente = Notificacao.query.filter_by(
-                    tipo="estoque_critico",
-                    usuario_id=usuario.id,
-                    dados_referencia={"produto_id": produto.id}
-                ).first()
-
-                if not existente:
-                    criar_notificacao_estoque_critico(produto, usuario.id)
-
-            # Verifica OS prontas
-            os_prontas = OrdemServico.query.filter_by(status="pronto").all()
-
-            for os in os_prontas:
-                # Verifica se já existe notificação para esta OS
-                existente = Notificacao.query.filter_by(
-                    tipo="os_pronta",
-                    usuario_id=usuario.id,
-                    dados_referencia={"os_id": os.id, "cliente_id": os.cliente_id}
-                ).first()
-
-                if not existente:
-                    criar_notificacao_os_pronta(os, usuario.id)
+def _dados_os():
+    return func.json_object("os_id", OrdemServico.id, "cliente_id", OrdemServico.cliente_id)
 
-        db.session.commit()
-        print("✅ Verificação de notificações concluída")
 
-    except Exception as e:
+def _inserir_os_pronta(agora, filtros):
+    return _inserir_notificacoes(
+        "os_pronta", "normal", agora,
+        "OS " + OrdemServico.numero_os + " - Pronta para Retirada",
+        "Aparelho de " + Cliente.nome + " está pronto. Cliente deve ser contactado.",
+        _dados_os(),
+        OrdemServico,
+        [OrdemServico.status == "pronto", OrdemServico.excluido_em.is_(None), *filtros],
+        OrdemServico.id,
+    )
+
+
+def verificar_e_criar_notificacoes(desde=None):
+    """Verifica condições do sistema e cria notificações automaticamente.
+
+    Cada tipo de notificação é resolvido com um único INSERT ... SELECT, todos
+    na mesma transação. Com `desde`, só são analisadas as linhas alteradas a
+    partir dessa data (e, para atraso, as OS cujo prazo venceu desde então).
+    Retorna a quantidade criada por tipo e a duração.
+    """
+    inicio = time.perf_counter()
+    agora = datetime.now()
+
+    filtros_os, filtros_atraso, filtros_estoque = [], [], []
+    if desde is not None:
+        filtros_os = [OrdemServico.atualizado_em > desde]
+        filtros_atraso = [
+            or_(OrdemServico.atualizado_em > desde, OrdemServico.prazo_limite >= desde)
+        ]
+        filtros_estoque = [ProdutoEstoque.atualizado_em > desde]
+
+    try:
+        criadas = {
+            "os_atrasada": _inserir_notificacoes(
+                "os_atrasada", "alta", agora,
+                "OS " + OrdemServico.numero_os + " - Prazo Vencido",
+                "Cliente " + Cliente.nome + " aguardando retorno. Prazo estimado excedido.",
+                _dados_os(),
+                OrdemServico,
+                [
+                    OrdemServico.status.in_(["aguardando", "em_reparo"]),
+                    OrdemServico.prazo_limite < agora,
+                    OrdemServico.excluido_em.is_(None),
+                    *filtros_atraso,
+                ],
+                OrdemServico.id,
+            ),
+            "estoque_critico": _inserir_notificacoes(
+                "estoque_critico", "alta", agora,
+                ProdutoEstoque.nome + " - Estoque Crítico",
+                "Apenas " + cast(ProdutoEstoque.quantidade, db.String)
+                + " unidades disponíveis (mínimo: "
+                + cast(ProdutoEstoque.estoque_minimo, db.String) + ").",
+                func.json_object("produto_id", ProdutoEstoque.id),
+                ProdutoEstoque,
+                [ProdutoEstoque.quantidade <= ProdutoEstoque.estoque_minimo, *filtros_estoque],
+                ProdutoEstoque.id,
+            ),
+            "os_pronta": _inserir_os_pronta(agora, filtros_os),
+        }
+        if any(criadas.values()):
+            publicar_apos_commit(
+                "notificacao_nova", {"tipo": None, "quantidade": sum(criadas.values())}
+            )
+        db.session.commit()
+    except Exception:
         db.session.rollback()
-        print(f"❌ Erro ao verificar notificações: {e}")
+        raise
+
+    estatisticas = {
+        "criadas": criadas,
+        "total": sum(criadas.values()),
+        "duracao_ms": round((time.perf_counter() - inicio) * 1000, 1),
+    }
+    print(
+        f"✅ Verificação de notificações concluída: {estatisticas['total']} criadas "
+        f"em {estatisticas['duracao_ms']} ms {criadas}"
+    )
+    return estatisticas
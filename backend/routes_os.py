@@ -1,22 +1,84 @@
+import hashlib
+import json
 from datetime import datetime, timedelta
 
-from flask import Blueprint, abort, jsonify, request
+from flask import Blueprint, abort, current_app, g, jsonify, request
+from sqlalchemy import insert, text, update
 
 from extensions import db
-from models import Cliente, OrdemServico, Usuario
+from models import Cliente, EventoOS, LoteDiagnostico, OrdemServico
 from auth_utils import login_required
-from routes_notificacoes import criar_notificacao_os_pronta
-from ai_utils import gerar_pre_diagnostico, gerar_resumo
+from cache_utils import CacheTTL
+from limitador import LimitadorTokenBucket, limitar_por_ip
+from busca_os import buscar_ids_os
+from contadores_notificacoes import reconciliar_contadores
+from exclusao import excluir_ordens_servico, ler_pedido_exclusao
+from contadores_clientes import ajustar_contadores_cliente, contribuicao_os
+from numeracao_os import numero_reservado, reservar_numeros_os
+from pubsub import publicar_apos_commit
+from paginacao import (
+    aplicar_filtro_periodo,
+    obter_data,
+    obter_limite,
+    obter_lista,
+    paginar,
+)
+from routes_notificacoes import (
+    criar_notificacao_os_pronta,
+    criar_notificacoes_os_pronta_em_massa,
+)
+from ai_utils import gerar_pre_diagnostico
+from ai_cache import aquecer_cache, estatisticas as estatisticas_cache_ia
+from enriquecimento_ia import (
+    IA_PENDENTE,
+    agendar_enriquecimento,
+    iniciar_lote,
+    lote_to_dict,
+    verificar_lote_interrompido,
+)
 
 bp = Blueprint("os", __name__)
 
-
-def os_to_dict(os_obj: OrdemServico, incluir_cliente: bool = True) -> dict:
+STATUS_OS = ("aguardando", "em_reparo", "pronto", "entregue", "cancelado")
+MAXIMO_OS_POR_ALTERACAO_EM_MASSA = 500
+
+
+# Colunas lidas nas listagens: linhas leves (Row) em vez de objetos do ORM,
+# com o nome do cliente vindo de um único JOIN.
+COLUNAS_LISTAGEM_OS = (
+    OrdemServico.id,
+    OrdemServico.numero_os,
+    OrdemServico.cliente_id,
+    OrdemServico.tipo_aparelho,
+    OrdemServico.marca_modelo,
+    OrdemServico.imei_serial,
+    OrdemServico.cor_aparelho,
+    OrdemServico.problema_relatado,
+    OrdemServico.diagnostico_tecnico,
+    OrdemServico.prazo_estimado,
+    OrdemServico.prazo_limite,
+    OrdemServico.valor_orcamento,
+    OrdemServico.status,
+    OrdemServico.prioridade,
+    OrdemServico.observacoes,
+    OrdemServico.criado_em,
+    OrdemServico.atualizado_em,
+    OrdemServico.ia_status,
+    Cliente.nome.label("cliente_nome"),
+)
+
+
+def _os_campos_to_dict(os_obj) -> dict:
+    """Monta o dicionário da OS a partir de um objeto ou de uma linha projetada.
+
+    Datas e valores decimais são serializados pelo provider JSON da aplicação.
+    """
     data_criacao = os_obj.criado_em or datetime.utcnow()
-    prazo_estimado = os_obj.prazo_estimado or 3
-    prazo_limite = data_criacao + timedelta(days=prazo_estimado)
+    prazo_limite = os_obj.prazo_limite or (
+        data_criacao + timedelta(days=os_obj.prazo_estimado or 3)
+    )
 
-    base = {
+    return {
         "id": os_obj.id,
         "numeroOS": os_obj.numero_os,
         "clienteId": os_obj.cliente_id,
@@ -31,41 +93,108 @@ def os_to_dict(os_obj: OrdemServico, incluir_cliente: bool = True) -> dict:
         "status": os_obj.status,
         "prioridade": os_obj.prioridade,
         "observacoes": os_obj.observacoes,
-        "dataCriacao": data_criacao.isoformat(),
-        "dataAtualizacao": (os_obj.atualizado_em or data_criacao).isoformat(),
-        "prazoLimite": prazo_limite.isoformat(),
+        "dataCriacao": data_criacao,
+        "dataAtualizacao": os_obj.atualizado_em or data_criacao,
+        "prazoLimite": prazo_limite,
+        "iaStatus": os_obj.ia_status,
     }
 
+
+def os_to_dict(os_obj: OrdemServico, incluir_cliente: bool = True) -> dict:
+    base = _os_campos_to_dict(os_obj)
+
     if incluir_cliente and os_obj.cliente:
         base["clienteNome"] = os_obj.cliente.nome
 
     return base
 
 
+def os_linha_to_dict(linha) -> dict:
+    """Versão de `os_to_dict` para linhas de `COLUNAS_LISTAGEM_OS`."""
+    base = _os_campos_to_dict(linha)
+
+    if linha.cliente_nome is not None:
+        base["clienteNome"] = linha.cliente_nome
+
+    return base
+
+
+def consultar_listagem_os():
+    return db.session.query(*COLUNAS_LISTAGEM_OS).join(
+        Cliente, Cliente.id == OrdemServico.cliente_id
+    )
+
+
+def registrar_eventos_os(eventos: list):
+    """Insere as transições de status/prioridade na transação atual (um único INSERT).
+
+    Cada evento é um dict com os_id, tipo, valor_anterior e valor_novo. As
+    mudanças de status também são publicadas para os clientes SSE após o commit.
+    """
+    if not eventos:
+        return
+    agora = datetime.now()
+    usuario_id = getattr(g, "usuario_id", None)
+    db.session.execute(
+        insert(EventoOS),
+        [dict(evento, usuario_id=usuario_id, criado_em=agora) for evento in eventos],
+    )
+
+    mudancas = [
+        {"id": e["os_id"], "status": e["valor_novo"], "statusAnterior": e["valor_anterior"]}
+        for e in eventos
+        if e["tipo"] == "status"
+    ]
+    if mudancas:
+        publicar_apos_commit("os_status", {"ordens": mudancas})
+
+
 def gerar_proximo_numero_os() -> str:
-    ultimo = (
-        OrdemServico.query.order_by(OrdemServico.id.desc()).with_entities(
-            OrdemServico.numero_os
-        )
-    ).first()
-    if not ultimo or not ultimo[0]:
-        return "#OS0001"
+    return reservar_numeros_os(1)[0]
 
-    numero = ultimo[0].replace("#", "").replace("OS", "")
-    try:
-        prox = int(numero) + 1
-    except ValueError:
-        prox = 1
-    return f"#OS{prox:04d}"
+
+def filtrar_listagem_os(query):
+    """Aplica os filtros da query string comuns à listagem e à exportação."""
+    status = obter_lista("status")
+    if status:
+        query = query.filter(OrdemServico.status.in_(status))
+    prioridade = obter_lista("prioridade")
+    if prioridade:
+        query = query.filter(OrdemServico.prioridade.in_(prioridade))
+    if request.args.get("clienteId"):
+        query = query.filter(OrdemServico.cliente_id == request.args.get("clienteId", type=int))
+    return aplicar_filtro_periodo(query, OrdemServico.criado_em)
 
 
 @bp.get("/")
 @login_required
 def listar_os():
-    ordens = (
-        OrdemServico.query.order_by(OrdemServico.criado_em.desc()).join(Cliente).all()
+    return jsonify(
+        paginar(
+            filtrar_listagem_os(consultar_listagem_os()),
+            [(OrdemServico.criado_em, True), (OrdemServico.id, True)],
+            os_linha_to_dict,
+        )
     )
-    return jsonify([os_to_dict(o) for o in ordens])
+
+
+@bp.get("/busca")
+@login_required
+def buscar_os():
+    """Busca textual por número, IMEI/serial, modelo, problema, diagnóstico ou cliente.
+
+    Os resultados vêm ordenados por relevância.
+    """
+    consulta = (request.args.get("q") or "").strip()
+    if not consulta:
+        abort(400, description="Parâmetro q é obrigatório")
+
+    ids = buscar_ids_os(consulta, obter_limite())
+    ordens = {
+        linha.id: linha
+        for linha in consultar_listagem_os().filter(OrdemServico.id.in_(ids))
+    } if ids else {}
+    return jsonify({"items": [os_linha_to_dict(ordens[i]) for i in ids if i in ordens]})
 
 
 @bp.post("/")
@@ -87,8 +216,27 @@ def criar_os():
     if not cliente:
         abort(400, description="Cliente não encontrado")
 
+    # Número de um bloco reservado em /numeros/reservar; sem ele, o próximo da sequência
+    numero_os = (data.get("numeroOS") or "").strip()
+    if numero_os:
+        if not numero_reservado(numero_os):
+            abort(400, description="numeroOS não foi reservado pela numeração de OS")
+        ja_usado = (
+            db.session.query(OrdemServico.id)
+            .filter(OrdemServico.numero_os == numero_os)
+            .execution_options(incluir_excluidos=True)
+            .first()
+        )
+        if ja_usado:
+            return jsonify({
+                "erro": "Número de OS já utilizado",
+                "mensagem": f"Já existe uma OS com o número {numero_os}"
+            }), 409
+    else:
+        numero_os = gerar_proximo_numero_os()
+
     os_obj = OrdemServico(
-        numero_os=gerar_proximo_numero_os(),
+        numero_os=numero_os,
         cliente=cliente,
         tipo_aparelho=data["tipoAparelho"],
         marca_modelo=data["marcaModelo"],
@@ -101,24 +249,49 @@ def criar_os():
         status=data.get("status") or "aguardando",
         prioridade=data.get("prioridade") or "normal",
         observacoes=data.get("observacoes"),
+        ia_status=IA_PENDENTE,
     )
 
     db.session.add(os_obj)
+    db.session.flush()
+    registrar_eventos_os([
+        {"os_id": os_obj.id, "tipo": "status", "valor_anterior": None,
+         "valor_novo": os_obj.status},
+        {"os_id": os_obj.id, "tipo": "prioridade", "valor_anterior": None,
+         "valor_novo": os_obj.prioridade},
+    ])
+    db.session.commit()
+
+    # Resumo e pré-diagnóstico com IA são gerados em segundo plano
+    agendar_enriquecimento(os_obj.id)
 
-    # Gerar resumo e pré-diagnóstico com IA
+    return jsonify(os_to_dict(os_obj)), 201
+
+
+@bp.post("/numeros/reservar")
+@login_required
+def reservar_numeros():
+    """Reserva um bloco de números de OS (ex: para importações em massa).
+
+    Cada número reservado é usado enviando `numeroOS` na criação da OS.
+    """
+    data = request.get_json() or {}
     try:
-        resumo = gerar_resumo(os_obj.problema_relatado)
-        pre_diag = gerar_pre_diagnostico(
-            os_obj.tipo_aparelho, os_obj.marca_modelo, os_obj.problema_relatado
-        )
-        os_obj.diagnostico_tecnico = pre_diag
-        os_obj.observacoes = (os_obj.observacoes or "") + f"\n\nResumo: {resumo}"
-    except Exception as e:
-        print(f"Erro ao gerar conteúdo com IA: {e}")
+        quantidade = int(data.get("quantidade") or 1)
+    except (TypeError, ValueError):
+        abort(400, description="quantidade deve ser um número inteiro")
 
-    db.session.commit()
+    maximo = current_app.config["OS_NUMERO_MAXIMO_RESERVA"]
+    if quantidade < 1 or quantidade > maximo:
+        abort(400, description=f"quantidade deve estar entre 1 e {maximo}")
 
-    return jsonify(os_to_dict(os_obj)), 201
+    prefixo = (data.get("prefixo") or "").strip() or None
+    if prefixo and len(prefixo) > 10:
+        abort(400, description="prefixo deve ter no máximo 10 caracteres")
+
+    numeros = reservar_numeros_os(quantidade, prefixo)
+    db.session.commit()
+    return jsonify({"numeros": numeros}), 201
 
 
 @bp.get("/<int:os_id>")
@@ -136,6 +309,7 @@ def atualizar_os(os_id: int):
 
     # Verificar se o status está sendo alterado para "pronto"
     status_anterior = os_obj.status
+    prioridade_anterior = os_obj.prioridade
     novo_status = data.get("status")
 
     if "clienteId" in data:
@@ -163,14 +337,21 @@ def atualizar_os(os_id: int):
     if "valorOrcamento" in data:
         os_obj.valor_orcamento = data["valorOrcamento"]
 
+    registrar_eventos_os([
+        {"os_id": os_obj.id, "tipo": tipo, "valor_anterior": anterior, "valor_novo": atual}
+        for tipo, anterior, atual in [
+            ("status", status_anterior, os_obj.status),
+            ("prioridade", prioridade_anterior, os_obj.prioridade),
+        ]
+        if anterior != atual
+    ])
     db.session.commit()
+    invalidar_status_publico(os_obj.numero_os)
 
     # Criar notificação se o status mudou para "pronto"
     if status_anterior != "pronto" and novo_status == "pronto":
         try:
-            usuarios = Usuario.query.filter_by(ativo=True).all()
-            for usuario in usuarios:
-                criar_notificacao_os_pronta(os_obj, usuario.id)
+            criar_notificacao_os_pronta(os_obj)
             db.session.commit()
         except Exception as e:
             print(f"Aviso: Não foi possível criar notificações para OS pronta: {e}")
@@ -179,6 +360,188 @@ def atualizar_os(os_id: int):
     return jsonify(os_to_dict(os_obj))
 
 
+@bp.patch("/status")
+@login_required
+def alterar_status_em_massa():
+    """Altera o status de várias OS em uma única transação.
+
+    Body: {"ids": [1, 2, ...], "status": "pronto"}. As OS são atualizadas com
+    um único UPDATE e, quando o novo status é "pronto", as notificações são
+    criadas com um único INSERT. A resposta traz o resultado de cada id:
+    "atualizada", "inalterada" (já estava no status) ou "nao_encontrada".
+    """
+    data = request.get_json() or {}
+    novo_status = data.get("status")
+    if novo_status not in STATUS_OS:
+        abort(400, description=f"status deve ser um de: {', '.join(STATUS_OS)}")
+
+    try:
+        ids = list(dict.fromkeys(int(i) for i in data.get("ids") or []))
+    except (TypeError, ValueError):
+        abort(400, description="ids deve ser uma lista de números inteiros")
+    if not ids:
+        abort(400, description="Informe ao menos um id")
+    if len(ids) > MAXIMO_OS_POR_ALTERACAO_EM_MASSA:
+        abort(400, description=f"Máximo de {MAXIMO_OS_POR_ALTERACAO_EM_MASSA} OS por requisição")
+
+    atuais = {
+        linha.id: linha
+        for linha in db.session.query(
+            OrdemServico.id,
+            OrdemServico.status,
+            OrdemServico.numero_os,
+            OrdemServico.cliente_id,
+            OrdemServico.valor_orcamento,
+        )
+        .filter(OrdemServico.id.in_(ids))
+        .with_for_update()
+    }
+
+    alterar = [i for i in ids if i in atuais and atuais[i].status != novo_status]
+    if alterar:
+        db.session.execute(
+            update(OrdemServico)
+            .where(OrdemServico.id.in_(alterar), OrdemServico.status != novo_status)
+            .values(status=novo_status),
+            execution_options={"synchronize_session": False},
+        )
+        registrar_eventos_os([
+            {"os_id": i, "tipo": "status", "valor_anterior": atuais[i].status,
+             "valor_novo": novo_status}
+            for i in alterar
+        ])
+
+        # O UPDATE direto não passa pelos eventos do mapper: ajusta os totais por cliente
+        deltas = {}
+        for i in alterar:
+            antes = contribuicao_os(atuais[i].status, atuais[i].valor_orcamento)
+            depois = contribuicao_os(novo_status, atuais[i].valor_orcamento)
+            acumulado = deltas.setdefault(atuais[i].cliente_id, [0, 0, 0])
+            for j, (a, d) in enumerate(zip(antes, depois)):
+                acumulado[j] += d - a
+        conexao = db.session.connection()
+        for cliente_id, (total, abertas, faturado) in deltas.items():
+            ajustar_contadores_cliente(conexao, cliente_id, total, abertas, faturado)
+
+    notificacoes_criadas = 0
+    if novo_status == "pronto":
+        notificacoes_criadas = criar_notificacoes_os_pronta_em_massa(alterar)
+
+    db.session.commit()
+
+    for i in alterar:
+        invalidar_status_publico(atuais[i].numero_os)
+
+    alterados = set(alterar)
+    resultados = [
+        {
+            "id": i,
+            "resultado": "atualizada" if i in alterados
+            else "inalterada" if i in atuais
+            else "nao_encontrada",
+        }
+        for i in ids
+    ]
+    return jsonify({
+        "status": novo_status,
+        "atualizadas": len(alterar),
+        "notificacoesCriadas": notificacoes_criadas,
+        "resultados": resultados,
+    })
+
+
+@bp.get("/<int:os_id>/eventos")
+@login_required
+def listar_eventos_os(os_id: int):
+    """Histórico de mudanças de status e prioridade da OS, do mais antigo ao mais recente."""
+    OrdemServico.query.get_or_404(os_id)
+    eventos = (
+        EventoOS.query.filter_by(os_id=os_id)
+        .order_by(EventoOS.criado_em, EventoOS.id)
+        .all()
+    )
+    return jsonify([
+        {
+            "id": e.id,
+            "tipo": e.tipo,
+            "valorAnterior": e.valor_anterior,
+            "valorNovo": e.valor_novo,
+            "usuarioId": e.usuario_id,
+            "data": e.criado_em,
+        }
+        for e in eventos
+    ])
+
+
+# Tempo em cada status (em horas) por tipo de aparelho. LEAD() liga cada
+# transição à seguinte da mesma OS; os percentis usam o método nearest-rank
+# (menor valor cuja posição na ordem é >= p * total).
+_SQL_TEMPO_EM_STATUS = """
+WITH transicoes AS (
+    SELECT e.os_id, e.valor_novo AS status, e.criado_em AS inicio,
+           LEAD(e.criado_em) OVER (PARTITION BY e.os_id ORDER BY e.criado_em, e.id) AS fim
+    FROM os_eventos e
+    WHERE e.tipo = 'status'
+),
+duracoes AS (
+    SELECT o.tipo_aparelho, t.status, {horas} AS horas
+    FROM transicoes t
+    JOIN ordens_servico o ON o.id = t.os_id
+    WHERE t.fim IS NOT NULL
+      AND o.excluido_em IS NULL
+      AND (:inicio IS NULL OR t.inicio >= :inicio)
+      AND (:fim IS NULL OR t.inicio <= :fim)
+),
+ordenadas AS (
+    SELECT tipo_aparelho, status, horas,
+           ROW_NUMBER() OVER (PARTITION BY tipo_aparelho, status ORDER BY horas) AS posicao,
+           COUNT(*) OVER (PARTITION BY tipo_aparelho, status) AS total
+    FROM duracoes
+)
+SELECT tipo_aparelho, status, MAX(total) AS quantidade,
+       MIN(CASE WHEN posicao >= 0.5 * total THEN horas END) AS p50,
+       MIN(CASE WHEN posicao >= 0.9 * total THEN horas END) AS p90,
+       AVG(horas) AS media
+FROM ordenadas
+GROUP BY tipo_aparelho, status
+ORDER BY tipo_aparelho, status
+"""
+
+_HORAS_ENTRE = {
+    "sqlite": "(julianday(t.fim) - julianday(t.inicio)) * 24",
+    "mysql": "TIMESTAMPDIFF(SECOND, t.inicio, t.fim) / 3600",
+}
+
+
+@bp.get("/analises/tempo-status")
+@login_required
+def analisar_tempo_em_status():
+    """Percentis (p50/p90) e média do tempo em cada status, por tipo de aparelho.
+
+    Considera apenas períodos já encerrados (a OS saiu do status). Aceita
+    `dataInicio`/`dataFim` para filtrar pelo início do período.
+    """
+    horas = _HORAS_ENTRE.get(db.engine.dialect.name)
+    if horas is None:
+        abort(501, description="Análise não disponível para este banco de dados")
+
+    linhas = db.session.execute(
+        text(_SQL_TEMPO_EM_STATUS.format(horas=horas)),
+        {"inicio": obter_data("dataInicio"), "fim": obter_data("dataFim")},
+    )
+    return jsonify([
+        {
+            "tipoAparelho": linha.tipo_aparelho,
+            "status": linha.status,
+            "quantidade": linha.quantidade,
+            "p50Horas": round(float(linha.p50), 2),
+            "p90Horas": round(float(linha.p90), 2),
+            "mediaHoras": round(float(linha.media), 2),
+        }
+        for linha in linhas
+    ])
+
+
 @bp.post("/<int:os_id>/gerar-diagnostico")
 @login_required
 def gerar_diagnostico_ia(os_id: int):
@@ -197,6 +560,82 @@ def gerar_diagnostico_ia(os_id: int):
         return jsonify({"erro": "Falha ao gerar diagnóstico"}), 500
 
 
+@bp.post("/diagnosticos-lote")
+@login_required
+def criar_lote_diagnostico():
+    """Agenda pré-diagnósticos com IA para várias OS.
+
+    Aceita uma lista explícita (`ids`) ou um filtro (`filtro.status` e
+    `filtro.semDiagnostico`). A execução é assíncrona: a resposta traz o lote
+    criado, cujo progresso é consultado em GET /diagnosticos-lote/<id>.
+    """
+    data = request.get_json() or {}
+    config = current_app.config
+
+    apenas_sem_diagnostico = False
+    if data.get("ids"):
+        try:
+            os_ids = sorted({int(i) for i in data["ids"]})
+        except (TypeError, ValueError):
+            abort(400, description="ids deve ser uma lista de números inteiros")
+    elif data.get("filtro"):
+        filtro = data["filtro"]
+        query = db.session.query(OrdemServico.id)
+        if filtro.get("status"):
+            status = filtro["status"]
+            query = query.filter(
+                OrdemServico.status.in_(status if isinstance(status, list) else [status])
+            )
+        if filtro.get("semDiagnostico"):
+            apenas_sem_diagnostico = True
+            query = query.filter(
+                db.or_(
+                    OrdemServico.diagnostico_tecnico.is_(None),
+                    OrdemServico.diagnostico_tecnico == "",
+                )
+            )
+        os_ids = [
+            i for (i,) in query.order_by(OrdemServico.id).limit(config["IA_LOTE_MAXIMO_OS"] + 1)
+        ]
+    else:
+        abort(400, description="Informe ids ou filtro")
+
+    if not os_ids:
+        abort(400, description="Nenhuma OS encontrada para o lote")
+    if len(os_ids) > config["IA_LOTE_MAXIMO_OS"]:
+        abort(400, description=f"Máximo de {config['IA_LOTE_MAXIMO_OS']} OS por lote")
+
+    try:
+        concorrencia = int(data.get("concorrencia") or config["IA_LOTE_CONCORRENCIA_PADRAO"])
+    except (TypeError, ValueError):
+        abort(400, description="concorrencia deve ser um número inteiro")
+    concorrencia = max(1, min(concorrencia, config["IA_LOTE_CONCORRENCIA_MAXIMA"]))
+
+    lote = LoteDiagnostico(
+        os_ids=os_ids,
+        total=len(os_ids),
+        concorrencia=concorrencia,
+        apenas_sem_diagnostico=apenas_sem_diagnostico,
+        usuario_id=g.usuario_id,
+    )
+    db.session.add(lote)
+    db.session.commit()
+
+    iniciar_lote(current_app._get_current_object(), lote.id)
+
+    resposta = jsonify(lote_to_dict(lote))
+    resposta.headers["Location"] = f"/api/os/diagnosticos-lote/{lote.id}"
+    return resposta, 202
+
+
+@bp.get("/diagnosticos-lote/<int:lote_id>")
+@login_required
+def obter_lote_diagnostico(lote_id: int):
+    lote = LoteDiagnostico.query.get_or_404(lote_id)
+    verificar_lote_interrompido(lote, current_app.config["IA_LOTE_TIMEOUT_MINUTOS"])
+    return jsonify(lote_to_dict(lote))
+
+
 @bp.post("/gerar-diagnostico-parametros")
 @login_required
 def gerar_diagnostico_parametros():
@@ -220,37 +659,164 @@ def gerar_diagnostico_parametros():
         return jsonify({"erro": "Falha ao gerar diagnóstico"}), 500
 
 
+@bp.get("/ia/cache")
+@login_required
+def obter_estatisticas_cache_ia():
+    return jsonify(estatisticas_cache_ia())
+
+
+@bp.post("/ia/cache/aquecer")
+@login_required
+def aquecer_cache_ia():
+    """Pré-carrega o cache de IA com respostas já gravadas nas OS existentes.
+
+    `limite` (OS analisadas) vai até IA_CACHE_MAX_ENTRADAS, que também é o padrão.
+    """
+    data = request.get_json(silent=True) or {}
+    maximo = current_app.config["IA_CACHE_MAX_ENTRADAS"]
+    try:
+        limite = int(data.get("limite") or maximo)
+    except (TypeError, ValueError):
+        abort(400, description="limite deve ser um número inteiro")
+    if limite < 1:
+        abort(400, description="limite deve ser maior que zero")
+    resultado = aquecer_cache(limite=min(limite, maximo))
+    return jsonify(resultado)
+
+
 @bp.delete("/<int:os_id>")
 @login_required
 def deletar_os(os_id: int):
-    os_obj = OrdemServico.query.get_or_404(os_id)
-    db.session.delete(os_obj)
-    db.session.commit()
+    """Exclui a OS (`modo=logica` para exclusão lógica).
+
+    A exclusão definitiva também remove uma OS que já tinha exclusão lógica.
+    """
+    _, modo = ler_pedido_exclusao(
+        {"ids": [os_id], "modo": request.args.get("modo")},
+        current_app.config["EXCLUSAO_MODO_PADRAO"],
+    )
+    resultado = concluir_exclusao(excluir_ordens_servico([os_id], modo))
+    if not resultado["ordens"]:
+        abort(404)
     return "", 204
 
 
+@bp.post("/lote/excluir")
+@login_required
+def excluir_os_em_massa():
+    """Exclui várias OS com comandos em conjunto.
+
+    Body: {"ids": [1, 2, ...], "modo": "definitiva" | "logica"}.
+    """
+    ids, modo = ler_pedido_exclusao(
+        request.get_json() or {}, current_app.config["EXCLUSAO_MODO_PADRAO"]
+    )
+    resultado = concluir_exclusao(excluir_ordens_servico(ids, modo))
+    return jsonify({"modo": modo, **resultado})
+
+
+def concluir_exclusao(resultado: dict) -> dict:
+    """Commit de uma exclusão de `exclusao.py` e limpeza do que depende dela."""
+    db.session.commit()
+    for numero_os in resultado.pop("numeros_os"):
+        invalidar_status_publico(numero_os)
+    if resultado["notificacoes"]:
+        # Notificações não lidas podem ter sumido da lista de alguém
+        reconciliar_contadores(avisar=False)
+    return resultado
+
+
+def _cache_status_publico() -> CacheTTL:
+    cache = current_app.extensions.get("cache_status_os")
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            "cache_status_os",
+            CacheTTL(current_app.config["STATUS_OS_CACHE_TTL"], max_itens=5000),
+        )
+    return cache
+
+
+def invalidar_status_publico(numero_os: str):
+    """Remove a OS do cache da consulta pública após uma alteração."""
+    _cache_status_publico().invalidar(numero_os)
+
+
+def _limitador_status_publico(app) -> LimitadorTokenBucket:
+    return LimitadorTokenBucket(
+        capacidade=app.config["STATUS_OS_LIMITE_RAJADA"],
+        fichas_por_segundo=app.config["STATUS_OS_LIMITE_POR_MINUTO"] / 60,
+    )
+
+
+def _carregar_status_publico(numero_os: str):
+    linha = (
+        db.session.query(
+            OrdemServico.numero_os,
+            OrdemServico.status,
+            Cliente.nome,
+            OrdemServico.tipo_aparelho,
+            OrdemServico.marca_modelo,
+            OrdemServico.problema_relatado,
+            OrdemServico.diagnostico_tecnico,
+            OrdemServico.prazo_estimado,
+            OrdemServico.prazo_limite,
+            OrdemServico.valor_orcamento,
+            OrdemServico.criado_em,
+            OrdemServico.atualizado_em,
+        )
+        .outerjoin(Cliente, Cliente.id == OrdemServico.cliente_id)
+        .filter(OrdemServico.numero_os == numero_os)
+        .first()
+    )
+    if not linha:
+        return None
+
+    criado_em = linha.criado_em
+    dados = {
+        "numeroOS": linha.numero_os,
+        "status": linha.status,
+        "clienteNome": linha.nome or "Cliente não informado",
+        "tipoAparelho": linha.tipo_aparelho,
+        "marcaModelo": linha.marca_modelo,
+        "problemaRelatado": linha.problema_relatado,
+        "diagnosticoTecnico": linha.diagnostico_tecnico,
+        "prazoEstimado": linha.prazo_estimado,
+        "valorOrcamento": float(linha.valor_orcamento or 0),
+        "dataCriacao": criado_em.isoformat() if criado_em else None,
+        "dataAtualizacao": linha.atualizado_em.isoformat() if linha.atualizado_em else None,
+        "prazoLimite": linha.prazo_limite.isoformat() if linha.prazo_limite else None
+    }
+    corpo = json.dumps(dados, ensure_ascii=False, sort_keys=True)
+    return {
+        "corpo": corpo,
+        "etag": hashlib.sha1(corpo.encode("utf-8")).hexdigest(),
+        "ultima_modificacao": linha.atualizado_em or criado_em,
+    }
+
+
 @bp.get("/status/<numero_os>")
+@limitar_por_ip(_limitador_status_publico)
 def consultar_status_os_publico(numero_os: str):
-    """Rota pública para consulta de status da OS por clientes."""
-    os_obj = OrdemServico.query.filter_by(numero_os=numero_os).first()
-    if not os_obj:
-        return jsonify({
-            "erro": "OS não encontrada",
-            "mensagem": f"Não foi encontrada uma ordem de serviço com o número {numero_os}"
-        }), 404
+    """Rota pública para consulta de status da OS por clientes.
+
+    As respostas ficam em cache por número da OS e trazem ETag/Last-Modified,
+    permitindo que consultas repetidas sem alteração recebam 304.
+    """
+    cache = _cache_status_publico()
+    status = cache.obter(numero_os)
+    if status is None:
+        status = _carregar_status_publico(numero_os)
+        if status is None:
+            return jsonify({
+                "erro": "OS não encontrada",
+                "mensagem": f"Não foi encontrada uma ordem de serviço com o número {numero_os}"
+            }), 404
+        cache.definir(numero_os, status)
 
     # Retorna dados públicos da OS
-    return jsonify({
-        "numeroOS": os_obj.numero_os,
-        "status": os_obj.status,
-        "clienteNome": os_obj.cliente.nome if os_obj.cliente else "Cliente não informado",
-        "tipoAparelho": os_obj.tipo_aparelho,
-        "marcaModelo": os_obj.marca_modelo,
-        "problemaRelatado": os_obj.problema_relatado,
-        "diagnosticoTecnico": os_obj.diagnostico_tecnico,
-        "prazoEstimado": os_obj.prazo_estimado,
-        "valorOrcamento": float(os_obj.valor_orcamento or 0),
-        "dataCriacao": os_obj.criado_em.isoformat() if os_obj.criado_em else None,
-        "dataAtualizacao": os_obj.atualizado_em.isoformat() if os_obj.atualizado_em else None,
-        "prazoLimite": (os_obj.criado_em + timedelta(days=os_obj.prazo_estimado)).isoformat() if os_obj.criado_em else None
-    })
+    resposta = current_app.response_class(status["corpo"], mimetype="application/json")
+    resposta.set_etag(status["etag"])
+    if status["ultima_modificacao"]:
+        resposta.last_modified = status["ultima_modificacao"]
+    resposta.cache_control.no_cache = True
+    return resposta.make_conditional(request)
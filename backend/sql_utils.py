@@ -0,0 +1,48 @@
+"""Comandos SQL que variam conforme o banco (SQLite em desenvolvimento, MySQL em produção)."""
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from extensions import db
+
+
+def insert_ignorando_duplicadas(tabela):
+    """INSERT que ignora as linhas que violariam uma chave primária ou índice único."""
+    dialeto = db.engine.dialect.name
+    if dialeto == "sqlite":
+        return sqlite_insert(tabela).on_conflict_do_nothing()
+    if dialeto == "postgresql":
+        return postgresql_insert(tabela).on_conflict_do_nothing()
+    return insert(tabela).prefix_with("IGNORE")
+
+
+def upsert(tabela, linha: dict, chaves: list, atualizar: dict):
+    """INSERT de `linha` que, se a chave já existir, aplica `atualizar` à linha existente."""
+    dialeto = db.engine.dialect.name
+    if dialeto == "mysql":
+        return mysql_insert(tabela).values(linha).on_duplicate_key_update(**atualizar)
+    insert_dialeto = postgresql_insert if dialeto == "postgresql" else sqlite_insert
+    return insert_dialeto(tabela).values(linha).on_conflict_do_update(
+        index_elements=chaves, set_=atualizar
+    )
+
+
+def upsert_em_lote(tabela, chaves: list, colunas_atualizar: list):
+    """Versão de `upsert` para executemany: a linha existente recebe os valores da nova.
+
+    Uso: `db.session.execute(upsert_em_lote(...), [linha1, linha2, ...])`.
+    """
+    dialeto = db.engine.dialect.name
+    if dialeto == "mysql":
+        comando = mysql_insert(tabela)
+        return comando.on_duplicate_key_update(
+            {coluna: comando.inserted[coluna] for coluna in colunas_atualizar}
+        )
+    insert_dialeto = postgresql_insert if dialeto == "postgresql" else sqlite_insert
+    comando = insert_dialeto(tabela)
+    return comando.on_conflict_do_update(
+        index_elements=chaves,
+        set_={coluna: comando.excluded[coluna] for coluna in colunas_atualizar},
+    )
@@ -15,7 +15,7 @@ def testar_api_os():
     try:
         response = requests.get(f"{BASE_URL}/api/os")
         if response.status_code == 200:
-            data = response.json()
+            data = response.json()["items"]
             print(f"✅ API OS: {len(data)} registros retornados")
 
             # Mostra detalhes das OS
@@ -41,7 +41,7 @@ def testar_api_clientes():
     try:
         response = requests.get(f"{BASE_URL}/api/clientes")
         if response.status_code == 200:
-            data = response.json()
+            data = response.json()["items"]
             print(f"✅ API Clientes: {len(data)} registros retornados")
 
             for cliente in data[:3]:  # Até 3 registros
@@ -62,7 +62,7 @@ def testar_api_estoque():
     try:
         response = requests.get(f"{BASE_URL}/api/estoque")
         if response.status_code == 200:
-            data = response.json()
+            data = response.json()["items"]
             print(f"✅ API Estoque: {len(data)} registros retornados")
 
             for produto in data[:3]:  # Até 3 registros
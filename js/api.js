@@ -89,12 +89,42 @@ async function apiRequest(path, options = {}) {
   }
 }
 
+// Percorre todas as páginas de uma listagem paginada por cursor
+// (envelope { items, next_cursor, total_estimate }) e devolve os itens.
+async function listarTodasPaginasApi(path, limite = 200) {
+  const separador = path.includes("?") ? "&" : "?";
+  let itens = [];
+  let cursor = null;
+
+  do {
+    let url = `${path}${separador}limite=${limite}`;
+    if (cursor) {
+      url += `&cursor=${encodeURIComponent(cursor)}`;
+    }
+    const pagina = await apiRequest(url);
+    itens = itens.concat(pagina.items);
+    cursor = pagina.next_cursor;
+  } while (cursor);
+
+  return itens;
+}
+
 // ========================================
 // CLIENTES - Funções específicas
 // ========================================
 
 async function listarClientesApi() {
-  return await apiRequest("/api/clientes");
+  return await listarTodasPaginasApi("/api/clientes/");
+}
+
+async function buscarClientesApi(termo, limite = 20) {
+  const params = new URLSearchParams({ q: termo, limite });
+  const pagina = await apiRequest(`/api/clientes/busca?${params}`);
+  return pagina.items;
+}
+
+async function obterResumoClienteApi(id, limite = 10) {
+  return await apiRequest(`/api/clientes/${id}/resumo?limite=${limite}`);
 }
 
 async function criarClienteApi(dados) {
@@ -122,8 +152,20 @@ async function deletarClienteApi(id) {
 // ESTOQUE - Funções específicas
 // ========================================
 
+async function autocompleteApi(tipo, termo, limite = 10) {
+  const params = new URLSearchParams({ q: termo, limite });
+  const resposta = await apiRequest(`/api/autocomplete/${tipo}?${params}`);
+  return resposta.items;
+}
+
+// Token curto para abrir o stream de eventos (EventSource não envia cabeçalhos)
+async function obterTokenEventosApi() {
+  const resposta = await apiRequest("/api/eventos/token", { method: "POST" });
+  return resposta.token;
+}
+
 async function listarProdutosApi() {
-  return await apiRequest("/api/estoque");
+  return await listarTodasPaginasApi("/api/estoque/");
 }
 
 async function criarProdutoApi(dados) {
@@ -152,7 +194,13 @@ async function deletarProdutoApi(id) {
 // ========================================
 
 async function listarOSApi() {
-  return await apiRequest("/api/os");
+  return await listarTodasPaginasApi("/api/os/");
+}
+
+async function buscarOSApi(termo, limite = 100) {
+  return await apiRequest(
+    `/api/os/busca?q=${encodeURIComponent(termo)}&limite=${limite}`
+  );
 }
 
 async function criarOSApi(dados) {
@@ -49,12 +49,79 @@ class NotificationManager {
         // Carregar notificações iniciais
         this.carregarNotificacoes();
 
-        // Atualizar contador periodicamente
-        setInterval(() => {
+        // Atualizações em tempo real; sem suporte a SSE, volta a consultar o contador
+        this.eventSource = null;
+        this.pollingId = null;
+        this.conectarEventos();
+    }
+
+    async conectarEventos() {
+        if (!window.EventSource || !getToken()) {
+            this.iniciarPolling();
+            return;
+        }
+
+        // O token de login não vai na URL: o stream usa um token curto próprio
+        let tokenEventos;
+        try {
+            tokenEventos = await obterTokenEventosApi();
+        } catch (error) {
+            console.error('Erro ao obter token de eventos:', error);
+            this.iniciarPolling();
+            return;
+        }
+
+        const url = `/api/eventos/stream?token=${encodeURIComponent(tokenEventos)}`;
+        this.eventSource = new EventSource(url);
+
+        this.eventSource.addEventListener('open', () => {
+            this.falhasEventos = 0;
+            this.pararPolling();
+        });
+
+        this.eventSource.addEventListener('contador', (e) => {
+            this.exibirContador(JSON.parse(e.data).nao_lidas);
+        });
+
+        this.eventSource.addEventListener('notificacao_nova', () => {
+            if (this.isOpen) {
+                this.carregarNotificacoes();
+            }
+        });
+
+        // Repassa as mudanças de status para as páginas interessadas (ex.: quadro de OS)
+        this.eventSource.addEventListener('os_status', (e) => {
+            window.dispatchEvent(new CustomEvent('os-status', { detail: JSON.parse(e.data) }));
+        });
+
+        this.eventSource.addEventListener('error', () => {
+            // O navegador reconecta sozinho; enquanto isso, o contador segue por polling.
+            // Se a reconexão for recusada (token curto vencido), pede um token novo.
+            this.falhasEventos = (this.falhasEventos || 0) + 1;
+            this.iniciarPolling();
+            if (this.falhasEventos >= 5 || this.eventSource.readyState === EventSource.CLOSED) {
+                this.eventSource.close();
+                this.eventSource = null;
+                if (this.falhasEventos < 5) {
+                    setTimeout(() => this.conectarEventos(), 5000);
+                }
+            }
+        });
+    }
+
+    iniciarPolling() {
+        if (this.pollingId) return;
+        this.pollingId = setInterval(() => {
             this.atualizarContador();
         }, 30000); // A cada 30 segundos
     }
 
+    pararPolling() {
+        if (!this.pollingId) return;
+        clearInterval(this.pollingId);
+        this.pollingId = null;
+    }
+
     toggleDropdown() {
         if (this.isOpen) {
             this.closeDropdown();
@@ -85,7 +152,8 @@ class NotificationManager {
             });
 
             if (response.ok) {
-                this.notificacoes = await response.json();
+                const pagina = await response.json();
+                this.notificacoes = pagina.items;
                 this.renderizarNotificacoes();
                 this.atualizarContador();
             } else {
@@ -106,15 +174,19 @@ class NotificationManager {
 
             if (response.ok) {
                 const data = await response.json();
-                const count = data.nao_lidas || 0;
-                this.notificationCount.textContent = count;
-                this.notificationCount.style.display = count > 0 ? 'flex' : 'none';
+                this.exibirContador(data.nao_lidas);
             }
         } catch (error) {
             console.error('Erro ao atualizar contador:', error);
         }
     }
 
+    exibirContador(naoLidas) {
+        const count = naoLidas || 0;
+        this.notificationCount.textContent = count;
+        this.notificationCount.style.display = count > 0 ? 'flex' : 'none';
+    }
+
     renderizarNotificacoes() {
         if (this.notificacoes.length === 0) {
             this.notificationList.innerHTML = `
@@ -161,7 +233,8 @@ class NotificationManager {
             'os_atrasada': '⏰',
             'estoque_critico': '⚠️',
             'os_pronta': '✅',
-            'cliente_novo': '👤'
+            'cliente_novo': '👤',
+            'clientes_importados': '📥'
         };
         return icones[tipo] || '🔔';
     }
@@ -269,6 +342,9 @@ class NotificationManager {
                     window.location.href = '/clientes';
                 }
                 break;
+            case 'clientes_importados':
+                window.location.href = '/clientes';
+                break;
             default:
                 window.location.href = '/dashboard';
         }